@@ -0,0 +1,145 @@
+import asyncio
+import json
+import re
+import time
+from collections import OrderedDict
+
+def normalize_question(question: str) -> str:
+    """
+    Normalize a question so trivially different spellings share a cache entry.
+
+    Case, surrounding/repeated whitespace and trailing punctuation are ignored,
+    so "Add 3 and 4", "add 3  and 4?" and " ADD 3 AND 4. " all map to one key.
+    """
+    question = re.sub(r"\s+", " ", question.strip().lower())
+    return question.rstrip(" ?!.")
+
+class AnswerCache:
+    """
+    LRU cache of finished agent responses with TTL, memory cap and in-flight coalescing.
+
+    Identical questions that arrive while one run is already in progress wait on
+    that run instead of starting their own. Only successful responses are cached.
+    The cache is meant to be used from a single asyncio event loop.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300.0, max_bytes: int = 8 * 1024 * 1024):
+        """
+        Args:
+            max_entries: Maximum number of cached answers (0 disables caching)
+            ttl_seconds: How long an answer stays valid after it is stored
+            max_bytes: Approximate cap on the memory used by cached answers
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (expires_at, size, response)
+        self._inflight = {}  # key -> asyncio.Future shared by coalesced callers
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    async def get_or_compute(self, question: str, compute):
+        """
+        Return the cached response for a question, or compute it once.
+
+        Args:
+            question: The user's question
+            compute: Zero-argument coroutine function producing the response dict
+
+        Returns:
+            dict: A copy of the response, safe for the caller to modify
+        """
+        key = normalize_question(question)
+
+        response = self._lookup(key)
+        if response is not None:
+            self.hits += 1
+            return dict(response)
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            return dict(await asyncio.shield(inflight))
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            response = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved in case nobody was waiting on it
+            future.exception()
+            raise
+        else:
+            future.set_result(response)
+            if response.get("success"):
+                self._store(key, response)
+            return dict(response)
+        finally:
+            self._inflight.pop(key, None)
+
+    def _lookup(self, key: str):
+        """
+        Get a live entry, dropping it if it has expired.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, size, response = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self._bytes -= size
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    def _store(self, key: str, response: dict):
+        """
+        Insert a response and evict least recently used entries past the limits.
+        """
+        if self.max_entries <= 0:
+            return
+        size = len(json.dumps(response, default=str))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, size, response)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    def clear(self):
+        """
+        Drop every cached answer (in-flight runs are left alone).
+        """
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        """
+        Get cache counters and current size.
+
+        Returns:
+            dict: Hits, misses, coalesced waits, evictions, entries and bytes
+        """
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "inflight": len(self._inflight)
+        }
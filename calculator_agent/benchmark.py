@@ -0,0 +1,258 @@
+"""
+Offline benchmark comparing the Graph API and Functional API agents.
+
+A scripted chat model stands in for Claude, so no network or API key is needed.
+It asks for a fixed number of tool calls ("hops") and then answers, which lets
+us measure the framework overhead of each agent implementation on its own.
+
+Run it with:
+    python -m calculator_agent.benchmark --max-hops 4 --output bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from importlib import metadata
+
+# Ensure the project root is importable when running this file directly
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+PARENT_DIR = os.path.dirname(PACKAGE_DIR)
+if PARENT_DIR not in sys.path:
+    sys.path.insert(0, PARENT_DIR)
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from calculator_agent import model as model_module
+from calculator_agent.state import create_initial_state
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    A fake chat model that calls the add tool a fixed number of times, then answers.
+
+    The number of hops is read from the question ("hops=3"), so one model can
+    serve every workload concurrently without any shared state.
+    """
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _respond(self, messages) -> AIMessage:
+        """
+        Decide the next scripted step from the conversation so far.
+        """
+        question = next(m for m in reversed(messages) if isinstance(m, HumanMessage))
+        hops = int(question.content.rsplit("hops=", 1)[1])
+        done = 0
+        for message in reversed(messages):
+            if message is question:
+                break
+            done += isinstance(message, ToolMessage)
+        if done >= hops:
+            return AIMessage(content=f"Finished after {done} tool calls.")
+        return AIMessage(
+            content="",
+            tool_calls=[{"name": "add", "args": {"a": done, "b": 1}, "id": f"call_{done}"}]
+        )
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._respond(messages))])
+
+@contextmanager
+def scripted_model(latency: float = 0.0):
+    """
+    Temporarily replace the registry's default model with a ScriptedChatModel.
+    """
+    key = (model_module.DEFAULT_MODEL_NAME, model_module.DEFAULT_TEMPERATURE)
+    fake = ScriptedChatModel(latency=latency)
+    previous = model_module._MODEL_REGISTRY.get(key)
+    model_module._MODEL_REGISTRY[key] = (fake, fake, model_module.TOOLS_BY_NAME)
+    try:
+        yield fake
+    finally:
+        if previous is None:
+            model_module._MODEL_REGISTRY.pop(key, None)
+        else:
+            model_module._MODEL_REGISTRY[key] = previous
+
+def build_runners() -> dict:
+    """
+    Build a callable per implementation that runs one question to completion.
+    """
+    from calculator_agent.graph_api import create_graph_agent
+    from calculator_agent.functional_api import create_functional_agent
+
+    # The fast path would bypass the model entirely, so it's off for a fair comparison
+    graph_agent = create_graph_agent(fast_path=False)
+    functional_agent = create_functional_agent()
+
+    return {
+        "graph": lambda question: graph_agent.invoke(
+            create_initial_state([HumanMessage(content=question)]),
+            {"recursion_limit": 1000}
+        ),
+        "functional": lambda question: functional_agent.invoke([HumanMessage(content=question)]),
+    }
+
+def percentile(values: list[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of a list of values.
+    """
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def measure_latency(run, question: str, iterations: int) -> list[float]:
+    """
+    Run a question repeatedly and return each run's wall time in milliseconds.
+    """
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        run(question)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+def measure_throughput(run, question: str, concurrency: int, total_runs: int) -> float:
+    """
+    Run a question total_runs times on a thread pool and return runs per second.
+    """
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda _: run(question), range(total_runs)))
+    return total_runs / (time.perf_counter() - started)
+
+def measure_peak_memory(run, question: str) -> int:
+    """
+    Return the peak traced memory (in bytes) allocated while running one question.
+    """
+    tracemalloc.start()
+    try:
+        run(question)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def run_benchmarks(
+    max_hops: int = 4,
+    iterations: int = 50,
+    concurrency_levels: tuple[int, ...] = (1, 4, 16),
+    throughput_runs: int = 100,
+    model_latency_ms: float = 0.0
+) -> dict:
+    """
+    Benchmark both agent implementations for workloads of 1 to max_hops tool calls.
+
+    Args:
+        max_hops: Largest number of tool calls per question
+        iterations: Timed runs per workload for the latency percentiles
+        concurrency_levels: Thread counts to measure throughput at
+        throughput_runs: Runs per throughput measurement
+        model_latency_ms: Simulated model latency per call
+
+    Returns:
+        dict: JSON-serializable results with metadata
+    """
+    results = {}
+    with scripted_model(latency=model_latency_ms / 1000):
+        runners = build_runners()
+        for name, run in runners.items():
+            workloads = {}
+            for hops in range(1, max_hops + 1):
+                question = f"Benchmark question hops={hops}"
+                # Warm up once so imports and first-call setup aren't counted
+                run(question)
+                timings = measure_latency(run, question, iterations)
+                # Each hop is one model step plus one tool step, plus the final answer
+                steps = 2 * hops + 1
+                workloads[str(hops)] = {
+                    "steps": steps,
+                    "latency_ms": {
+                        "mean": statistics.fmean(timings),
+                        "p50": percentile(timings, 50),
+                        "p90": percentile(timings, 90),
+                        "p99": percentile(timings, 99),
+                        "max": max(timings),
+                    },
+                    "overhead_per_step_ms": (statistics.median(timings) - model_latency_ms * (hops + 1)) / steps,
+                    "throughput_rps": {
+                        str(level): measure_throughput(run, question, level, throughput_runs)
+                        for level in concurrency_levels
+                    },
+                    "peak_memory_bytes": measure_peak_memory(run, question),
+                }
+            results[name] = workloads
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "packages": {
+                package: _package_version(package)
+                for package in ("langgraph", "langchain-core", "langchain")
+            },
+            "config": {
+                "max_hops": max_hops,
+                "iterations": iterations,
+                "concurrency_levels": list(concurrency_levels),
+                "throughput_runs": throughput_runs,
+                "model_latency_ms": model_latency_ms,
+            },
+        },
+        "results": results,
+    }
+
+def _package_version(package: str) -> str | None:
+    """
+    Installed version of a package, or None if it isn't installed.
+    """
+    try:
+        return metadata.version(package)
+    except metadata.PackageNotFoundError:
+        return None
+
+def main(argv=None):
+    """
+    Command-line entry point: run the benchmarks and write the JSON report.
+    """
+    parser = argparse.ArgumentParser(description="Offline Graph API vs Functional API benchmark")
+    parser.add_argument("--max-hops", type=int, default=4, help="largest number of tool calls per question")
+    parser.add_argument("--iterations", type=int, default=50, help="timed runs per workload")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16], help="thread counts for throughput")
+    parser.add_argument("--throughput-runs", type=int, default=100, help="runs per throughput measurement")
+    parser.add_argument("--model-latency-ms", type=float, default=0.0, help="simulated model latency per call")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(
+        max_hops=args.max_hops,
+        iterations=args.iterations,
+        concurrency_levels=tuple(args.concurrency),
+        throughput_runs=args.throughput_runs,
+        model_latency_ms=args.model_latency_ms,
+    )
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
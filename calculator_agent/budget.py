@@ -0,0 +1,347 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+
+# Server-wide ceilings applied to every web request (a request may only tighten them)
+DEFAULT_DEADLINE_SECONDS = 60.0
+DEFAULT_MAX_LLM_CALLS = 10
+DEFAULT_MAX_TOOL_CALLS = 25
+
+# LangGraph's own step limit, kept as the floor when a budget raises it
+DEFAULT_RECURSION_LIMIT = 25
+
+# What each exhausted limit is called in partial answers
+_LIMIT_LABELS = {"deadline": "time", "llm_calls": "model call", "tool_calls": "tool call"}
+
+class BudgetExceeded(Exception):
+    """
+    Raised when a model call is cut short by the run's deadline.
+    """
+
+class RunBudget:
+    """
+    Limits one agent run by a wall-clock deadline, model calls and tool calls.
+
+    The budget is shared by every node of the run, so it is safe to use from
+    the worker threads LangGraph runs sync nodes on. The clock starts when the
+    budget is created, so time spent queueing counts against the deadline.
+    """
+
+    def __init__(
+        self,
+        deadline_seconds: float | None = None,
+        max_llm_calls: int | None = None,
+        max_tool_calls: int | None = None
+    ):
+        """
+        Args:
+            deadline_seconds: Wall-clock time allowed for the run (None for no deadline)
+            max_llm_calls: Most model calls the run may make (None for no limit)
+            max_tool_calls: Most tool calls the run may execute (None for no limit)
+        """
+        self.deadline_seconds = deadline_seconds
+        self.max_llm_calls = max_llm_calls
+        self.max_tool_calls = max_tool_calls
+        self.started = time.monotonic()
+        self.llm_calls = 0
+        self.tool_calls = 0
+        self.exceeded = None  # Name of the limit that stopped the run, if any
+        self._lock = threading.Lock()
+
+    def remaining(self) -> float | None:
+        """
+        Seconds left before the deadline (None when there is no deadline).
+        """
+        if self.deadline_seconds is None:
+            return None
+        return max(0.0, self.deadline_seconds - (time.monotonic() - self.started))
+
+    def expired(self) -> bool:
+        """
+        Check whether the deadline has passed.
+        """
+        return self.remaining() == 0.0
+
+    def mark_exceeded(self, limit: str):
+        """
+        Record that a limit stopped the run (the first one recorded wins).
+        """
+        with self._lock:
+            if self.exceeded is None:
+                self.exceeded = limit
+
+    def start_llm_call(self) -> bool:
+        """
+        Reserve one model call.
+
+        Returns:
+            bool: False if the run must stop instead of calling the model
+        """
+        if self.expired():
+            self.mark_exceeded("deadline")
+        with self._lock:
+            if self.exceeded is None and self.max_llm_calls is not None and self.llm_calls >= self.max_llm_calls:
+                self.exceeded = "llm_calls"
+            if self.exceeded is not None:
+                return False
+            self.llm_calls += 1
+            return True
+
+    def grant_tool_calls(self, requested: int) -> int:
+        """
+        Reserve up to `requested` tool calls.
+
+        Returns:
+            int: How many of the calls may run; the rest must be skipped
+        """
+        if self.expired():
+            self.mark_exceeded("deadline")
+        with self._lock:
+            if self.exceeded is not None:
+                return 0
+            granted = requested
+            if self.max_tool_calls is not None:
+                granted = max(0, min(requested, self.max_tool_calls - self.tool_calls))
+                if granted < requested:
+                    self.exceeded = "tool_calls"
+            self.tool_calls += granted
+            return granted
+
+    def can_run_tools(self, count: int) -> bool:
+        """
+        Check, without reserving anything, whether `count` more tool calls would be granted now.
+        """
+        if self.expired():
+            return False
+        with self._lock:
+            if self.exceeded is not None:
+                return False
+            return self.max_tool_calls is None or self.tool_calls + count <= self.max_tool_calls
+
+    def timeout(self, limit: float | None = None) -> float | None:
+        """
+        How long to wait for a call: the time left, capped by an optional per-call limit.
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return limit
+        return remaining if limit is None else min(limit, remaining)
+
+    def recursion_limit(self) -> int:
+        """
+        A LangGraph recursion limit large enough for max_llm_calls model turns.
+        """
+        if self.max_llm_calls is None:
+            return DEFAULT_RECURSION_LIMIT
+        # fast path + (model + tools) per turn + the final, budget-stopped model step
+        return max(DEFAULT_RECURSION_LIMIT, 2 * self.max_llm_calls + 4)
+
+    @property
+    def status(self) -> str:
+        """
+        "budget_exceeded" if a limit stopped the run, otherwise "completed".
+        """
+        return "completed" if self.exceeded is None else "budget_exceeded"
+
+    def stats(self) -> dict:
+        """
+        Get the limits and how much of them the run used.
+
+        Returns:
+            dict: Limits, usage, elapsed time and the exceeded limit (if any)
+        """
+        with self._lock:
+            return {
+                "deadline_seconds": self.deadline_seconds,
+                "max_llm_calls": self.max_llm_calls,
+                "max_tool_calls": self.max_tool_calls,
+                "llm_calls": self.llm_calls,
+                "tool_calls": self.tool_calls,
+                "elapsed_ms": round((time.monotonic() - self.started) * 1000, 3),
+                "exceeded": self.exceeded
+            }
+
+def _tighter(requested, ceiling):
+    """
+    The stricter of a requested limit and a server ceiling (None means unlimited).
+    """
+    if requested is None:
+        return ceiling
+    if ceiling is None:
+        return requested
+    return min(requested, ceiling)
+
+def _env_limit(name: str, default, cast):
+    """
+    Read a limit from the environment, where "none" or "0" switches it off.
+    """
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    if value.strip().lower() in ("", "none", "0"):
+        return None
+    return cast(value)
+
+def budget_from_env(
+    deadline_seconds: float | None = None,
+    max_llm_calls: int | None = None,
+    max_tool_calls: int | None = None
+) -> RunBudget:
+    """
+    Build a budget from requested limits, never looser than the configured ceilings.
+
+    The ceilings come from AGENT_DEADLINE_SECONDS, AGENT_MAX_LLM_CALLS and
+    AGENT_MAX_TOOL_CALLS (set one to "none" to remove that ceiling).
+
+    Args:
+        deadline_seconds: Requested deadline, or None for the ceiling
+        max_llm_calls: Requested model-call limit, or None for the ceiling
+        max_tool_calls: Requested tool-call limit, or None for the ceiling
+
+    Returns:
+        RunBudget: A fresh budget whose clock starts now
+    """
+    return RunBudget(
+        deadline_seconds=_tighter(
+            deadline_seconds, _env_limit("AGENT_DEADLINE_SECONDS", DEFAULT_DEADLINE_SECONDS, float)
+        ),
+        max_llm_calls=_tighter(max_llm_calls, _env_limit("AGENT_MAX_LLM_CALLS", DEFAULT_MAX_LLM_CALLS, int)),
+        max_tool_calls=_tighter(max_tool_calls, _env_limit("AGENT_MAX_TOOL_CALLS", DEFAULT_MAX_TOOL_CALLS, int))
+    )
+
+# The budget of the run in progress, set by enforce_budget()
+_current_budget: ContextVar[RunBudget | None] = ContextVar("run_budget", default=None)
+
+@contextmanager
+def enforce_budget(budget: RunBudget | None):
+    """
+    Apply a budget to every agent node run inside the block.
+    """
+    token = _current_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _current_budget.reset(token)
+
+def current_budget() -> RunBudget | None:
+    """
+    Get the budget of the run in progress (None when the run is unlimited).
+    """
+    return _current_budget.get()
+
+# Runs sync model calls that have a deadline, so the caller can stop waiting
+_deadline_executor = None
+_executor_lock = threading.Lock()
+
+def _get_deadline_executor() -> ThreadPoolExecutor:
+    """
+    Create the shared executor for deadline-bound sync model calls on first use.
+    """
+    global _deadline_executor
+    with _executor_lock:
+        if _deadline_executor is None:
+            _deadline_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="deadline")
+        return _deadline_executor
+
+def invoke_with_deadline(runnable, prompt, budget: RunBudget | None):
+    """
+    Invoke a model, giving up when the budget's deadline passes.
+
+    A blocking HTTP call can't be interrupted from another thread, so on timeout
+    the call is abandoned (its result is discarded) rather than cancelled. Use
+    ainvoke_with_deadline on async paths to cancel the request itself.
+
+    Raises:
+        BudgetExceeded: If the deadline passed before the model answered
+    """
+    timeout = budget.timeout() if budget is not None else None
+    if timeout is None:
+        return runnable.invoke(prompt)
+    # Copy the context so callbacks (and streaming) still see this run
+    future = _get_deadline_executor().submit(copy_context().run, runnable.invoke, prompt)
+    try:
+        return future.result(timeout=timeout)
+    except FuturesTimeoutError:
+        future.cancel()
+        budget.mark_exceeded("deadline")
+        raise BudgetExceeded("deadline") from None
+
+async def ainvoke_with_deadline(runnable, prompt, budget: RunBudget | None):
+    """
+    Async version of invoke_with_deadline that cancels the in-flight request.
+
+    Raises:
+        BudgetExceeded: If the deadline passed before the model answered
+    """
+    timeout = budget.timeout() if budget is not None else None
+    if timeout is None:
+        return await runnable.ainvoke(prompt)
+    try:
+        return await asyncio.wait_for(runnable.ainvoke(prompt), timeout)
+    except asyncio.TimeoutError:
+        budget.mark_exceeded("deadline")
+        raise BudgetExceeded("deadline") from None
+
+def partial_answer(messages, limit: str):
+    """
+    Build the final message for a run stopped by its budget from its best partial result.
+
+    The latest tool result of the current turn is reported if there is one,
+    otherwise whatever the model had said so far.
+
+    Args:
+        messages: The conversation so far
+        limit: The exhausted limit ("deadline", "llm_calls" or "tool_calls")
+
+    Returns:
+        AIMessage: A final answer (no tool calls) marked with the budget status
+    """
+    from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+    from .history import message_text
+
+    # Only look at the current turn, i.e. everything after the latest question
+    turn = []
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            break
+        turn.append(message)
+
+    label = _LIMIT_LABELS.get(limit, limit)
+    content = f"I stopped before finishing because the {label} budget ran out."
+    tool_results = [message for message in turn if isinstance(message, ToolMessage) and not _is_skipped(message)]
+    said_so_far = [message_text(message) for message in turn if isinstance(message, AIMessage) and message_text(message)]
+    if tool_results:
+        content += f" The last result I got was {message_text(tool_results[0])}."
+    elif said_so_far:
+        content += f" So far: {said_so_far[0]}"
+    return AIMessage(
+        content=content,
+        response_metadata={"stop_reason": "budget_exceeded", "budget_limit": limit}
+    )
+
+def skipped_tool_message(tool_call, limit: str):
+    """
+    Answer a tool call that was not run because the budget ran out.
+
+    Every tool call still gets a ToolMessage, so the conversation stays valid
+    for later turns of the same session.
+    """
+    from langchain_core.messages import ToolMessage
+
+    return ToolMessage(
+        content=f"Not run: the {_LIMIT_LABELS.get(limit, limit)} budget ran out.",
+        tool_call_id=tool_call["id"],
+        name=tool_call["name"],
+        status="error",
+        response_metadata={"stop_reason": "budget_exceeded"}
+    )
+
+def _is_skipped(message) -> bool:
+    """
+    Check whether a ToolMessage stands in for a call skipped by the budget.
+    """
+    return message.response_metadata.get("stop_reason") == "budget_exceeded"
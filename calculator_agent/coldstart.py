@@ -0,0 +1,198 @@
+"""
+Cold-start profile for the serverless entry point.
+
+Imports a module in a fresh interpreter with `python -X importtime`, reports
+where the import time goes (per top-level package and per module), and checks
+the wall-clock import time against a budget.
+
+Run it with:
+    python -m calculator_agent.coldstart --module web_app --budget-ms 1500
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+# Profiled imports run from the project root, where web_app.py lives
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+PARENT_DIR = os.path.dirname(PACKAGE_DIR)
+
+# One line of -X importtime output: "import time: <self us> | <cumulative us> | <indented name>"
+_IMPORT_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+# Timed in the child process so the parent's interpreter startup isn't counted
+_TIMER_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+module = __import__({module!r})
+imported = time.perf_counter()
+first_use = None
+if {first_use!r} and hasattr(module, "warm_up"):
+    module.warm_up()
+    first_use = (time.perf_counter() - imported) * 1000
+print(json.dumps({{
+    "import_ms": (imported - started) * 1000,
+    "first_use_ms": first_use,
+    "loaded": sorted({{name.split(".")[0] for name in sys.modules}})
+}}))
+"""
+
+def _run_python(args: list[str], env: dict | None = None) -> subprocess.CompletedProcess:
+    """
+    Run the current interpreter from the project root and capture its output.
+    """
+    return subprocess.run(
+        [sys.executable, *args], cwd=PARENT_DIR, env=env,
+        capture_output=True, text=True, check=True
+    )
+
+def parse_importtime(output: str) -> list[dict]:
+    """
+    Parse `-X importtime` output into one entry per imported module.
+
+    Returns:
+        list[dict]: {"module", "package", "self_us", "cumulative_us", "depth"} entries
+    """
+    entries = []
+    for line in output.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        entries.append({
+            "module": name,
+            "package": name.split(".")[0],
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+            "depth": (len(indent) - 1) // 2,
+        })
+    return entries
+
+def profile_imports(module: str, env: dict | None = None) -> list[dict]:
+    """
+    Import a module in a fresh interpreter and return its per-module import costs.
+    """
+    result = _run_python(["-X", "importtime", "-c", f"import {module}"], env=env)
+    return parse_importtime(result.stderr)
+
+def time_import(module: str, first_use: bool = False, env: dict | None = None) -> dict:
+    """
+    Time one cold import of a module (and optionally its warm-up) in a fresh interpreter.
+
+    Returns:
+        dict: import_ms, first_use_ms (None unless measured) and the loaded top-level packages
+    """
+    script = _TIMER_SCRIPT.format(module=module, first_use=first_use)
+    result = _run_python(["-c", script], env=env)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def summarize(entries: list[dict], top: int = 15) -> dict:
+    """
+    Aggregate import costs by top-level package and pick out the slowest modules.
+    """
+    by_package = {}
+    for entry in entries:
+        by_package[entry["package"]] = by_package.get(entry["package"], 0) + entry["self_us"]
+    packages = sorted(by_package.items(), key=lambda item: item[1], reverse=True)
+    slowest = sorted(entries, key=lambda entry: entry["self_us"], reverse=True)[:top]
+    return {
+        "total_ms": round(sum(by_package.values()) / 1000, 3),
+        "modules": len(entries),
+        "packages": [{"package": name, "self_ms": round(us / 1000, 3)} for name, us in packages[:top]],
+        "slowest_modules": [
+            {"module": entry["module"], "self_ms": round(entry["self_us"] / 1000, 3),
+             "cumulative_ms": round(entry["cumulative_us"] / 1000, 3)}
+            for entry in slowest
+        ],
+    }
+
+def run_profile(
+    module: str = "web_app",
+    top: int = 15,
+    repeat: int = 3,
+    first_use: bool = False,
+    budget_ms: float | None = None
+) -> dict:
+    """
+    Profile a module's cold import and check it against a budget.
+
+    Args:
+        module: Module to import, e.g. "web_app"
+        top: Number of packages and modules to list
+        repeat: Fresh-interpreter imports to take the median of
+        first_use: Also time the module's warm_up() hook after importing
+        budget_ms: Fail the check if the median import time exceeds this
+
+    Returns:
+        dict: JSON-serializable report with "within_budget" set when a budget is given
+    """
+    report = summarize(profile_imports(module), top)
+    runs = [time_import(module, first_use) for _ in range(max(1, repeat))]
+    report["module"] = module
+    report["import_ms"] = {
+        "median": round(statistics.median(run["import_ms"] for run in runs), 3),
+        "min": round(min(run["import_ms"] for run in runs), 3),
+        "max": round(max(run["import_ms"] for run in runs), 3),
+    }
+    report["loaded_packages"] = runs[-1]["loaded"]
+    if first_use:
+        report["first_use_ms"] = round(statistics.median(run["first_use_ms"] or 0.0 for run in runs), 3)
+    if budget_ms is not None:
+        report["budget_ms"] = budget_ms
+        report["within_budget"] = report["import_ms"]["median"] <= budget_ms
+    return report
+
+def format_report(report: dict) -> str:
+    """
+    Render a profile report as a human-readable table.
+    """
+    lines = [
+        f"Cold import of {report['module']}: {report['import_ms']['median']:.1f} ms median "
+        f"({report['import_ms']['min']:.1f}-{report['import_ms']['max']:.1f} ms), "
+        f"{report['modules']} modules",
+    ]
+    if "first_use_ms" in report:
+        lines.append(f"First use (warm_up): {report['first_use_ms']:.1f} ms")
+    lines.append("")
+    lines.append("Import time by package (self):")
+    for entry in report["packages"]:
+        lines.append(f"  {entry['self_ms']:10.1f} ms  {entry['package']}")
+    lines.append("")
+    lines.append("Slowest modules (self / cumulative):")
+    for entry in report["slowest_modules"]:
+        lines.append(f"  {entry['self_ms']:10.1f} ms  {entry['cumulative_ms']:10.1f} ms  {entry['module']}")
+    if "budget_ms" in report:
+        verdict = "within" if report["within_budget"] else "OVER"
+        lines.append("")
+        lines.append(f"Budget: {report['budget_ms']:.0f} ms ({verdict} budget)")
+    return "\n".join(lines)
+
+def main(argv=None):
+    """
+    Command-line entry point: print the profile and exit non-zero when over budget.
+    """
+    parser = argparse.ArgumentParser(description="Profile the cold import of the serverless entry point")
+    parser.add_argument("--module", default="web_app", help="module to import")
+    parser.add_argument("--top", type=int, default=15, help="packages and modules to list")
+    parser.add_argument("--repeat", type=int, default=3, help="fresh-interpreter imports to time")
+    parser.add_argument("--first-use", action="store_true", help="also time the warm_up() hook")
+    parser.add_argument("--budget-ms", type=float, help="fail if the median import time exceeds this")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = run_profile(
+        module=args.module,
+        top=args.top,
+        repeat=args.repeat,
+        first_use=args.first_use,
+        budget_ms=args.budget_ms,
+    )
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    if report.get("within_budget") is False:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+import ast
+import decimal
+import math
+import operator
+from fractions import Fraction
+from functools import lru_cache
+
+# Limits that keep a pathological expression from pinning a worker
+MAX_EXPRESSION_LENGTH = 1000
+MAX_NODES = 200
+MAX_EXPONENT = 1000
+# Python refuses to turn an int of more than 4300 digits (about 14,280 bits) into text
+MAX_RESULT_BITS = 14_000
+
+# Precision used for Decimal mode
+DECIMAL_PRECISION = 50
+
+MODES = ("float", "fraction", "decimal")
+
+_BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+
+_UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+_DECIMAL_CONTEXT = decimal.Context(prec=DECIMAL_PRECISION, Emax=MAX_RESULT_BITS, Emin=-MAX_RESULT_BITS)
+
+def _to_number(value, mode: str):
+    """
+    Convert a literal from the expression into the number type for a mode.
+    """
+    if isinstance(value, float) and not math.isfinite(value):
+        raise ValueError(f"Number is too large: {value!r}")
+    if mode == "fraction":
+        return Fraction(repr(value))
+    if mode == "decimal":
+        return decimal.Decimal(repr(value))
+    return value
+
+def _bit_size(value) -> int:
+    """
+    Approximate the size of an exact number in bits.
+    """
+    if isinstance(value, int):
+        return value.bit_length()
+    if isinstance(value, Fraction):
+        return max(value.numerator.bit_length(), value.denominator.bit_length())
+    return 0
+
+def _is_finite(value) -> bool:
+    """
+    False for an infinite or NaN float or Decimal, which would otherwise pass through silently.
+    """
+    if isinstance(value, float):
+        return math.isfinite(value)
+    if isinstance(value, decimal.Decimal):
+        return value.is_finite()
+    return True
+
+def _safe_pow(base, exponent):
+    """
+    Raise base to exponent, refusing exponents or results that are too large.
+    """
+    if abs(exponent) > MAX_EXPONENT:
+        raise ValueError(f"Exponent {exponent} is larger than the limit of {MAX_EXPONENT}")
+    # Decimal answers 0 ** -n with Infinity instead of raising like the other modes
+    if base == 0 and exponent < 0:
+        raise ZeroDivisionError("0 cannot be raised to a negative power")
+    if isinstance(base, (int, Fraction)):
+        if isinstance(exponent, Fraction) and exponent.denominator != 1:
+            raise ValueError("Fractional exponents have no exact result; use float or decimal mode")
+        if _bit_size(base) * abs(int(exponent)) > MAX_RESULT_BITS:
+            raise ValueError(f"Result of a power with exponent {exponent} would be too large")
+    return base ** exponent
+
+def _compile_node(node, mode: str):
+    """
+    Turn a validated AST node into a zero-argument function computing its value.
+    """
+    if isinstance(node, ast.Constant):
+        value = _to_number(node.value, mode)
+        return lambda: value
+
+    if isinstance(node, ast.UnaryOp):
+        op = _UNARY_OPERATORS[type(node.op)]
+        operand = _compile_node(node.operand, mode)
+        return lambda: op(operand())
+
+    op = _safe_pow if isinstance(node.op, ast.Pow) else _BINARY_OPERATORS[type(node.op)]
+    left = _compile_node(node.left, mode)
+    right = _compile_node(node.right, mode)
+
+    def binary():
+        result = op(left(), right())
+        if isinstance(result, complex):
+            raise ValueError("Expression has no real-valued result")
+        if _bit_size(result) > MAX_RESULT_BITS or not _is_finite(result):
+            raise ValueError("Intermediate result is too large")
+        return result
+
+    return binary
+
+def _validate(tree: ast.Expression):
+    """
+    Check that a parsed expression only uses numbers and arithmetic operators.
+    """
+    count = 0
+    for node in ast.walk(tree.body):
+        count += 1
+        if count > MAX_NODES:
+            raise ValueError(f"Expression has more than {MAX_NODES} parts")
+        if isinstance(node, ast.Constant):
+            if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+                raise ValueError(f"Unsupported value in expression: {node.value!r}")
+        elif isinstance(node, ast.BinOp):
+            if type(node.op) not in _BINARY_OPERATORS:
+                raise ValueError(f"Unsupported operator: {type(node.op).__name__}")
+        elif isinstance(node, ast.UnaryOp):
+            if type(node.op) not in _UNARY_OPERATORS:
+                raise ValueError(f"Unsupported operator: {type(node.op).__name__}")
+        elif not isinstance(node, (ast.operator, ast.unaryop)):
+            raise ValueError(f"Unsupported syntax in expression: {type(node).__name__}")
+
+@lru_cache(maxsize=1024)
+def compile_expression(expression: str, mode: str = "float"):
+    """
+    Parse and compile an arithmetic expression without using eval.
+
+    Compiled forms are cached by (expression, mode), so repeated expressions
+    skip parsing entirely.
+
+    Args:
+        expression: Arithmetic using numbers, + - * / // % ** and parentheses
+        mode: "float" (Python numbers), "fraction" (exact rationals) or "decimal"
+            (DECIMAL_PRECISION significant digits)
+
+    Returns:
+        callable: A zero-argument function that computes the expression's value
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode {mode!r}; expected one of {', '.join(MODES)}")
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ValueError(f"Expression is longer than {MAX_EXPRESSION_LENGTH} characters")
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError:
+        raise ValueError(f"Could not parse expression: {expression!r}") from None
+    _validate(tree)
+    return _compile_node(tree.body, mode)
+
+def evaluate_expression(expression: str, mode: str = "float"):
+    """
+    Evaluate an arithmetic expression safely.
+
+    Args:
+        expression: Arithmetic using numbers, + - * / // % ** and parentheses
+        mode: "float" (Python numbers), "fraction" (exact rationals) or "decimal"
+            (DECIMAL_PRECISION significant digits)
+
+    Returns:
+        int | float | Fraction | Decimal: The value of the expression
+    """
+    compiled = compile_expression(expression, mode)
+    try:
+        with decimal.localcontext(_DECIMAL_CONTEXT):
+            return compiled()
+    except ZeroDivisionError:
+        raise ValueError("Cannot divide by zero") from None
+    except decimal.InvalidOperation:
+        raise ValueError(f"Expression has no valid result: {expression!r}") from None
+    except (OverflowError, decimal.Overflow):
+        raise ValueError("Result is too large") from None
@@ -0,0 +1,151 @@
+import re
+import threading
+import uuid
+
+from calculator_agent.tools import TOOLS_BY_NAME
+from calculator_agent.state import MessageRecord, ToolCallRecord
+from calculator_agent.metrics import track_node
+
+# Optional lead-in words that don't change the meaning of the question
+_LEAD_IN = re.compile(r"^(?:what is|what's|whats|calculate|compute|evaluate|solve)\s+")
+
+_NUMBER = r"(-?\d+(?:\.\d+)?)"
+
+# "<verb> A <joiner> B" questions that map onto one binary tool
+_VERB_PATTERNS = [
+    (re.compile(rf"^add {_NUMBER} (?:and|to|plus) {_NUMBER}$"), "add", "+"),
+    (re.compile(rf"^(?:sum|sum of) {_NUMBER} and {_NUMBER}$"), "add", "+"),
+    (re.compile(rf"^multiply {_NUMBER} (?:by|and|times|with) {_NUMBER}$"), "multiply", "*"),
+    (re.compile(rf"^(?:product of) {_NUMBER} and {_NUMBER}$"), "multiply", "*"),
+    (re.compile(rf"^divide {_NUMBER} by {_NUMBER}$"), "divide", "/"),
+]
+
+# Operator words that can be rewritten as symbols in a plain expression
+_OPERATOR_WORDS = [
+    (re.compile(r"\s+(?:multiplied by|times)\s+"), " * "),
+    (re.compile(r"\s+(?:divided by|over)\s+"), " / "),
+    (re.compile(r"\s+plus\s+"), " + "),
+    (re.compile(r"\s+minus\s+"), " - "),
+    # A bare "x" only between spaced operands, so "0x10" or "3x4" goes to the LLM
+    (re.compile(r"(?<=[\d)])\s+x\s+(?=[\d(])"), " * "),
+    (re.compile(r"(?<=[\d)])\s*×\s*(?=[\d(])"), " * "),
+    (re.compile(r"\s*÷\s*"), " / "),
+]
+
+_PLAIN_EXPRESSION = re.compile(r"^[\d\s.+\-*/()%]+$")
+_HAS_OPERATOR = re.compile(r"\d\s*[-+*/%]")
+
+_STATS_LOCK = threading.Lock()
+_STATS = {"hits": 0, "misses": 0}
+
+def _normalize(question: str) -> str:
+    """
+    Lowercase the question and strip whitespace, trailing punctuation and lead-in words.
+    """
+    text = re.sub(r"\s+", " ", question.strip().lower()).rstrip(" ?!.=")
+    return _LEAD_IN.sub("", text)
+
+def _is_int(text: str) -> bool:
+    """
+    True if a matched number has no fractional part.
+    """
+    return "." not in text
+
+def parse_question(question: str):
+    """
+    Map a plain arithmetic question onto a single tool call, if it's unambiguous.
+
+    Args:
+        question: The user's question
+
+    Returns:
+        tuple | None: (tool_name, args) or None when the question should go to the LLM
+    """
+    text = _normalize(question)
+
+    for pattern, tool_name, symbol in _VERB_PATTERNS:
+        match = pattern.match(text)
+        if match is None:
+            continue
+        a, b = match.groups()
+        if _is_int(a) and _is_int(b):
+            return tool_name, {"a": int(a), "b": int(b)}
+        # The binary tools take integers; decimals go through the expression evaluator
+        return "evaluate", {"expression": f"{a} {symbol} {b}"}
+
+    substitutions = 0
+    for pattern, symbol in _OPERATOR_WORDS:
+        text, count = pattern.subn(symbol, text)
+        substitutions += count
+    if not _PLAIN_EXPRESSION.match(text):
+        return None
+    operators = len(_HAS_OPERATOR.findall(text))
+    # "10 minus 3 divided by 2" has no clear precedence in English, so leave it to the LLM
+    if operators == 0 or (substitutions and operators > 1):
+        return None
+    return "evaluate", {"expression": text.strip()}
+
+def try_answer_locally(question: str):
+    """
+    Answer a plain arithmetic question without calling the LLM.
+
+    The returned records mirror what the agent would produce: the tool call,
+    its result and a short final answer.
+
+    Args:
+        question: The user's question
+
+    Returns:
+        list | None: Records of [AI tool call, tool result, AI answer] or None to fall through to the LLM
+    """
+    parsed = parse_question(question)
+    if parsed is not None:
+        tool_name, args = parsed
+        try:
+            observation = TOOLS_BY_NAME[tool_name].func(**args)
+        except (ValueError, ArithmeticError):
+            # Let the LLM path handle (and report) anything that fails locally
+            parsed = None
+
+    with _STATS_LOCK:
+        _STATS["hits" if parsed is not None else "misses"] += 1
+    if parsed is None:
+        return None
+
+    tool_call_id = f"local_{uuid.uuid4().hex[:12]}"
+    return [
+        MessageRecord("ai", tool_calls=(ToolCallRecord(tool_call_id, tool_name, args),)),
+        MessageRecord("tool", str(observation), tool_call_id=tool_call_id, name=tool_name, status="success"),
+        MessageRecord("ai", f"The answer is {observation}."),
+    ]
+
+def create_fast_path_node():
+    """
+    Create the router node that answers plain arithmetic before the LLM is called.
+    """
+    def fast_path(state):
+        """
+        Answer the latest question locally when it can be parsed with confidence.
+        """
+        last_message = state["messages"][-1] if state["messages"] else None
+        if last_message is None or last_message.role != "human":
+            return {}
+        with track_node("fast_path", "graph"):
+            messages = try_answer_locally(last_message.content)
+        if messages is None:
+            return {}
+        return {"messages": messages, "llm_calls": state.get("llm_calls", 0)}
+
+    return fast_path
+
+def get_fast_path_stats() -> dict:
+    """
+    Get how often questions were answered locally.
+
+    Returns:
+        dict: Hits, misses and hit rate of the fast path
+    """
+    with _STATS_LOCK:
+        hits, misses = _STATS["hits"], _STATS["misses"]
+    total = hits + misses
+    return {"hits": hits, "misses": misses, "hit_rate": hits / total if total else 0.0}
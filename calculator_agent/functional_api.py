@@ -1,42 +1,85 @@
-from langchain_core.messages import SystemMessage, HumanMessage, BaseMessage, ToolCall
-from langchain_core.messages import BaseMessage
+from langchain_core.messages import BaseMessage, ToolCall, ToolMessage
 from langgraph.graph import add_messages
 from langgraph.func import entrypoint, task
 
-from .model import setup_model
+from .model import build_system_message, get_cache_usage
+from .history import get_default_history_reducer
+from .metrics import track_node
+from .budget import BudgetExceeded, current_budget, partial_answer, skipped_tool_message
+from .routing import get_default_router
+from .tool_executor import get_tool_executor
+from .speculation import (
+    Speculation, claim_speculative_result, discard_speculative_results, speculative_tools_enabled
+)
 
 @task
 def call_llm(messages: list[BaseMessage]):
     """
     LLM decides whether to call a tool or not.
+
+    Once the run's budget is used up, the best partial result is returned instead.
+    Tool calls are started while the response streams (see speculation.py).
+
+    Returns:
+        tuple: The response and its usage, keyed like the graph agent's per-run counters
     """
-    _, model_with_tools, _ = setup_model()
-    
-    return model_with_tools.invoke(
-        [
-            SystemMessage(
-                content="You are a helpful assistant tasked with performing arithmetic on a set of inputs."
-            )
-        ]
-        + messages
-    )
+    with track_node("call_llm", "functional"):
+        budget = current_budget()
+        if budget is not None and not budget.start_llm_call():
+            return partial_answer(messages, budget.exceeded), {}
+
+        # Compact the history before it is sent to the model
+        prompt, saved = get_default_history_reducer()(messages)
+
+        speculation = Speculation("functional") if speculative_tools_enabled() else None
+        response = None
+        try:
+            response, calls = get_default_router().invoke([build_system_message()] + prompt, budget, speculation)
+        except BudgetExceeded:
+            return partial_answer(messages, budget.exceeded), {"history_tokens_saved": saved}
+        finally:
+            if speculation is not None:
+                speculation.finish(response)
+        cache_read, cache_write = get_cache_usage(response)
+        return response, {
+            "llm_calls": calls,
+            "history_tokens_saved": saved,
+            "cache_read_tokens": cache_read,
+            "cache_write_tokens": cache_write
+        }
 
 @task
 def call_tool(tool_call: ToolCall):
     """
-    Performs a single tool call.
+    Performs a single tool call (CPU-bound tools run in the tool executor's process pool).
+
+    A call already started while the model was streaming reuses that result.
     """
-    _, _, tools_by_name = setup_model()
-    tool = tools_by_name[tool_call["name"]]
-    return tool.invoke(tool_call)
+    with track_node("call_tool", "functional"):
+        future = claim_speculative_result(tool_call)
+        if future is not None:
+            observation = future.result()
+        else:
+            observation = get_tool_executor().invoke(tool_call["name"], tool_call["args"])
+        return ToolMessage(content=observation, tool_call_id=tool_call["id"], name=tool_call["name"])
 
 @entrypoint()
 def functional_agent(messages: list[BaseMessage]):
     """
     The main agent function using the Functional API.
+
+    Returns the same keys as the graph agent's state: the messages plus the
+    model calls, history tokens saved and prompt-cache tokens over the run.
     """
+    counters = {"llm_calls": 0, "history_tokens_saved": 0, "cache_read_tokens": 0, "cache_write_tokens": 0}
+
+    def count(usage: dict):
+        for key, value in usage.items():
+            counters[key] += value
+
     # Start by calling the LLM with the initial messages
-    model_response = call_llm(messages).result()
+    model_response, usage = call_llm(messages).result()
+    count(usage)
 
     # Keep looping until the LLM doesn't want to use any more tools
     while True:
@@ -44,23 +87,29 @@ def functional_agent(messages: list[BaseMessage]):
         if not model_response.tool_calls:
             break
 
-        # Execute all the tools the LLM wants to use
+        # Execute the tools the LLM wants to use, as far as the budget allows
+        tool_calls = model_response.tool_calls
+        budget = current_budget()
+        granted = budget.grant_tool_calls(len(tool_calls)) if budget is not None else len(tool_calls)
         tool_result_futures = [
-            call_tool(tool_call) for tool_call in model_response.tool_calls
+            call_tool(tool_call) for tool_call in tool_calls[:granted]
         ]
         
         # Wait for all tool results to complete
         tool_results = [fut.result() for fut in tool_result_futures]
+        tool_results += [skipped_tool_message(tool_call, budget.exceeded) for tool_call in tool_calls[granted:]]
+        discard_speculative_results(tool_calls[granted:])
         
         # Add the LLM's response and tool results to the conversation
         messages = add_messages(messages, [model_response, *tool_results])
         
         # Ask the LLM what to do next with the new information
-        model_response = call_llm(messages).result()
+        model_response, usage = call_llm(messages).result()
+        count(usage)
 
     # Add the final response to the conversation
     messages = add_messages(messages, model_response)
-    return messages
+    return {"messages": messages, **counters}
 
 def create_functional_agent():
     """
@@ -1,54 +1,261 @@
-from langchain_core.messages import SystemMessage, ToolMessage
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+
+from langchain_core.messages import ToolMessage
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, START, END
 from typing import Literal
 
-from .state import MessagesState
-from .model import setup_model
+from .state import MessagesState, to_messages, to_record
+from .model import build_system_message, get_cache_usage, setup_model
+from .fast_path import create_fast_path_node
+from .history import HistoryReducer, get_default_history_reducer
+from .routing import ModelRouter, get_default_router
+from .tool_executor import ToolExecutor, get_tool_executor
+from .speculation import (
+    Speculation, claim_speculative_result, discard_speculative_results, speculative_tools_enabled
+)
+from .metrics import track_node
+from .budget import (
+    BudgetExceeded, current_budget, partial_answer, skipped_tool_message
+)
+
+# Default number of tool calls from a single model turn that may run at once
+DEFAULT_TOOL_WORKERS = 4
+
+# Runs a turn's tool calls in parallel; one pool per worker count, shared by every tool node
+_tool_node_executors = {}
+_executor_lock = threading.Lock()
 
-def create_llm_node():
+def _get_tool_node_executor(max_workers: int) -> ThreadPoolExecutor:
+    """
+    Create the shared executor for tool nodes with this many workers on first use.
+    """
+    with _executor_lock:
+        if max_workers not in _tool_node_executors:
+            _tool_node_executors[max_workers] = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="tool_node"
+            )
+        return _tool_node_executors[max_workers]
+
+def create_llm_node(
+    history_reducer: HistoryReducer | None = None,
+    prompt_cache: bool | None = None,
+    router: ModelRouter | None = None
+):
     """
     Create the LLM node that decides whether to use tools or respond directly.
+
+    The node has both a sync and an async implementation, so the compiled agent
+    works with invoke() as well as ainvoke() without blocking the event loop.
+
+    Args:
+        history_reducer: Compacts the history sent to the model (defaults to the process-wide reducer)
+        prompt_cache: Mark the system prompt and tools as cacheable (defaults to ANTHROPIC_PROMPT_CACHE)
+        router: Picks the model for each call (defaults to the process-wide router)
     """
-    model, model_with_tools, tools_by_name = setup_model()
-    
-    def llm_call(state: MessagesState):
+    # Build the default model up front so the first request doesn't pay for it
+    setup_model()
+
+    def build_prompt(state: MessagesState):
         """
-        LLM decides whether to call a tool or not.
+        Hydrate and compact the conversation so far and prepend the system prompt.
+        """
+        reducer = history_reducer or get_default_history_reducer()
+        messages, saved = reducer(to_messages(state["messages"]))
+        return [build_system_message(prompt_cache)] + messages, saved
+
+    def build_update(state: MessagesState, response, saved: int, calls: int):
         """
+        Append the model's response (as a record) and update the per-run counters.
+        """
+        cache_read, cache_write = get_cache_usage(response)
         return {
-            "messages": [
-                model_with_tools.invoke(
-                    [
-                        SystemMessage(
-                            content="You are a helpful assistant tasked with performing arithmetic on a set of inputs."
-                        )
-                    ]
-                    + state["messages"]
-                )
-            ],
-            "llm_calls": state.get('llm_calls', 0) + 1
+            "messages": [to_record(response)],
+            "llm_calls": state.get('llm_calls', 0) + calls,
+            "history_tokens_saved": state.get('history_tokens_saved', 0) + saved,
+            "cache_read_tokens": state.get('cache_read_tokens', 0) + cache_read,
+            "cache_write_tokens": state.get('cache_write_tokens', 0) + cache_write
         }
-    
-    return llm_call
 
-def create_tool_node():
+    def stop_update(state: MessagesState, budget):
+        """
+        End the run with its best partial result once the budget has run out.
+        """
+        return {"messages": [to_record(partial_answer(to_messages(state["messages"]), budget.exceeded))]}
+
+    def llm_call(state: MessagesState):
+        """
+        LLM decides whether to call a tool or not.
+        """
+        with track_node("llm_call", "graph"):
+            budget = current_budget()
+            if budget is not None and not budget.start_llm_call():
+                return stop_update(state, budget)
+            prompt, saved = build_prompt(state)
+            speculation = Speculation("graph") if speculative_tools_enabled() else None
+            response = None
+            try:
+                response, calls = (router or get_default_router()).invoke(prompt, budget, speculation)
+            except BudgetExceeded:
+                return stop_update(state, budget)
+            finally:
+                if speculation is not None:
+                    speculation.finish(response)
+            return build_update(state, response, saved, calls)
+
+    async def allm_call(state: MessagesState):
+        """
+        Async version of llm_call that awaits the model without blocking.
+
+        When the deadline passes mid-call, the in-flight request is cancelled.
+        """
+        with track_node("llm_call", "graph"):
+            budget = current_budget()
+            if budget is not None and not budget.start_llm_call():
+                return stop_update(state, budget)
+            prompt, saved = build_prompt(state)
+            speculation = Speculation("graph") if speculative_tools_enabled() else None
+            response = None
+            try:
+                response, calls = await (router or get_default_router()).ainvoke(prompt, budget, speculation)
+            except BudgetExceeded:
+                return stop_update(state, budget)
+            finally:
+                if speculation is not None:
+                    speculation.finish(response)
+            return build_update(state, response, saved, calls)
+
+    return RunnableLambda(llm_call, afunc=allm_call, name="llm_call")
+
+def create_tool_node(
+    max_workers: int = DEFAULT_TOOL_WORKERS,
+    tool_timeout: float | None = None,
+    tool_executor: ToolExecutor | None = None
+):
     """
     Create the tool node that executes the selected arithmetic operation.
+
+    When the model asks for several tools in one turn they run at the same time,
+    and their results are returned in the order the calls were made. Calls
+    past the run's budget (see budget.py) are answered with a "not run" message.
+    Calls the LLM node already started while the model was streaming (see
+    speculation.py) reuse that result instead of running again.
+
+    Args:
+        max_workers: Maximum number of tool calls to run at once (the thread pool is
+            shared by all tool nodes created with the same value)
+        tool_timeout: Seconds to wait for each tool call (None waits forever)
+        tool_executor: Runs each call, CPU-bound tools in a process pool (defaults to the process-wide one)
     """
-    _, _, tools_by_name = setup_model()
-    
-    def tool_node(state: MessagesState):
+    tool_executor = tool_executor or get_tool_executor()
+
+    def result_record(tool_call, observation):
         """
-        Performs the tool call.
+        Record a tool's output as the result answering the given call.
         """
+        return to_record(ToolMessage(content=observation, tool_call_id=tool_call["id"]))
+
+    def timeout_error(tool_call):
+        """
+        Build the error raised when a tool call runs past tool_timeout.
+        """
+        return TimeoutError(f"Tool '{tool_call['name']}' timed out after {tool_timeout}s")
+
+    def split_by_budget(state: MessagesState, budget):
+        """
+        Split the requested tool calls into those the budget allows and those to skip.
+        """
+        tool_calls = [tool_call.as_tool_call() for tool_call in state["messages"][-1].tool_calls]
+        if budget is None:
+            return tool_calls, []
+        granted = budget.grant_tool_calls(len(tool_calls))
+        discard_speculative_results(tool_calls[granted:])
+        return tool_calls[:granted], tool_calls[granted:]
+
+    def on_timeout(tool_call, budget):
+        """
+        Answer a tool call that timed out: skipped if the run's deadline passed, else an error.
+        """
+        if budget is None or not budget.expired():
+            raise timeout_error(tool_call) from None
+        budget.mark_exceeded("deadline")
+        return skipped_tool_message(tool_call, "deadline")
+
+    def run_tools(state: MessagesState):
+        """
+        Performs the tool calls, in parallel on a thread pool when there are several.
+        """
+        budget = current_budget()
+        tool_calls, skipped = split_by_budget(state, budget)
+        skipped_messages = [to_record(skipped_tool_message(tool_call, budget.exceeded)) for tool_call in skipped]
+        timeout = budget.timeout(tool_timeout) if budget is not None else tool_timeout
+        speculative = [claim_speculative_result(tool_call) for tool_call in tool_calls]
+
+        # A single call with no timeout doesn't need to leave this thread
+        if len(tool_calls) == 1 and timeout is None and speculative[0] is None:
+            tool_call = tool_calls[0]
+            observation = tool_executor.invoke(tool_call["name"], tool_call["args"])
+            return {"messages": [result_record(tool_call, observation)] + skipped_messages}
+
+        executor = _get_tool_node_executor(max_workers)
+        futures = [
+            future or executor.submit(tool_executor.invoke, tool_call["name"], tool_call["args"])
+            for tool_call, future in zip(tool_calls, speculative)
+        ]
         result = []
-        for tool_call in state["messages"][-1].tool_calls:
-            tool = tools_by_name[tool_call["name"]]
-            observation = tool.invoke(tool_call["args"])
-            result.append(ToolMessage(content=observation, tool_call_id=tool_call["id"]))
-        return {"messages": result}
-    
-    return tool_node
+        for tool_call, future in zip(tool_calls, futures):
+            try:
+                observation = future.result(
+                    timeout=budget.timeout(tool_timeout) if budget is not None else tool_timeout
+                )
+            except FuturesTimeoutError:
+                result.append(to_record(on_timeout(tool_call, budget)))
+                continue
+            result.append(result_record(tool_call, observation))
+        return {"messages": result + skipped_messages}
+
+    async def arun_tools(state: MessagesState):
+        """
+        Async version of run_tools, running the tool calls with asyncio.gather.
+        """
+        budget = current_budget()
+        tool_calls, skipped = split_by_budget(state, budget)
+        slots = asyncio.Semaphore(max_workers)
+
+        async def run(tool_call):
+            async with slots:
+                timeout = budget.timeout(tool_timeout) if budget is not None else tool_timeout
+                future = claim_speculative_result(tool_call)
+                if future is not None:
+                    call = asyncio.wrap_future(future)
+                else:
+                    call = tool_executor.ainvoke(tool_call["name"], tool_call["args"])
+                try:
+                    observation = await asyncio.wait_for(call, timeout)
+                except asyncio.TimeoutError:
+                    return to_record(on_timeout(tool_call, budget))
+                return result_record(tool_call, observation)
+
+        result = list(await asyncio.gather(*(run(tool_call) for tool_call in tool_calls)))
+        return {"messages": result + [to_record(skipped_tool_message(tool_call, budget.exceeded)) for tool_call in skipped]}
+
+    def tool_node(state: MessagesState):
+        """
+        Performs the tool calls and records how long they took.
+        """
+        with track_node("tool_node", "graph"):
+            return run_tools(state)
+
+    async def atool_node(state: MessagesState):
+        """
+        Async version of tool_node.
+        """
+        with track_node("tool_node", "graph"):
+            return await arun_tools(state)
+
+    return RunnableLambda(tool_node, afunc=atool_node, name="tool_node")
 
 def create_should_continue():
     """
@@ -70,13 +277,45 @@ def create_should_continue():
     
     return should_continue
 
-def create_graph_agent():
+def create_route_after_fast_path():
+    """
+    Create the conditional logic that skips the LLM when the fast path already answered.
+    """
+    def route_after_fast_path(state: MessagesState) -> Literal["llm_call", END]:
+        """
+        End if the fast path produced a final answer, otherwise ask the LLM.
+        """
+        last_message = state["messages"][-1]
+        if last_message.role == "ai" and not last_message.tool_calls:
+            return END
+        return "llm_call"
+
+    return route_after_fast_path
+
+def create_graph_agent(
+    max_tool_workers: int = DEFAULT_TOOL_WORKERS,
+    tool_timeout: float | None = None,
+    fast_path: bool = True,
+    history_reducer: HistoryReducer | None = None,
+    prompt_cache: bool | None = None,
+    router: ModelRouter | None = None,
+    tool_executor: ToolExecutor | None = None
+):
     """
     Build and compile the complete calculator agent using the Graph API.
+
+    Args:
+        max_tool_workers: Maximum number of tool calls from one turn to run at once
+        tool_timeout: Seconds to wait for each tool call (None waits forever)
+        fast_path: Answer plain arithmetic questions locally before calling the LLM
+        history_reducer: Compacts the history sent to the model (defaults to the process-wide reducer)
+        prompt_cache: Mark the system prompt and tools as cacheable (defaults to ANTHROPIC_PROMPT_CACHE)
+        router: Picks the model for each call (defaults to the process-wide router)
+        tool_executor: Runs each tool call, CPU-bound tools in a process pool (defaults to the process-wide one)
     """
     # Create the individual components
-    llm_call = create_llm_node()
-    tool_node = create_tool_node()
+    llm_call = create_llm_node(history_reducer, prompt_cache, router)
+    tool_node = create_tool_node(max_tool_workers, tool_timeout, tool_executor)
     should_continue = create_should_continue()
     
     # Build the workflow graph
@@ -87,7 +326,16 @@ def create_graph_agent():
     agent_builder.add_node("tool_node", tool_node)
 
     # Add edges to connect the nodes
-    agent_builder.add_edge(START, "llm_call")
+    if fast_path:
+        agent_builder.add_node("fast_path", create_fast_path_node())
+        agent_builder.add_edge(START, "fast_path")
+        agent_builder.add_conditional_edges(
+            "fast_path",
+            create_route_after_fast_path(),
+            ["llm_call", END]
+        )
+    else:
+        agent_builder.add_edge(START, "llm_call")
     agent_builder.add_conditional_edges(
         "llm_call",
         should_continue,
@@ -0,0 +1,231 @@
+import os
+import threading
+
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage, ToolMessage
+
+# Rough characters-per-token ratio and per-message overhead used for estimates
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+
+def message_text(message: AnyMessage) -> str:
+    """
+    Get the plain text of a message whose content is a string or a list of blocks.
+    """
+    if isinstance(message.content, str):
+        return message.content
+    return "".join(
+        block.get("text", "") if isinstance(block, dict) else str(block)
+        for block in message.content
+    )
+
+def estimate_tokens(messages: list[AnyMessage]) -> int:
+    """
+    Estimate how many prompt tokens a list of messages will cost.
+
+    Args:
+        messages: The messages to measure, including any tool calls
+
+    Returns:
+        int: Approximate token count
+    """
+    chars = 0
+    for message in messages:
+        chars += len(message_text(message))
+        for tool_call in getattr(message, "tool_calls", None) or []:
+            chars += len(tool_call["name"]) + len(str(tool_call["args"]))
+    return chars // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS * len(messages)
+
+def split_turns(messages: list[AnyMessage]) -> list[list[AnyMessage]]:
+    """
+    Split a conversation into turns, each starting at a HumanMessage.
+
+    Messages before the first HumanMessage form their own leading turn.
+    """
+    turns = []
+    for message in messages:
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+class HistoryReducer:
+    """
+    Compacts the conversation sent to the model and records how many tokens it saved.
+
+    The stored conversation is never changed; only the prompt for each model call
+    is reduced. The base class keeps everything.
+    """
+    name = "none"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.tokens_saved = 0
+        self.last_saved = 0
+
+    def reduce(self, messages: list[AnyMessage]) -> list[AnyMessage]:
+        """
+        Return the messages to send to the model.
+        """
+        return messages
+
+    def __call__(self, messages: list[AnyMessage]):
+        """
+        Reduce a conversation for one model call.
+
+        Returns:
+            tuple: (reduced_messages, tokens_saved)
+        """
+        reduced = self.reduce(messages)
+        saved = estimate_tokens(messages) - estimate_tokens(reduced) if reduced is not messages else 0
+        with self._lock:
+            self.calls += 1
+            self.tokens_saved += saved
+            self.last_saved = saved
+        return reduced, saved
+
+    def stats(self) -> dict:
+        """
+        Get how much this reducer has saved so far.
+
+        Returns:
+            dict: Strategy name, calls, total and last tokens saved
+        """
+        with self._lock:
+            return {
+                "strategy": self.name,
+                "calls": self.calls,
+                "tokens_saved": self.tokens_saved,
+                "last_saved": self.last_saved
+            }
+
+class LastTurnsReducer(HistoryReducer):
+    """
+    Keep only the last N conversation turns (the current turn always counts as one).
+    """
+    name = "last_turns"
+
+    def __init__(self, max_turns: int):
+        super().__init__()
+        self.max_turns = max(1, max_turns)
+
+    def reduce(self, messages):
+        turns = split_turns(messages)
+        if len(turns) <= self.max_turns:
+            return messages
+        return [message for turn in turns[-self.max_turns:] for message in turn]
+
+class TokenBudgetReducer(HistoryReducer):
+    """
+    Drop the oldest turns until the estimated prompt fits a token budget.
+
+    The current turn is always kept, even if it alone is over budget.
+    """
+    name = "token_budget"
+
+    def __init__(self, max_tokens: int):
+        super().__init__()
+        self.max_tokens = max_tokens
+
+    def reduce(self, messages):
+        turns = split_turns(messages)
+        sizes = [estimate_tokens(turn) for turn in turns]
+        total = sum(sizes)
+        first = 0
+        while total > self.max_tokens and first < len(turns) - 1:
+            total -= sizes[first]
+            first += 1
+        if first == 0:
+            return messages
+        return [message for turn in turns[first:] for message in turn]
+
+class ToolSummaryReducer(HistoryReducer):
+    """
+    Collapse the tool calls and results of finished turns into one summary line.
+
+    A finished turn like [question, tool call, result, answer] becomes
+    [question, "add(a=3, b=4) = 7. <answer>"]. The current turn is left intact
+    so the model still sees the tool results it is waiting on.
+    """
+    name = "summarize_tools"
+
+    def reduce(self, messages):
+        turns = split_turns(messages)
+        if len(turns) < 2:
+            return messages
+        compacted = []
+        changed = False
+        for turn in turns[:-1]:
+            summary = self._summarize_turn(turn)
+            changed = changed or summary is not turn
+            compacted.extend(summary)
+        if not changed:
+            return messages
+        return compacted + turns[-1]
+
+    @staticmethod
+    def _summarize_turn(turn):
+        """
+        Fold a finished turn's tool traffic into its final answer.
+        """
+        if not any(isinstance(message, ToolMessage) for message in turn):
+            return turn
+        results = {
+            message.tool_call_id: message_text(message)
+            for message in turn
+            if isinstance(message, ToolMessage)
+        }
+        lines = []
+        answer = ""
+        for message in turn:
+            if not isinstance(message, AIMessage):
+                continue
+            for tool_call in message.tool_calls:
+                args = ", ".join(f"{key}={value}" for key, value in tool_call["args"].items())
+                lines.append(f"{tool_call['name']}({args}) = {results.get(tool_call['id'], '?')}")
+            if not message.tool_calls:
+                answer = message_text(message)
+        head = [message for message in turn if isinstance(message, HumanMessage)]
+        return head + [AIMessage(content=". ".join(lines) + (f". {answer}" if answer else ""))]
+
+def parse_history_reducer(spec: str | None) -> HistoryReducer:
+    """
+    Build a reducer from a spec string.
+
+    Args:
+        spec: "none", "last_turns:<N>", "token_budget:<tokens>" or "summarize_tools"
+
+    Returns:
+        HistoryReducer: The configured reducer
+    """
+    name, _, value = (spec or "none").strip().partition(":")
+    if name in ("", "none"):
+        return HistoryReducer()
+    if name == LastTurnsReducer.name:
+        return LastTurnsReducer(int(value or 10))
+    if name == TokenBudgetReducer.name:
+        return TokenBudgetReducer(int(value or 4000))
+    if name == ToolSummaryReducer.name:
+        return ToolSummaryReducer()
+    raise ValueError(f"Unknown history reducer: {spec!r}")
+
+_default_reducer = None
+_default_lock = threading.Lock()
+
+def get_default_history_reducer() -> HistoryReducer:
+    """
+    Get the process-wide reducer, configured by AGENT_HISTORY_REDUCER on first use.
+    """
+    global _default_reducer
+    with _default_lock:
+        if _default_reducer is None:
+            _default_reducer = parse_history_reducer(os.environ.get("AGENT_HISTORY_REDUCER"))
+        return _default_reducer
+
+def set_default_history_reducer(reducer: HistoryReducer):
+    """
+    Replace the process-wide reducer used by agents that weren't given one explicitly.
+    """
+    global _default_reducer
+    with _default_lock:
+        _default_reducer = reducer
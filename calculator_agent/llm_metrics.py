@@ -0,0 +1,59 @@
+import threading
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from calculator_agent.metrics import (
+    LLM_DURATION, LLM_ERRORS, LLM_TIME_TO_FIRST_TOKEN, LLM_TOKENS, LLM_TOOL_CALLS
+)
+
+class LLMMetricsHandler(BaseCallbackHandler):
+    """
+    Callback handler recording latency, time to first token, tokens and tool calls per model call.
+    """
+    run_inline = True
+
+    def __init__(self):
+        self._runs = {}  # run_id -> [model, started, first_token_at]
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        model = (metadata or {}).get("ls_model_name", "unknown")
+        with self._lock:
+            self._runs[run_id] = [model, time.perf_counter(), None]
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is not None and run[2] is None:
+                run[2] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        model, started, first_token_at = run
+        finished = time.perf_counter()
+        LLM_DURATION.observe(finished - started, model=model)
+        LLM_TIME_TO_FIRST_TOKEN.observe((first_token_at or finished) - started, model=model)
+
+        message = getattr(response.generations[0][0], "message", None) if response.generations else None
+        if message is None:
+            return
+        LLM_TOOL_CALLS.observe(len(getattr(message, "tool_calls", None) or []), model=model)
+        usage = getattr(message, "usage_metadata", None)
+        if usage:
+            details = usage.get("input_token_details") or {}
+            LLM_TOKENS.observe(usage.get("input_tokens", 0), model=model, kind="input")
+            LLM_TOKENS.observe(usage.get("output_tokens", 0), model=model, kind="output")
+            LLM_TOKENS.observe(details.get("cache_read") or 0, model=model, kind="cache_read")
+            LLM_TOKENS.observe(details.get("cache_creation") or 0, model=model, kind="cache_write")
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        LLM_ERRORS.inc(model=run[0] if run else "unknown")
+
+# Shared handler attached to every model built by the model registry
+LLM_METRICS_HANDLER = LLMMetricsHandler()
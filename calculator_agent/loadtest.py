@@ -0,0 +1,610 @@
+"""
+Load test for web_app's /ask endpoint against a local stand-in for the Anthropic API.
+
+A fake messages endpoint runs in its own process and answers like Claude
+would for the calculator questions we send: a tool call for the numbers in
+the question, then a short answer once the tool result comes back. Its
+latency is drawn from a configurable distribution, and it can fail a share
+of calls with 529 "overloaded" errors. Both plain and streamed (SSE)
+responses are supported, so speculative tool calls work as in production.
+
+An open-loop generator then sends questions at a fixed rate, whether or not
+earlier ones have finished, and measures each latency from the moment the
+request was due, so a saturated server shows up as growing latency instead
+of a politely lowered request rate. Each rate in the sweep reports
+throughput, latency percentiles, errors and event-loop lag; the first rate
+the server can't keep up with is its saturation point.
+
+Run it with:
+    python -m calculator_agent.loadtest --rps 5 10 20 40 --duration 20 --latency lognormal:400:0.3
+
+By default web_app runs in this process (and its event loop is the one whose
+lag is measured). To load-test another deployment, e.g. the pre-fork server,
+start the fake API on a known port, point the deployment at it, and pass --url:
+    python -m calculator_agent.loadtest --serve-api --api-port 8900
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8900 ANTHROPIC_API_KEY=test python -m calculator_agent.prefork --port 8000
+    python -m calculator_agent.loadtest --url http://127.0.0.1:8000 --api-url http://127.0.0.1:8900
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import random
+import re
+import socket
+import sys
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+
+# web_app lives in the project root, next to this package
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+PARENT_DIR = os.path.dirname(PACKAGE_DIR)
+if PARENT_DIR not in sys.path:
+    sys.path.insert(0, PARENT_DIR)
+
+import httpx
+
+from calculator_agent.benchmark import percentile
+
+# A step is saturated when it completes less than this share of the requests offered per second
+SATURATION_THROUGHPUT = 0.9
+
+# Seconds between event-loop lag samples
+LAG_SAMPLE_INTERVAL = 0.01
+
+# Questions the fast path can't answer, so every request reaches the model
+QUESTION_TEMPLATES = (
+    ("add", "Please add {a} and {b} for me"),
+    ("multiply", "Please multiply {a} by {b} for me"),
+    ("divide", "Please divide {a} by {b} for me")
+)
+
+_NUMBER = re.compile(r"-?\d+")
+
+class LatencyDistribution:
+    """
+    Random latency of the fake API, parsed from a "kind:params" spec (milliseconds).
+
+    Specs:
+        fixed:200            always 200 ms (a bare "200" works too)
+        uniform:100:300      uniform between 100 and 300 ms
+        normal:200:50        mean 200 ms, standard deviation 50 ms (never below 0)
+        lognormal:200:0.5    median 200 ms, sigma 0.5: a long right tail, like real APIs
+        exp:200              exponential with mean 200 ms
+    """
+
+    KINDS = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2, "exp": 1}
+
+    def __init__(self, kind: str, params: tuple[float, ...]):
+        if kind not in self.KINDS or len(params) != self.KINDS[kind]:
+            raise ValueError(f"Invalid latency distribution: {kind}{params}")
+        self.kind = kind
+        self.params = params
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyDistribution":
+        """
+        Build a distribution from a spec string (see the class docstring).
+        """
+        kind, *params = spec.split(":")
+        if not params:
+            kind, params = "fixed", [kind]
+        try:
+            return cls(kind, tuple(float(param) for param in params))
+        except ValueError:
+            raise ValueError(f"Invalid latency distribution: {spec!r}") from None
+
+    def sample(self, rng: random.Random) -> float:
+        """
+        Draw one latency, in seconds.
+        """
+        if self.kind == "fixed":
+            ms = self.params[0]
+        elif self.kind == "uniform":
+            ms = rng.uniform(*self.params)
+        elif self.kind == "normal":
+            ms = rng.gauss(*self.params)
+        elif self.kind == "lognormal":
+            median, sigma = self.params
+            ms = median * rng.lognormvariate(0.0, sigma)
+        else:
+            ms = rng.expovariate(1 / self.params[0])
+        return max(0.0, ms) / 1000
+
+    def __str__(self) -> str:
+        return ":".join([self.kind, *(f"{param:g}" for param in self.params)])
+
+def _text(content) -> str:
+    """
+    Get the text of an Anthropic message or tool result (a string or content blocks).
+    """
+    if isinstance(content, str):
+        return content
+    return " ".join(block.get("text", "") for block in content if isinstance(block, dict))
+
+def scripted_reply(body: dict) -> tuple[list[dict], str]:
+    """
+    Decide the fake model's reply to a messages request.
+
+    The planner (forced to the Plan tool) gets a one-step plan, a new question
+    gets a tool call for its two numbers, and a turn ending in tool results gets
+    an answer stating them.
+
+    Returns:
+        tuple: (content blocks, stop_reason)
+    """
+    last = body["messages"][-1]
+    content = last["content"] if isinstance(last["content"], list) else []
+    results = [_text(block.get("content", "")) for block in content if block.get("type") == "tool_result"]
+    if last["role"] == "user" and results:
+        return [{"type": "text", "text": f"The result is {', '.join(results)}."}], "end_turn"
+
+    question = _text(last["content"]).lower()
+    tool = next((name for name, _ in QUESTION_TEMPLATES if name in question), "add")
+    numbers = [int(number) for number in _NUMBER.findall(question)]
+    if len(numbers) < 2:
+        return [{"type": "text", "text": "I need two numbers to calculate with."}], "end_turn"
+    args = {"a": numbers[0], "b": numbers[1]}
+
+    tool_choice = body.get("tool_choice") or {}
+    if tool_choice.get("type") == "tool" and tool_choice.get("name") == "Plan":
+        tool, args = "Plan", {"steps": [{"id": "s1", "tool": tool, "args": args}]}
+    return [{"type": "tool_use", "id": f"toolu_{uuid.uuid4().hex[:24]}", "name": tool, "input": args}], "tool_use"
+
+def _sse(event: str, data: dict) -> str:
+    """Encode one Server-Sent Events frame"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def _halves(text: str) -> list[str]:
+    """Split streamed text in two, so clients see it arrive in pieces"""
+    middle = len(text) // 2
+    return [piece for piece in (text[:middle], text[middle:]) if piece]
+
+def create_fake_api(
+    latency: LatencyDistribution,
+    chunk_delay: float = 0.005,
+    error_rate: float = 0.0,
+    seed: int | None = None
+):
+    """
+    Build the ASGI app standing in for POST /v1/messages.
+
+    Args:
+        latency: Time to the first token (the whole response waits this long plus its chunks)
+        chunk_delay: Seconds between streamed chunks
+        error_rate: Share of calls answered with a 529 overloaded error
+        seed: Seed for the latency and error draws
+
+    Returns:
+        FastAPI: The app; GET /stats reports the calls it has answered
+    """
+    from fastapi import FastAPI, Request
+    from fastapi.responses import JSONResponse, StreamingResponse
+
+    api = FastAPI()
+    rng = random.Random(seed)
+    calls = Counter()
+
+    @api.get("/stats")
+    async def stats():
+        """Count the calls answered so far, by outcome"""
+        return dict(calls)
+
+    @api.post("/v1/messages")
+    async def messages(request: Request):
+        """Answer a messages request with a scripted reply, after a random delay"""
+        body = await request.json()
+        delay = latency.sample(rng)
+        if rng.random() < error_rate:
+            calls["overloaded"] += 1
+            await asyncio.sleep(delay)
+            return JSONResponse(
+                status_code=529,
+                content={"type": "error", "error": {"type": "overloaded_error", "message": "Overloaded"}}
+            )
+
+        blocks, stop_reason = scripted_reply(body)
+        message = {
+            "id": f"msg_{uuid.uuid4().hex[:24]}",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "fake"),
+            "content": blocks,
+            "stop_reason": stop_reason,
+            "stop_sequence": None,
+            "usage": {"input_tokens": len(json.dumps(body["messages"])) // 4, "output_tokens": 20}
+        }
+        calls[stop_reason] += 1
+
+        if not body.get("stream"):
+            await asyncio.sleep(delay + 2 * len(blocks) * chunk_delay)
+            return message
+
+        async def events():
+            await asyncio.sleep(delay)
+            yield _sse("message_start", {
+                "type": "message_start",
+                "message": {**message, "content": [], "stop_reason": None,
+                            "usage": {**message["usage"], "output_tokens": 1}}
+            })
+            for index, block in enumerate(blocks):
+                if block["type"] == "tool_use":
+                    start, kind, key, payload = {**block, "input": {}}, "input_json_delta", "partial_json", json.dumps(block["input"])
+                else:
+                    start, kind, key, payload = {"type": "text", "text": ""}, "text_delta", "text", block["text"]
+                yield _sse("content_block_start", {"type": "content_block_start", "index": index, "content_block": start})
+                for piece in _halves(payload):
+                    await asyncio.sleep(chunk_delay)
+                    yield _sse("content_block_delta", {
+                        "type": "content_block_delta", "index": index, "delta": {"type": kind, key: piece}
+                    })
+                yield _sse("content_block_stop", {"type": "content_block_stop", "index": index})
+            yield _sse("message_delta", {
+                "type": "message_delta",
+                "delta": {"stop_reason": stop_reason, "stop_sequence": None},
+                "usage": {"output_tokens": message["usage"]["output_tokens"]}
+            })
+            yield _sse("message_stop", {"type": "message_stop"})
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return api
+
+def serve_fake_api(host: str, port: int, latency: str, chunk_delay: float, error_rate: float, seed: int | None):
+    """
+    Run the fake API until stopped (the target of the fake API's process).
+    """
+    import uvicorn
+
+    app = create_fake_api(LatencyDistribution.parse(latency), chunk_delay, error_rate, seed)
+    uvicorn.run(app, host=host, port=port, log_level="warning", backlog=4096)
+
+def free_port(host: str = "127.0.0.1") -> int:
+    """
+    Find a port nothing is listening on.
+    """
+    with socket.socket() as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+def start_fake_api(port: int, latency: str, chunk_delay: float, error_rate: float, seed: int | None):
+    """
+    Start the fake API in a child process and wait until it answers.
+
+    Its own process keeps the fake's work off the event loop and out of the
+    GIL of the app being measured.
+
+    Returns:
+        tuple: (process, base URL)
+    """
+    process = multiprocessing.get_context("spawn").Process(
+        target=serve_fake_api,
+        args=("127.0.0.1", port, latency, chunk_delay, error_rate, seed),
+        daemon=True
+    )
+    process.start()
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            httpx.get(f"{url}/stats", timeout=1.0).raise_for_status()
+            return process, url
+        except httpx.HTTPError:
+            if not process.is_alive() or time.monotonic() > deadline:
+                process.kill()
+                raise RuntimeError("The fake Anthropic API didn't start") from None
+            time.sleep(0.1)
+
+class LagMonitor:
+    """
+    Measures event-loop lag: how late a task that asked to sleep for a fixed interval wakes up.
+
+    Lag is time the loop spent running other callbacks (or blocked) while this
+    one was due, so it is the delay every request handler on the loop suffers
+    too.
+    """
+
+    def __init__(self, interval: float = LAG_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.samples = []
+        self._task = None
+
+    async def _sample(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            due = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - due) * 1000)
+
+    def start(self):
+        self._task = asyncio.create_task(self._sample())
+
+    async def stop(self) -> list[float]:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        return self.samples
+
+def make_question(rng: random.Random) -> str:
+    """
+    Build a random question, so answers can't come from the answer cache.
+    """
+    _, template = rng.choice(QUESTION_TEMPLATES)
+    return template.format(a=rng.randint(2, 9999), b=rng.randint(2, 9999))
+
+def _summary(values: list[float]) -> dict:
+    """Percentiles of a list of milliseconds (all zero when it is empty)"""
+    if not values:
+        return {"p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0, "mean": 0.0}
+    return {
+        "p50": round(percentile(values, 50), 3),
+        "p90": round(percentile(values, 90), 3),
+        "p99": round(percentile(values, 99), 3),
+        "max": round(max(values), 3),
+        "mean": round(sum(values) / len(values), 3)
+    }
+
+async def send(client: httpx.AsyncClient, question: str, due: float, timeout: float) -> tuple[str, float, int]:
+    """
+    Send one question and classify the outcome.
+
+    Returns:
+        tuple: (outcome, latency in ms from when the request was due, LLM calls);
+        the outcome is "ok", "http_<status>", the run's budget status or an exception name
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        response = await client.post("/ask", json={"question": question}, timeout=timeout)
+        body = response.json()
+        if response.status_code != 200:
+            outcome = f"http_{response.status_code}"
+        elif not body.get("success", True):
+            outcome = body.get("status") or "failed"
+        else:
+            outcome = "ok"
+        llm_calls = body.get("llm_calls", 0) if isinstance(body, dict) else 0
+    except httpx.TimeoutException:
+        outcome, llm_calls = "timeout", 0
+    except Exception as e:
+        outcome, llm_calls = type(e).__name__, 0
+    return outcome, (loop.time() - due) * 1000, llm_calls
+
+async def run_step(
+    client: httpx.AsyncClient,
+    rps: float,
+    duration: float,
+    arrivals: str = "constant",
+    timeout: float = 30.0,
+    question: str | None = None,
+    seed: int | None = None
+) -> dict:
+    """
+    Send requests at a fixed rate for a while, then wait for the stragglers.
+
+    Args:
+        client: Client for the app under test
+        rps: Target requests per second
+        duration: Seconds to send for
+        arrivals: "constant" spacing or "poisson" (exponential gaps, i.e. bursty)
+        timeout: Seconds before a request counts as timed out
+        question: Send this question every time instead of random ones
+        seed: Seed for the arrivals and questions
+
+    Returns:
+        dict: Offered and achieved rates, latency percentiles, errors and event-loop lag
+    """
+    loop = asyncio.get_running_loop()
+    rng = random.Random(seed)
+    monitor = LagMonitor()
+    in_flight = 0
+    max_in_flight = 0
+
+    async def tracked(question_text: str, due: float):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        try:
+            return await send(client, question_text, due, timeout)
+        finally:
+            in_flight -= 1
+
+    monitor.start()
+    started = loop.time()
+    due = started
+    tasks = []
+    while due < started + duration:
+        delay = due - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        # Open loop: the request goes out on schedule, however many are still running
+        tasks.append(asyncio.create_task(tracked(question or make_question(rng), due)))
+        due += rng.expovariate(rps) if arrivals == "poisson" else 1 / rps
+    sent_for = loop.time() - started
+    results = await asyncio.gather(*tasks)
+    elapsed = loop.time() - started
+    lag = await monitor.stop()
+
+    outcomes = Counter(outcome for outcome, _, _ in results)
+    ok = [(latency, llm_calls) for outcome, latency, llm_calls in results if outcome == "ok"]
+    errors = {outcome: count for outcome, count in outcomes.items() if outcome != "ok"}
+    return {
+        "target_rps": rps,
+        "sent": len(results),
+        "offered_rps": round(len(results) / sent_for, 3),
+        "completed": len(ok),
+        "throughput_rps": round(len(ok) / elapsed, 3),
+        "error_rate": round(sum(errors.values()) / len(results), 4) if results else 0.0,
+        "errors": errors,
+        "latency_ms": _summary([latency for latency, _ in ok]),
+        "llm_calls_per_request": round(sum(calls for _, calls in ok) / len(ok), 3) if ok else 0.0,
+        "max_in_flight": max_in_flight,
+        "drain_s": round(elapsed - sent_for, 3),
+        "loop_lag_ms": _summary(lag)
+    }
+
+def saturated(step: dict, max_error_rate: float, slo_ms: float | None) -> list[str]:
+    """
+    Get the reasons a step shows the server past its capacity (empty if it kept up).
+    """
+    reasons = []
+    # Compared with the rate actually offered, which Poisson arrivals scatter around the target
+    if step["throughput_rps"] < SATURATION_THROUGHPUT * step["offered_rps"]:
+        reasons.append("throughput")
+    if step["error_rate"] > max_error_rate:
+        reasons.append("errors")
+    if slo_ms is not None and step["latency_ms"]["p99"] > slo_ms:
+        reasons.append("latency")
+    return reasons
+
+async def run_sweep(
+    client: httpx.AsyncClient,
+    rates: list[float],
+    duration: float,
+    arrivals: str = "constant",
+    timeout: float = 30.0,
+    question: str | None = None,
+    max_error_rate: float = 0.01,
+    slo_ms: float | None = None,
+    api_url: str | None = None,
+    seed: int | None = None,
+    keep_going: bool = False
+) -> dict:
+    """
+    Run one step per rate, lowest first, stopping at the first saturated one.
+
+    Returns:
+        dict: The steps, plus the highest rate sustained and the saturation point
+    """
+    steps = []
+    sustained = None
+    saturation = None
+    for index, rps in enumerate(sorted(rates)):
+        api_before = _api_calls(api_url)
+        step = await run_step(
+            client, rps, duration, arrivals, timeout, question,
+            None if seed is None else seed + index
+        )
+        api_after = _api_calls(api_url)
+        if api_before is not None and api_after is not None:
+            step["api_calls"] = {key: api_after.get(key, 0) - api_before.get(key, 0) for key in api_after}
+        step["saturated"] = saturated(step, max_error_rate, slo_ms)
+        steps.append(step)
+        print(
+            f"{rps:>8g} rps: {step['throughput_rps']:>8.2f} done/s, p50 {step['latency_ms']['p50']:.0f} ms, "
+            f"p99 {step['latency_ms']['p99']:.0f} ms, errors {step['error_rate']:.1%}, "
+            f"loop lag p99 {step['loop_lag_ms']['p99']:.1f} ms" + (f"  SATURATED ({', '.join(step['saturated'])})" if step["saturated"] else ""),
+            file=sys.stderr
+        )
+        if not step["saturated"]:
+            sustained = rps
+        elif saturation is None:
+            saturation = rps
+            if not keep_going:
+                break
+    return {"steps": steps, "max_sustained_rps": sustained, "saturation_rps": saturation}
+
+def _api_calls(api_url: str | None) -> dict | None:
+    """Read the fake API's call counts, or None when it can't be reached"""
+    if not api_url:
+        return None
+    try:
+        return httpx.get(f"{api_url}/stats", timeout=5.0).json()
+    except httpx.HTTPError:
+        return None
+
+def in_process_client(api_url: str) -> httpx.AsyncClient:
+    """
+    Import web_app pointed at the fake API and get a client that calls it in this process.
+    """
+    os.environ["ANTHROPIC_BASE_URL"] = api_url
+    os.environ.setdefault("ANTHROPIC_API_KEY", "loadtest")
+    import web_app
+
+    web_app.warm_up()
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=web_app.app), base_url="http://web_app")
+
+def main(argv=None):
+    """
+    Command-line entry point: start the fake API, run the sweep and write the JSON report.
+    """
+    parser = argparse.ArgumentParser(description="Open-loop load test of /ask against a fake Anthropic API")
+    parser.add_argument("--rps", type=float, nargs="+", default=[5, 10, 20, 40], help="target request rates to sweep")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to send at each rate")
+    parser.add_argument("--arrivals", choices=["constant", "poisson"], default="poisson")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds before a request counts as timed out")
+    parser.add_argument("--question", help="send this question every time (exercises the answer cache)")
+    parser.add_argument("--url", help="load-test this running deployment instead of web_app in this process")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="error rate that counts as saturated")
+    parser.add_argument("--slo-ms", type=float, help="p99 latency that counts as saturated")
+    parser.add_argument("--keep-going", action="store_true", help="run every rate, even past saturation")
+    parser.add_argument("--latency", default="lognormal:300:0.3", help="fake API latency (see LatencyDistribution)")
+    parser.add_argument("--chunk-ms", type=float, default=5.0, help="fake API delay between streamed chunks")
+    parser.add_argument("--api-error-rate", type=float, default=0.0, help="share of fake API calls that return 529")
+    parser.add_argument("--api-port", type=int, default=0, help="port for the fake API (0 picks a free one)")
+    parser.add_argument("--api-url", help="use this already running fake API instead of starting one")
+    parser.add_argument("--serve-api", action="store_true", help="only run the fake API, until interrupted")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+    LatencyDistribution.parse(args.latency)
+
+    port = args.api_port or free_port()
+    if args.serve_api:
+        print(f"Fake Anthropic API on http://127.0.0.1:{port}", file=sys.stderr)
+        serve_fake_api("127.0.0.1", port, args.latency, args.chunk_ms / 1000, args.api_error_rate, args.seed)
+        return
+
+    process = None
+    api_url = args.api_url
+    if api_url is None:
+        process, api_url = start_fake_api(port, args.latency, args.chunk_ms / 1000, args.api_error_rate, args.seed)
+    try:
+        if args.url:
+            # No pool limit: a capped pool would queue requests and close the loop
+            client = httpx.AsyncClient(base_url=args.url, limits=httpx.Limits(max_connections=None))
+        else:
+            client = in_process_client(api_url)
+
+        async def sweep():
+            async with client:
+                return await run_sweep(
+                    client, args.rps, args.duration, args.arrivals, args.timeout, args.question,
+                    args.max_error_rate, args.slo_ms, api_url, args.seed, args.keep_going
+                )
+
+        results = asyncio.run(sweep())
+    finally:
+        if process is not None:
+            process.terminate()
+            process.join()
+
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "config": {
+            "target": args.url or "in-process",
+            "arrivals": args.arrivals,
+            "duration_s": args.duration,
+            "latency": str(LatencyDistribution.parse(args.latency)),
+            "chunk_ms": args.chunk_ms,
+            "api_error_rate": args.api_error_rate,
+            "max_error_rate": args.max_error_rate,
+            "slo_ms": args.slo_ms
+        },
+        **results
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
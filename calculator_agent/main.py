@@ -1,5 +1,10 @@
+import argparse
+import json
 import os
 import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 
 # Ensure the project root (parent of this package directory) is on sys.path
 # so that `calculator_agent` can be imported when running this file directly.
@@ -10,12 +15,35 @@ if PARENT_DIR not in sys.path:
 
 from langchain_core.messages import HumanMessage
 from calculator_agent.state import create_initial_state
+from calculator_agent.budget import RunBudget, budget_from_env, enforce_budget
 from calculator_agent.graph_api import create_graph_agent, visualize_agent
 from calculator_agent.functional_api import create_functional_agent, stream_agent
+from calculator_agent.plan_api import create_plan_agent
+from calculator_agent.history import message_text
 
-def run_graph_agent(question: str):
+# Agents a batch can run through
+BATCH_APPROACHES = ("graph", "functional", "plan")
+
+# Questions answered at once in batch mode, unless --concurrency says otherwise
+DEFAULT_BATCH_CONCURRENCY = int(os.environ.get("AGENT_BATCH_CONCURRENCY", "8"))
+
+def print_budget(budget: RunBudget):
+    """
+    Report whether the run finished or was stopped by its budget.
+    """
+    usage = budget.stats()
+    print(f"Status: {budget.status} ({usage['llm_calls']} model calls, {usage['tool_calls']} tool calls, "
+          f"{usage['elapsed_ms']:.0f} ms)")
+    if budget.exceeded:
+        print(f"⚠️  Budget exceeded: {budget.exceeded}")
+
+def run_graph_agent(question: str, budget: RunBudget | None = None):
     """
     Run the calculator agent using the Graph API approach.
+
+    Args:
+        question: The arithmetic question to answer
+        budget: Deadline and call limits for the run (defaults to budget_from_env())
     """
     print("🤖 Running Graph API Agent...")
     print(f"Question: {question}")
@@ -28,20 +56,60 @@ def run_graph_agent(question: str):
     initial_messages = [HumanMessage(content=question)]
     initial_state = create_initial_state(initial_messages)
     
-    # Run the agent
-    result = agent.invoke(initial_state)
+    # Run the agent within its budget
+    budget = budget or budget_from_env()
+    with enforce_budget(budget):
+        result = agent.invoke(initial_state, {"recursion_limit": budget.recursion_limit()})
     
     # Display the results
     print("Conversation:")
     for i, message in enumerate(result["messages"]):
-        print(f"{i+1}. {type(message).__name__}: {message.content}")
+        print(f"{i+1}. {message.role}: {message.content}")
     
     print(f"\nTotal LLM calls: {result['llm_calls']}")
+    print(f"Prompt cache tokens: {result['cache_read_tokens']} read, {result['cache_write_tokens']} written")
+    print_budget(budget)
+    return result
+
+def run_plan_agent(question: str, budget: RunBudget | None = None):
+    """
+    Run the plan-and-execute calculator agent (one plan, local execution, one answer).
+
+    Args:
+        question: The arithmetic question to answer
+        budget: Deadline and call limits for the run (defaults to budget_from_env())
+    """
+    print("🤖 Running Plan-and-Execute Agent...")
+    print(f"Question: {question}")
+    print("-" * 50)
+
+    # Create the agent
+    agent = create_plan_agent()
+
+    # Prepare the initial state
+    initial_state = create_initial_state([HumanMessage(content=question)])
+
+    # Run the agent within its budget
+    budget = budget or budget_from_env()
+    with enforce_budget(budget):
+        result = agent.invoke(initial_state, {"recursion_limit": budget.recursion_limit()})
+
+    # Display the results
+    print("Conversation:")
+    for i, message in enumerate(result["messages"]):
+        print(f"{i+1}. {message.role}: {message.content}")
+
+    print(f"\nTotal LLM calls: {result['llm_calls']} ({result.get('plans_made', 0)} plans)")
+    print_budget(budget)
     return result
 
-def run_functional_agent(question: str):
+def run_functional_agent(question: str, budget: RunBudget | None = None):
     """
     Run the calculator agent using the Functional API approach.
+
+    Args:
+        question: The arithmetic question to answer
+        budget: Deadline and call limits for the run (defaults to budget_from_env())
     """
     print("🤖 Running Functional API Agent...")
     print(f"Question: {question}")
@@ -53,19 +121,29 @@ def run_functional_agent(question: str):
     # Prepare the initial messages
     initial_messages = [HumanMessage(content=question)]
     
-    # Run the agent
-    result = agent(initial_messages)
+    # Run the agent within its budget
+    budget = budget or budget_from_env()
+    with enforce_budget(budget):
+        result = agent.invoke(initial_messages)
     
     # Display the results
     print("Conversation:")
-    for i, message in enumerate(result):
+    for i, message in enumerate(result["messages"]):
         print(f"{i+1}. {type(message).__name__}: {message.content}")
     
+    print(f"\nTotal LLM calls: {result['llm_calls']}")
+    print(f"Prompt cache tokens: {result['cache_read_tokens']} read, {result['cache_write_tokens']} written")
+    print(f"History tokens saved: {result['history_tokens_saved']}")
+    print_budget(budget)
     return result
 
-def run_streaming_agent(question: str):
+def run_streaming_agent(question: str, budget: RunBudget | None = None):
     """
     Run the calculator agent with streaming output.
+
+    Args:
+        question: The arithmetic question to answer
+        budget: Deadline and call limits for the run (defaults to budget_from_env())
     """
     print("🤖 Running Streaming Agent...")
     print(f"Question: {question}")
@@ -74,10 +152,164 @@ def run_streaming_agent(question: str):
     # Prepare the initial messages
     initial_messages = [HumanMessage(content=question)]
     
-    # Stream the results
-    for chunk in stream_agent(initial_messages):
-        print(f"Update: {chunk}")
-        print()
+    # Stream the results within the run's budget
+    budget = budget or budget_from_env()
+    with enforce_budget(budget):
+        for chunk in stream_agent(initial_messages):
+            print(f"Update: {chunk}")
+            print()
+    print_budget(budget)
+
+def read_questions(lines):
+    """
+    Parse batch input: one question per line, or a JSON object with "question" and an optional "id".
+
+    Blank lines and lines starting with "#" are skipped. A line that can't be
+    parsed is yielded with the reason instead of a question, so the batch can
+    report it in order and go on.
+
+    Yields:
+        tuple: (line number, id or None, question or None, error or None)
+    """
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if not line.startswith("{"):
+            yield number, None, line, None
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError as e:
+            yield number, None, None, f"invalid input: {e}"
+            continue
+        question_id = item.get("id") if isinstance(item, dict) else None
+        question = item.get("question") if isinstance(item, dict) else None
+        if not isinstance(question, str) or not question.strip():
+            yield number, question_id, None, 'invalid input: expected a JSON object with a "question" string'
+        else:
+            yield number, question_id, question, None
+
+def answer_question(agent, approach: str, question: str, budget: RunBudget) -> dict:
+    """
+    Run one question through an agent without printing, and summarize the run.
+
+    Args:
+        agent: The compiled agent for the approach
+        approach: "graph", "functional" or "plan"
+        question: The question to answer
+        budget: Deadline and call limits for the run
+
+    Returns:
+        dict: The answer, LLM and tool calls, latency, status and error (None if the run didn't fail)
+    """
+    started = time.perf_counter()
+    answer, error = None, None
+    try:
+        with enforce_budget(budget):
+            if approach == "functional":
+                result = agent.invoke([HumanMessage(content=question)])
+                answer = message_text(result["messages"][-1])
+            else:
+                result = agent.invoke(
+                    create_initial_state([HumanMessage(content=question)]),
+                    {"recursion_limit": budget.recursion_limit()}
+                )
+                answer = result["messages"][-1].content
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    usage = budget.stats()
+    return {
+        "answer": answer,
+        "llm_calls": usage["llm_calls"],
+        "tool_calls": usage["tool_calls"],
+        "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+        "success": error is None and budget.exceeded is None,
+        "status": "error" if error is not None else budget.status,
+        "error": error or (f"{budget.exceeded} budget exceeded" if budget.exceeded else None)
+    }
+
+def run_batch(
+    questions,
+    output,
+    approach: str = "graph",
+    concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    limits: dict | None = None
+) -> dict:
+    """
+    Answer questions concurrently, writing one JSON line per question in input order.
+
+    Questions are read lazily and at most a few times `concurrency` are in
+    flight or waiting to be written, so a long stdin stream neither waits
+    for its end nor piles up in memory. A line is written as soon as its
+    question and every one before it are answered.
+
+    Args:
+        questions: (line number, id, question, error) tuples from read_questions()
+        output: Text stream the JSON lines are written to
+        approach: "graph", "functional" or "plan"
+        concurrency: Most questions answered at once
+        limits: deadline_seconds, max_llm_calls and max_tool_calls for every run (see budget_from_env)
+
+    Returns:
+        dict: Count, successes, failures, LLM calls, wall time and throughput of the batch
+    """
+    if approach == "functional":
+        agent = create_functional_agent()
+    elif approach == "plan":
+        agent = create_plan_agent()
+    else:
+        agent = create_graph_agent()
+    limits = limits or {}
+    stats = {
+        "count": 0, "succeeded": 0, "failed": 0, "budget_exceeded": 0, "errors": 0, "invalid_input": 0, "llm_calls": 0
+    }
+    started = time.perf_counter()
+
+    def invalid(error: str) -> Future:
+        """An already finished result for an input line that couldn't be parsed"""
+        future = Future()
+        future.set_result({
+            "answer": None, "llm_calls": 0, "tool_calls": 0, "latency_ms": 0.0,
+            "success": False, "status": "invalid_input", "error": error
+        })
+        return future
+
+    def write(index, line, question_id, question, future):
+        record = {"index": index, "line": line, "question": question, **future.result()}
+        if question_id is not None:
+            record = {"id": question_id, **record}
+        output.write(json.dumps(record) + "\n")
+        output.flush()
+        stats["count"] += 1
+        stats["succeeded"] += record["success"]
+        stats["failed"] += not record["success"]
+        stats["budget_exceeded"] += record["status"] == "budget_exceeded"
+        stats["errors"] += record["status"] == "error"
+        stats["invalid_input"] += record["status"] == "invalid_input"
+        stats["llm_calls"] += record["llm_calls"]
+
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch") as executor:
+        for index, (line, question_id, question, error) in enumerate(questions):
+            if error is not None:
+                future = invalid(error)
+            else:
+                # The budget's clock starts when the question is picked up, not while it waits
+                future = executor.submit(
+                    lambda question=question: answer_question(agent, approach, question, budget_from_env(**limits))
+                )
+            pending.append((index, line, question_id, question, future))
+            # Write finished answers at the head of the line; wait once too many are outstanding
+            while pending and (pending[0][4].done() or len(pending) >= 4 * concurrency):
+                write(*pending.popleft())
+        while pending:
+            write(*pending.popleft())
+
+    wall_time = time.perf_counter() - started
+    stats["wall_time_ms"] = round(wall_time * 1000, 2)
+    stats["questions_per_second"] = round(stats["count"] / wall_time, 3) if wall_time else 0.0
+    return stats
 
 def compare_approaches(question: str):
     """
@@ -100,10 +332,44 @@ def compare_approaches(question: str):
     print("\n" + "=" * 60)
     print("✅ Both approaches should produce the same result!")
 
-def main():
+def main(argv=None):
     """
-    Main function to demonstrate the calculator agent.
+    Main function to demonstrate the calculator agent, or answer a batch of questions.
+
+    Without arguments, runs the interactive demo. With --batch, reads questions
+    from a file ("-" for stdin) and writes one JSON line per question:
+        python -m calculator_agent.main --batch questions.txt --approach graph --concurrency 8 > results.jsonl
+    The exit status is 1 if any question failed or ran out of budget.
     """
+    parser = argparse.ArgumentParser(description="Calculator agent demo and batch runner")
+    parser.add_argument("--batch", metavar="FILE", help='answer the questions in FILE ("-" for stdin) as JSON lines')
+    parser.add_argument("--approach", choices=BATCH_APPROACHES, default="graph", help="agent for batch mode")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_BATCH_CONCURRENCY, help="questions answered at once")
+    parser.add_argument("--output", help="write the JSON lines here instead of stdout")
+    parser.add_argument("--deadline-seconds", type=float, help="deadline for each question")
+    parser.add_argument("--max-llm-calls", type=int, help="model-call limit for each question")
+    parser.add_argument("--max-tool-calls", type=int, help="tool-call limit for each question")
+    args = parser.parse_args(argv)
+
+    if args.batch is not None:
+        limits = {
+            "deadline_seconds": args.deadline_seconds,
+            "max_llm_calls": args.max_llm_calls,
+            "max_tool_calls": args.max_tool_calls
+        }
+        source = sys.stdin if args.batch == "-" else open(args.batch)
+        output = open(args.output, "w") if args.output else sys.stdout
+        try:
+            stats = run_batch(read_questions(source), output, args.approach, max(1, args.concurrency), limits)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            if output is not sys.stdout:
+                output.close()
+        # The summary goes to stderr so stdout stays pure JSON lines
+        print(json.dumps(stats), file=sys.stderr)
+        sys.exit(1 if stats["failed"] else 0)
+
     print("🧮 Calculator Agent Demo")
     print("=" * 40)
     
@@ -115,7 +381,7 @@ def main():
     ]
     
     # Choose which approach to use
-    approach = input("Choose approach (graph/functional/streaming/compare): ").lower()
+    approach = input("Choose approach (graph/functional/plan/streaming/compare): ").lower()
     
     for question in questions:
         print(f"\n{'='*60}")
@@ -124,6 +390,8 @@ def main():
             run_graph_agent(question)
         elif approach == "functional":
             run_functional_agent(question)
+        elif approach == "plan":
+            run_plan_agent(question)
         elif approach == "streaming":
             run_streaming_agent(question)
         elif approach == "compare":
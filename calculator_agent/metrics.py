@@ -0,0 +1,162 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Default latency buckets in seconds, from sub-millisecond tool calls to slow model turns
+LATENCY_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000)
+TOOL_CALL_BUCKETS = (0, 1, 2, 3, 5, 8, 13)
+
+def _format_labels(labels: tuple) -> str:
+    """
+    Render a sorted (name, value) label tuple in Prometheus syntax.
+    """
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in labels) + "}"
+
+class Counter:
+    """
+    A labelled, monotonically increasing Prometheus counter.
+    """
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+class Histogram:
+    """
+    A labelled Prometheus histogram with fixed buckets.
+    """
+
+    def __init__(self, name: str, help_text: str, buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f"{self.name}_bucket{_format_labels(key + (('le', bound),))} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', '+Inf'),))} {series[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {series[-2]}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {series[-1]}")
+        return lines
+
+NODE_DURATION = Histogram(
+    "agent_node_duration_seconds", "Wall time of agent graph nodes and functional tasks."
+)
+NODE_ERRORS = Counter(
+    "agent_node_errors_total", "Agent graph nodes and functional tasks that raised an error."
+)
+LLM_DURATION = Histogram(
+    "agent_llm_duration_seconds", "Wall time of individual chat model calls."
+)
+LLM_TIME_TO_FIRST_TOKEN = Histogram(
+    "agent_llm_time_to_first_token_seconds",
+    "Time until the first streamed token (the full response time when not streaming)."
+)
+LLM_TOKENS = Histogram(
+    "agent_llm_tokens", "Tokens per chat model call by kind (input, output, cache_read, cache_write).",
+    TOKEN_BUCKETS
+)
+LLM_TOOL_CALLS = Histogram(
+    "agent_llm_tool_calls_per_turn", "Tool calls requested by the model in a single turn.",
+    TOOL_CALL_BUCKETS
+)
+LLM_ERRORS = Counter(
+    "agent_llm_errors_total", "Chat model calls that raised an error."
+)
+SPECULATIVE_TOOL_CALLS = Counter(
+    "agent_speculative_tool_calls_total",
+    "Tool calls started while the model was streaming, by outcome (confirmed or discarded)."
+)
+SPECULATIVE_TIME_SAVED = Histogram(
+    "agent_speculative_time_saved_seconds",
+    "Tool-phase latency a model turn saved by starting its tool calls during the stream."
+)
+
+ALL_METRICS = [
+    NODE_DURATION, NODE_ERRORS, LLM_DURATION, LLM_TIME_TO_FIRST_TOKEN,
+    LLM_TOKENS, LLM_TOOL_CALLS, LLM_ERRORS, SPECULATIVE_TOOL_CALLS, SPECULATIVE_TIME_SAVED
+]
+
+# Per-request list of node timings, set by collect_timings()
+_request_timings: ContextVar[list | None] = ContextVar("request_timings", default=None)
+
+@contextmanager
+def collect_timings():
+    """
+    Collect the node timings of everything run inside the block.
+
+    Yields:
+        list: Filled with {"node", "api", "ms"} entries as nodes finish
+    """
+    timings = []
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
+
+@contextmanager
+def track_node(node: str, api: str):
+    """
+    Time a graph node or functional task and record any error it raises.
+
+    Args:
+        node: Node or task name, e.g. "llm_call"
+        api: "graph" or "functional"
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        NODE_ERRORS.inc(node=node, api=api)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        NODE_DURATION.observe(elapsed, node=node, api=api)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append({"node": node, "api": api, "ms": round(elapsed * 1000, 3)})
+
+def render_prometheus() -> str:
+    """
+    Render every metric in the Prometheus text exposition format.
+    """
+    lines = []
+    for metric in ALL_METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -1,37 +1,177 @@
 from dotenv import load_dotenv
 load_dotenv(".env.local")
 
+import os
+import threading
+
 from langchain.chat_models import init_chat_model
+from langchain_core.messages import SystemMessage
 from calculator_agent.tools import TOOLS, TOOLS_BY_NAME
+from calculator_agent.llm_metrics import LLM_METRICS_HANDLER
+from calculator_agent.response_cache import get_response_cache
+
+# Default model configuration used by both agent implementations
+DEFAULT_MODEL_NAME = "anthropic:claude-sonnet-4-5"
+DEFAULT_TEMPERATURE = 0
+
+# System prompt shared by every model call in both agent implementations
+SYSTEM_PROMPT = "You are a helpful assistant tasked with performing arithmetic on a set of inputs."
+
+# Process-wide registry of built models, keyed by (model_name, temperature).
+# Each entry is built once and shared by every request and thread, so the
+# underlying HTTP client (and its keep-alive connection pool) is reused.
+_MODEL_REGISTRY = {}
+_REGISTRY_LOCK = threading.Lock()
+_REGISTRY_STATS = {"hits": 0, "builds": 0}
+
+def get_model(model_name: str = DEFAULT_MODEL_NAME, temperature: float = DEFAULT_TEMPERATURE):
+    """
+    Get a configured model from the process-wide registry, building it on first use.
+
+    Args:
+        model_name: The provider-prefixed model name passed to init_chat_model
+        temperature: Sampling temperature for the model
+
+    Returns:
+        tuple: (model, model_with_tools, tools_by_name)
+    """
+    key = (model_name, temperature)
+    with _REGISTRY_LOCK:
+        entry = _MODEL_REGISTRY.get(key)
+        if entry is not None:
+            _REGISTRY_STATS["hits"] += 1
+            return entry
+
+        # The shared metrics handler records latency and token usage for every call, and
+        # the on-disk response cache (if AGENT_LLM_CACHE is set) answers repeated prompts
+        model = init_chat_model(
+            model_name, temperature=temperature, callbacks=[LLM_METRICS_HANDLER], cache=get_response_cache()
+        )
+
+        # Connect our arithmetic tools to the model
+        model_with_tools = model.bind_tools(TOOLS)
+
+        entry = (model, model_with_tools, TOOLS_BY_NAME)
+        _MODEL_REGISTRY[key] = entry
+        _REGISTRY_STATS["builds"] += 1
+        return entry
 
 def setup_model():
     """
     Initialize and configure the Claude language model with our arithmetic tools.
-    
+
+    The model is built once per process and reused on every later call.
+
     Returns:
         tuple: (model, model_with_tools, tools_by_name)
     """
-    # Initialize Claude Sonnet 4.5 with temperature=0 for consistent results
-    model = init_chat_model(
-        "anthropic:claude-sonnet-4-5",
-        temperature=0  # Low temperature for consistent, deterministic responses
-    )
-    
-    # Connect our arithmetic tools to the model
-    model_with_tools = model.bind_tools(TOOLS)
-    
-    return model, model_with_tools, TOOLS_BY_NAME
+    # Claude Sonnet 4.5 with temperature=0 for consistent, deterministic responses
+    return get_model(DEFAULT_MODEL_NAME, DEFAULT_TEMPERATURE)
+
+def reset_model_registry():
+    """
+    Drop every cached model and reset the registry counters.
+    """
+    with _REGISTRY_LOCK:
+        _MODEL_REGISTRY.clear()
+        _REGISTRY_STATS["hits"] = 0
+        _REGISTRY_STATS["builds"] = 0
+
+def _count_live_connections(models) -> int:
+    """
+    Count open HTTP connections across the clients the given models have created.
+
+    Only clients that already exist are inspected, so this never opens a connection.
+    """
+    seen_pools = set()
+    count = 0
+    for model in models:
+        for attr in ("_client", "_async_client"):
+            client = vars(model).get(attr)
+            http_client = getattr(client, "_client", None)
+            transport = getattr(http_client, "_transport", None)
+            pool = getattr(transport, "_pool", None)
+            if pool is None or id(pool) in seen_pools:
+                continue
+            seen_pools.add(id(pool))
+            count += len(getattr(pool, "connections", []))
+    return count
+
+def get_pool_stats() -> dict:
+    """
+    Get usage statistics for the model registry.
+
+    Returns:
+        dict: Registry hits, model builds, cached models and live HTTP connections
+    """
+    with _REGISTRY_LOCK:
+        models = [model for model, _, _ in _MODEL_REGISTRY.values()]
+        stats = {
+            "hits": _REGISTRY_STATS["hits"],
+            "builds": _REGISTRY_STATS["builds"],
+            "models": [name for name, _ in _MODEL_REGISTRY],
+        }
+    stats["live_connections"] = _count_live_connections(models)
+    return stats
+
+def prompt_cache_enabled() -> bool:
+    """
+    Check whether Anthropic prompt caching is switched on via ANTHROPIC_PROMPT_CACHE.
+    """
+    return os.environ.get("ANTHROPIC_PROMPT_CACHE", "").lower() in ("1", "true", "yes", "on")
+
+def build_system_message(prompt_cache: bool | None = None) -> SystemMessage:
+    """
+    Build the system message, optionally marked as an Anthropic prompt-cache breakpoint.
+
+    Anthropic caches the prompt prefix up to the breakpoint, and tool definitions
+    come before the system prompt, so one breakpoint here covers both the bound
+    tool schemas and the system prompt. Prefixes shorter than the model's minimum
+    cacheable length are simply not cached.
+
+    Args:
+        prompt_cache: Add the cache breakpoint (defaults to prompt_cache_enabled())
+
+    Returns:
+        SystemMessage: The system prompt message
+    """
+    if prompt_cache is None:
+        prompt_cache = prompt_cache_enabled()
+    if not prompt_cache:
+        return SystemMessage(content=SYSTEM_PROMPT)
+    return SystemMessage(content=[
+        {"type": "text", "text": SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}
+    ])
+
+def get_cache_usage(message) -> tuple[int, int]:
+    """
+    Read prompt-cache token counts from a model response.
+
+    Returns:
+        tuple: (cache_read_tokens, cache_write_tokens), zeros when not reported
+    """
+    usage = getattr(message, "usage_metadata", None) or {}
+    details = usage.get("input_token_details") or {}
+    return details.get("cache_read") or 0, details.get("cache_creation") or 0
 
 def get_model_info():
     """
     Get information about the configured model.
-    
+
     Returns:
         dict: Model configuration details
     """
+    # Imported here because the router builds its models through this module
+    from calculator_agent.routing import get_default_router
+
+    response_cache = get_response_cache()
     return {
-        "model_name": "anthropic:claude-sonnet-4-5",
-        "temperature": 0,
+        "model_name": DEFAULT_MODEL_NAME,
+        "temperature": DEFAULT_TEMPERATURE,
         "available_tools": [tool.name for tool in TOOLS],
-        "tool_count": len(TOOLS)
-    }
\ No newline at end of file
+        "tool_count": len(TOOLS),
+        "prompt_cache": prompt_cache_enabled(),
+        "pool": get_pool_stats(),
+        "response_cache": response_cache.stats() if response_cache is not None else None,
+        "routing": get_default_router().stats()
+    }
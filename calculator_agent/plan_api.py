@@ -0,0 +1,493 @@
+import asyncio
+import json
+import uuid
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from langchain_core.messages import AIMessage, SystemMessage, ToolMessage
+from langchain_core.runnables import RunnableLambda
+from langgraph.graph import StateGraph, START, END
+from pydantic import BaseModel, Field
+from typing import Literal
+
+from .state import MessagesState, to_messages, to_record, to_records
+from .model import DEFAULT_MODEL_NAME, SYSTEM_PROMPT, get_model
+from .tools import TOOLS
+from .fast_path import create_fast_path_node
+from .history import HistoryReducer, get_default_history_reducer
+from .routing import ModelRouter
+from .tool_executor import ToolExecutor, get_tool_executor
+from .metrics import track_node
+from .budget import (
+    BudgetExceeded, current_budget, invoke_with_deadline, ainvoke_with_deadline,
+    partial_answer, skipped_tool_message
+)
+from .graph_api import (
+    DEFAULT_TOOL_WORKERS, _get_tool_node_executor,
+    create_llm_node, create_route_after_fast_path, create_should_continue, create_tool_node
+)
+
+# Plans made per turn after the first one, each time because a step failed
+DEFAULT_MAX_REPLANS = 1
+
+class PlanStep(BaseModel):
+    """One tool call in a plan."""
+    id: str = Field(description="Short unique name for the step, e.g. 's1'")
+    tool: str = Field(description="Name of the tool to call")
+    args: dict = Field(
+        description='Arguments for the tool. Use the string "$<id>" as a value to pass the result of an earlier step.'
+    )
+
+class Plan(BaseModel):
+    """Every tool call needed to answer the question, in any order; steps may use earlier steps' results."""
+    steps: list[PlanStep] = Field(description="The tool calls (empty if no tools are needed)")
+
+class PlanError(ValueError):
+    """
+    Raised when a plan names an unknown tool or step, or its steps depend on each other in a cycle.
+    """
+
+class PlanState(MessagesState):
+    """
+    MessagesState plus the plan being executed.
+
+    - plan: The current plan's steps in execution order
+    - plan_error: Why the latest plan couldn't be used, if it couldn't
+    - plans_made: How many plans this turn has made (the first plus any replans)
+    """
+    plan: list[dict]
+    plan_error: str | None
+    plans_made: int
+
+def _describe_tools() -> str:
+    """
+    List every tool with its description and argument schema for the planner prompt.
+    """
+    lines = []
+    for tool in TOOLS:
+        schema = tool.args_schema.model_json_schema().get("properties", {})
+        args = ", ".join(f"{name}: {spec.get('type', 'any')}" for name, spec in schema.items())
+        lines.append(f"- {tool.name}({args}): {' '.join(tool.description.split())}")
+    return "\n".join(lines)
+
+_PLANNER_PROMPT = f"""{SYSTEM_PROMPT}
+
+Plan the whole calculation at once: list every tool call needed to answer the latest question.
+A step can use the result of an earlier step by giving "$<step id>" as an argument value.
+Steps that don't depend on each other run at the same time. If earlier tool results in the
+conversation show a failed step, plan again around the failure. Return no steps if no tool is needed.
+
+Tools:
+{_describe_tools()}"""
+
+def references(value) -> set[str]:
+    """
+    Find the step ids an argument value refers to ("$s1", also inside lists and dicts).
+    """
+    if isinstance(value, str) and value.startswith("$"):
+        return {value[1:]}
+    if isinstance(value, list):
+        return set().union(*(references(item) for item in value))
+    if isinstance(value, dict):
+        return set().union(*(references(item) for item in value.values()))
+    return set()
+
+def resolve(value, results: dict):
+    """
+    Replace step references in an argument value with those steps' results.
+    """
+    if isinstance(value, str) and value.startswith("$"):
+        return results[value[1:]]
+    if isinstance(value, list):
+        return [resolve(item, results) for item in value]
+    if isinstance(value, dict):
+        return {key: resolve(item, results) for key, item in value.items()}
+    return value
+
+def order_plan(steps: list[dict], tool_names) -> list[dict]:
+    """
+    Check a plan and sort its steps so every step comes after the steps it uses.
+
+    Args:
+        steps: The plan's steps as {"id", "tool", "args"} dicts
+        tool_names: Names of the tools a step may call
+
+    Returns:
+        list[dict]: The steps in a valid execution order
+
+    Raises:
+        PlanError: For duplicate ids, unknown tools or steps, and cycles
+    """
+    by_id = {}
+    for step in steps:
+        if step["id"] in by_id:
+            raise PlanError(f"Step id '{step['id']}' is used twice")
+        if step["tool"] not in tool_names:
+            raise PlanError(f"Step '{step['id']}' calls unknown tool '{step['tool']}'")
+        by_id[step["id"]] = step
+    for step in steps:
+        unknown = references(step["args"]) - by_id.keys()
+        if unknown:
+            raise PlanError(f"Step '{step['id']}' refers to unknown step(s) {sorted(unknown)}")
+
+    # Kahn's algorithm, keeping the planner's order among independent steps
+    ordered, done = [], set()
+    remaining = list(steps)
+    while remaining:
+        ready = [step for step in remaining if references(step["args"]) <= done]
+        if not ready:
+            raise PlanError(f"Steps {[step['id'] for step in remaining]} depend on each other in a cycle")
+        ordered += ready
+        done |= {step["id"] for step in ready}
+        remaining = [step for step in remaining if step["id"] not in done]
+    return ordered
+
+def _to_content(observation) -> str:
+    """
+    Format a tool's output as ToolMessage content.
+    """
+    return observation if isinstance(observation, str) else json.dumps(observation)
+
+def create_planner_node(
+    history_reducer: HistoryReducer | None = None,
+    model_name: str = DEFAULT_MODEL_NAME,
+    max_replans: int = DEFAULT_MAX_REPLANS
+):
+    """
+    Create the node that asks the model for the whole plan in one structured call.
+
+    Args:
+        history_reducer: Compacts the history sent to the model (defaults to the process-wide reducer)
+        model_name: Model that writes the plans
+        max_replans: Plans allowed after the first one in a turn
+    """
+    model, _, tools_by_name = get_model(model_name)
+    planner = model.with_structured_output(Plan)
+
+    def build_prompt(state: PlanState):
+        """
+        Hydrate and compact the conversation so far and prepend the planner's system prompt.
+        """
+        reducer = history_reducer or get_default_history_reducer()
+        messages, _ = reducer(to_messages(state["messages"]))
+        prompt = _PLANNER_PROMPT
+        if state.get("plan_error"):
+            # Tell the model why its last plan was rejected
+            prompt += f"\n\nYour previous plan could not be used: {state['plan_error']}"
+        return [SystemMessage(content=prompt)] + messages
+
+    def stopped(state: PlanState, budget):
+        """
+        Record the best partial result of a run whose budget ran out.
+        """
+        return to_record(partial_answer(to_messages(state["messages"]), budget.exceeded))
+
+    def build_update(state: PlanState, plan: Plan | None, error: str | None):
+        """
+        Store the ordered plan, or why it couldn't be used (with no steps).
+        """
+        steps = []
+        if plan is not None:
+            try:
+                steps = order_plan([step.model_dump() for step in plan.steps], tools_by_name)
+            except PlanError as plan_error:
+                error = str(plan_error)
+        return {
+            "plan": steps,
+            "plan_error": error,
+            "plans_made": state.get("plans_made", 0) + 1,
+            "llm_calls": state.get("llm_calls", 0) + 1
+        }
+
+    def plan(state: PlanState):
+        """
+        Ask the model for a plan of tool calls covering the whole question.
+        """
+        with track_node("plan", "plan"):
+            budget = current_budget()
+            if budget is not None and not budget.start_llm_call():
+                return {"messages": [stopped(state, budget)], "plan": []}
+            try:
+                return build_update(state, invoke_with_deadline(planner, build_prompt(state), budget), None)
+            except BudgetExceeded:
+                return {"messages": [stopped(state, budget)], "plan": []}
+            except ValueError as error:
+                # The model's output didn't fit the Plan schema
+                return build_update(state, None, str(error))
+
+    async def aplan(state: PlanState):
+        """
+        Async version of plan.
+        """
+        with track_node("plan", "plan"):
+            budget = current_budget()
+            if budget is not None and not budget.start_llm_call():
+                return {"messages": [stopped(state, budget)], "plan": []}
+            try:
+                return build_update(state, await ainvoke_with_deadline(planner, build_prompt(state), budget), None)
+            except BudgetExceeded:
+                return {"messages": [stopped(state, budget)], "plan": []}
+            except ValueError as error:
+                return build_update(state, None, str(error))
+
+    return RunnableLambda(plan, afunc=aplan, name="plan")
+
+def create_executor_node(
+    max_workers: int = DEFAULT_TOOL_WORKERS,
+    tool_timeout: float | None = None,
+    tool_executor: ToolExecutor | None = None
+):
+    """
+    Create the node that runs a plan locally, without calling the model.
+
+    Each step starts as soon as the steps it uses have finished, so independent
+    branches run in parallel. A step whose inputs failed is not run. The steps
+    are added to the conversation as one AI message with a tool call per step,
+    followed by their tool results, so the final model call (and any replan)
+    sees the whole calculation.
+
+    Args:
+        max_workers: Maximum number of steps to run at once (the thread pool is
+            shared with the tool nodes created with the same value)
+        tool_timeout: Seconds to wait for the plan's steps (None waits forever)
+        tool_executor: Runs each step, CPU-bound tools in a process pool (defaults to the process-wide one)
+    """
+    tool_executor = tool_executor or get_tool_executor()
+
+    def start(state: PlanState):
+        """
+        Reserve tool calls from the budget and set up the run's bookkeeping.
+        """
+        steps = state["plan"]
+        budget = current_budget()
+        granted = budget.grant_tool_calls(len(steps)) if budget is not None else len(steps)
+        call_ids = {step["id"]: f"plan_{uuid.uuid4().hex[:12]}_{step['id']}" for step in steps}
+        return steps, budget, set(step["id"] for step in steps[:granted]), call_ids
+
+    def ready_steps(steps, allowed, outcomes, started):
+        """
+        Get the allowed steps that haven't started and whose inputs all succeeded.
+        """
+        return [
+            step for step in steps
+            if step["id"] in allowed and step["id"] not in started
+            and all(outcomes.get(ref, (None,))[0] == "ok" for ref in references(step["args"]))
+        ]
+
+    def build_update(steps, budget, allowed, call_ids, outcomes):
+        """
+        Record every step as a tool call and its outcome as a ToolMessage.
+        """
+        results = {step_id: value for step_id, (status, value) in outcomes.items() if status == "ok"}
+        tool_calls, messages = [], []
+        for step in steps:
+            step_id = step["id"]
+            args = step["args"]
+            if outcomes.get(step_id, (None,))[0] in ("ok", "error"):
+                args = resolve(args, results)
+            tool_call = {"name": step["tool"], "args": args, "id": call_ids[step_id]}
+            tool_calls.append(tool_call)
+            status, value = outcomes.get(step_id, (None, None))
+            if status == "ok":
+                messages.append(ToolMessage(content=_to_content(value), tool_call_id=tool_call["id"], name=step["tool"]))
+            elif step_id not in allowed or status == "skipped":
+                messages.append(skipped_tool_message(tool_call, budget.exceeded))
+            elif status == "error":
+                messages.append(ToolMessage(
+                    content=f"Error: {value}", tool_call_id=tool_call["id"], name=step["tool"], status="error"
+                ))
+            else:
+                failed = sorted(ref for ref in references(step["args"]) if outcomes.get(ref, (None,))[0] != "ok")
+                messages.append(ToolMessage(
+                    content=f"Not run: it uses the result of step(s) {failed}, which did not succeed.",
+                    tool_call_id=tool_call["id"], name=step["tool"], status="error"
+                ))
+        return {"messages": to_records([AIMessage(content="", tool_calls=tool_calls)] + messages)}
+
+    def timeout_for(budget):
+        """
+        How long to wait for the next step to finish.
+        """
+        return budget.timeout(tool_timeout) if budget is not None else tool_timeout
+
+    def on_timeout(budget):
+        """
+        The outcome of a step still running at a timeout: skipped if the run's deadline passed, else an error.
+        """
+        if budget is None or not budget.expired():
+            return "error", TimeoutError(f"Plan step timed out after {tool_timeout}s")
+        budget.mark_exceeded("deadline")
+        return "skipped", None
+
+    def run_plan(state: PlanState):
+        """
+        Run the plan's steps on a thread pool, each once its inputs are ready.
+        """
+        steps, budget, allowed, call_ids = start(state)
+        executor = _get_tool_node_executor(max_workers)
+        outcomes, started, running = {}, set(), {}
+        while True:
+            results = {step_id: value for step_id, (status, value) in outcomes.items() if status == "ok"}
+            for step in ready_steps(steps, allowed, outcomes, started):
+                started.add(step["id"])
+                future = executor.submit(tool_executor.invoke, step["tool"], resolve(step["args"], results))
+                running[future] = step["id"]
+            if not running:
+                break
+            done, _ = wait(running, timeout=timeout_for(budget), return_when=FIRST_COMPLETED)
+            if not done:
+                # Out of time: give up on everything still running
+                for step_id in running.values():
+                    outcomes[step_id] = on_timeout(budget)
+                break
+            for future in done:
+                step_id = running.pop(future)
+                try:
+                    outcomes[step_id] = ("ok", future.result())
+                except Exception as error:
+                    outcomes[step_id] = ("error", error)
+        return build_update(steps, budget, allowed, call_ids, outcomes)
+
+    async def arun_plan(state: PlanState):
+        """
+        Async version of run_plan, running each step as an asyncio task.
+        """
+        steps, budget, allowed, call_ids = start(state)
+        outcomes, started, running = {}, set(), {}
+        slots = asyncio.Semaphore(max_workers)
+
+        async def run(tool_name, args):
+            async with slots:
+                return await tool_executor.ainvoke(tool_name, args)
+
+        while True:
+            results = {step_id: value for step_id, (status, value) in outcomes.items() if status == "ok"}
+            for step in ready_steps(steps, allowed, outcomes, started):
+                started.add(step["id"])
+                task = asyncio.ensure_future(run(step["tool"], resolve(step["args"], results)))
+                running[task] = step["id"]
+            if not running:
+                break
+            done, _ = await asyncio.wait(running, timeout=timeout_for(budget), return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                for task, step_id in running.items():
+                    task.cancel()
+                    outcomes[step_id] = on_timeout(budget)
+                break
+            for task in done:
+                step_id = running.pop(task)
+                try:
+                    outcomes[step_id] = ("ok", task.result())
+                except Exception as error:
+                    outcomes[step_id] = ("error", error)
+        return build_update(steps, budget, allowed, call_ids, outcomes)
+
+    def execute(state: PlanState):
+        """
+        Runs the plan and records how long it took.
+        """
+        with track_node("execute", "plan"):
+            return run_plan(state)
+
+    async def aexecute(state: PlanState):
+        """
+        Async version of execute.
+        """
+        with track_node("execute", "plan"):
+            return await arun_plan(state)
+
+    return RunnableLambda(execute, afunc=aexecute, name="execute")
+
+def create_route_after_plan(max_replans: int = DEFAULT_MAX_REPLANS):
+    """
+    Create the conditional logic that runs a plan, or goes on to the final answer without one.
+    """
+    def route_after_plan(state: PlanState) -> Literal["execute", "plan", "llm_call", END]:
+        """
+        Execute a plan with steps, ask again for a rejected plan, or end if the budget stopped the run.
+
+        Once no replans are left, llm_call answers with the usual tool loop instead.
+        """
+        last_message = state["messages"][-1]
+        if last_message.role == "ai" and last_message.stop_reason == "budget_exceeded":
+            return END
+        if state["plan"]:
+            return "execute"
+        if state.get("plan_error") and state.get("plans_made", 0) <= max_replans:
+            return "plan"
+        return "llm_call"
+
+    return route_after_plan
+
+def create_route_after_execute(max_replans: int = DEFAULT_MAX_REPLANS):
+    """
+    Create the conditional logic that replans only when a step failed.
+    """
+    def route_after_execute(state: PlanState) -> Literal["plan", "llm_call"]:
+        """
+        Replan if a step failed (and replans are left), otherwise phrase the answer.
+        """
+        # The plan's tool results are the last records in the conversation
+        results = state["messages"][-len(state["plan"]):]
+        budget = current_budget()
+        failed = any(message.role == "tool" and message.status == "error" for message in results)
+        if failed and state.get("plans_made", 0) <= max_replans and (budget is None or budget.exceeded is None):
+            return "plan"
+        return "llm_call"
+
+    return route_after_execute
+
+def create_plan_agent(
+    max_tool_workers: int = DEFAULT_TOOL_WORKERS,
+    tool_timeout: float | None = None,
+    fast_path: bool = True,
+    history_reducer: HistoryReducer | None = None,
+    prompt_cache: bool | None = None,
+    router: ModelRouter | None = None,
+    tool_executor: ToolExecutor | None = None,
+    max_replans: int = DEFAULT_MAX_REPLANS
+):
+    """
+    Build and compile the plan-and-execute calculator agent.
+
+    Instead of one model call per dependent step, one call writes the whole
+    calculation as a DAG of tool calls, the plan is run locally, and one more
+    call phrases the answer: two model calls for any number of steps. The model
+    is asked for a new plan only when a step fails. If the final call still
+    asks for tools, the usual llm_call/tool_node loop takes over.
+
+    Args:
+        max_tool_workers: Maximum number of plan steps (or tool calls) to run at once
+        tool_timeout: Seconds to wait for tool calls (None waits forever)
+        fast_path: Answer plain arithmetic questions locally before calling the LLM
+        history_reducer: Compacts the history sent to the model (defaults to the process-wide reducer)
+        prompt_cache: Mark the system prompt and tools as cacheable for the answering call
+        router: Picks the model for the answering call (defaults to the process-wide router)
+        tool_executor: Runs each tool call, CPU-bound tools in a process pool (defaults to the process-wide one)
+        max_replans: Plans allowed after the first one in a turn
+    """
+    agent_builder = StateGraph(PlanState)
+
+    agent_builder.add_node("plan", create_planner_node(history_reducer, max_replans=max_replans))
+    agent_builder.add_node("execute", create_executor_node(max_tool_workers, tool_timeout, tool_executor))
+    agent_builder.add_node("llm_call", create_llm_node(history_reducer, prompt_cache, router))
+    agent_builder.add_node("tool_node", create_tool_node(max_tool_workers, tool_timeout, tool_executor))
+
+    if fast_path:
+        agent_builder.add_node("fast_path", create_fast_path_node())
+        agent_builder.add_edge(START, "fast_path")
+        agent_builder.add_conditional_edges(
+            "fast_path",
+            # Questions the fast path can't answer go to the planner
+            create_route_after_fast_path(),
+            {"llm_call": "plan", END: END}
+        )
+    else:
+        agent_builder.add_edge(START, "plan")
+    agent_builder.add_conditional_edges(
+        "plan", create_route_after_plan(max_replans), ["execute", "plan", "llm_call", END]
+    )
+    agent_builder.add_conditional_edges("execute", create_route_after_execute(max_replans), ["plan", "llm_call"])
+    agent_builder.add_conditional_edges("llm_call", create_should_continue(), ["tool_node", END])
+    agent_builder.add_edge("tool_node", "llm_call")
+
+    return agent_builder.compile()
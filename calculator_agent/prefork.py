@@ -0,0 +1,347 @@
+"""
+Pre-fork production server for web_app.
+
+The parent process imports web_app, compiles the agent and builds the model
+once, then forks the workers. The workers share those pages copy-on-write
+instead of each paying for the imports and compilation, and they all accept
+connections on one listening socket. The parent only supervises: it replaces
+workers that exit, recycles them after a number of requests or a maximum age,
+and shuts them down gracefully.
+
+Run it with:
+    python -m calculator_agent.prefork --workers 4 --port 8000
+
+Signals to the parent:
+    SIGTERM / SIGINT  stop: workers finish in-flight requests, then exit
+    SIGHUP            rolling restart: replace the workers one at a time
+    SIGUSR1           log each process's memory (PSS and private)
+"""
+import argparse
+import gc
+import logging
+import os
+import random
+import signal
+import socket
+import sys
+import time
+
+# web_app lives in the project root, next to this package
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+PARENT_DIR = os.path.dirname(PACKAGE_DIR)
+if PARENT_DIR not in sys.path:
+    sys.path.insert(0, PARENT_DIR)
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+# Requests a worker serves before it is replaced (0 never recycles), plus up to
+# this much random jitter so the workers don't all restart at once
+DEFAULT_MAX_REQUESTS = 10_000
+DEFAULT_MAX_REQUESTS_JITTER = 1_000
+
+# Seconds a stopping worker gets to finish its in-flight requests
+DEFAULT_GRACEFUL_TIMEOUT = 30
+
+logger = logging.getLogger("calculator_agent.prefork")
+
+def preload():
+    """
+    Import the app and build everything the workers share, before forking.
+
+    Nothing here may start a thread or open a connection: neither survives a
+    fork. The thread pools, process pool, session database and HTTP
+    connections are all created lazily, in each worker, on first use.
+
+    Returns:
+        The ASGI app
+    """
+    started = time.perf_counter()
+    import web_app
+
+    web_app.warm_up()
+    # Move everything loaded so far out of the collector's reach, so collections in
+    # the workers don't touch (and so copy) the shared pages
+    gc.collect()
+    gc.freeze()
+    logger.info("Preloaded app and agent in %.0f ms", (time.perf_counter() - started) * 1000)
+    return web_app.app
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """
+    Open the listening socket every worker accepts connections on.
+    """
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+def memory_kb(pid: int) -> dict | None:
+    """
+    Read a process's proportional (PSS) and private memory, in kB (Linux only).
+
+    PSS splits each shared page between the processes sharing it, so the PSS of
+    the parent and workers adds up to the memory they really use together.
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as smaps:
+            fields = dict(line.split(":", 1) for line in smaps if ":" in line)
+    except OSError:
+        return None
+
+    def value(name):
+        return int(fields.get(name, "0 kB").split()[0])
+
+    return {
+        "pss_kb": value("Pss"),
+        "private_kb": value("Private_Clean") + value("Private_Dirty"),
+        "rss_kb": value("Rss")
+    }
+
+class PreforkServer:
+    """
+    Supervises forked uvicorn workers that share a preloaded app and one socket.
+    """
+
+    def __init__(
+        self,
+        app,
+        sock: socket.socket,
+        workers: int = DEFAULT_WORKERS,
+        max_requests: int = DEFAULT_MAX_REQUESTS,
+        max_requests_jitter: int = DEFAULT_MAX_REQUESTS_JITTER,
+        max_worker_age: float | None = None,
+        graceful_timeout: int = DEFAULT_GRACEFUL_TIMEOUT,
+        log_level: str = "info"
+    ):
+        """
+        Args:
+            app: The preloaded ASGI app
+            sock: The bound listening socket
+            workers: Number of worker processes
+            max_requests: Requests before a worker is replaced (0 never recycles)
+            max_requests_jitter: Random extra requests per worker, to stagger recycling
+            max_worker_age: Seconds before a worker is replaced (None never recycles by age)
+            graceful_timeout: Seconds a stopping worker gets to finish its requests
+            log_level: uvicorn log level in the workers
+        """
+        self.app = app
+        self.sock = sock
+        self.workers = workers
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.max_worker_age = max_worker_age
+        self.graceful_timeout = graceful_timeout
+        self.log_level = log_level
+        self._children = {}  # pid -> (worker_id, started_at)
+        self._retiring = {}  # pid -> when it was asked to stop
+        self._next_worker_id = 0
+        self._stopping = False
+        self._rolling_restart = False
+        self._restart_requested = 0.0
+        self._log_memory = False
+        self.restarts = 0
+
+    def _run_worker(self, worker_id: int):
+        """
+        Serve requests in a forked worker until uvicorn exits (never returns).
+        """
+        import uvicorn
+
+        # uvicorn installs its own handlers for a graceful shutdown
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGUSR1):
+            signal.signal(signum, signal.SIG_DFL)
+        os.environ["AGENT_WORKER_ID"] = str(worker_id)
+        random.seed()
+        config = uvicorn.Config(
+            self.app,
+            lifespan="on",
+            log_level=self.log_level,
+            limit_max_requests=self.max_requests or None,
+            limit_max_requests_jitter=self.max_requests_jitter if self.max_requests else 0,
+            timeout_graceful_shutdown=self.graceful_timeout
+        )
+        code = 0
+        try:
+            uvicorn.Server(config).run(sockets=[self.sock])
+        except BaseException:
+            logger.exception("Worker %d crashed", worker_id)
+            code = 1
+        finally:
+            os._exit(code)
+
+    def spawn(self) -> int:
+        """
+        Fork one new worker.
+
+        Returns:
+            int: The worker's pid
+        """
+        worker_id = self._next_worker_id
+        self._next_worker_id += 1
+        pid = os.fork()
+        if pid == 0:
+            self._run_worker(worker_id)
+        self._children[pid] = (worker_id, time.monotonic())
+        logger.info("Started worker %d (pid %d)", worker_id, pid)
+        return pid
+
+    def retire(self, pid: int):
+        """
+        Ask a worker to finish its in-flight requests and exit.
+        """
+        if pid in self._children and pid not in self._retiring:
+            self._retiring[pid] = time.monotonic()
+            os.kill(pid, signal.SIGTERM)
+
+    def _reap(self):
+        """
+        Collect exited workers and replace the ones that weren't meant to stop.
+        """
+        while self._children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            worker_id, _ = self._children.pop(pid, (None, None))
+            retired = self._retiring.pop(pid, None) is not None
+            logger.info("Worker %s (pid %d) exited with status %d", worker_id, pid, os.waitstatus_to_exitcode(status))
+            if not self._stopping and not retired:
+                # Crashed, or recycled itself after max_requests
+                self.restarts += 1
+                self.spawn()
+
+    def _recycle(self):
+        """
+        Replace workers past max_worker_age and step through a rolling restart.
+
+        A replacement is started before the old worker is told to stop, so
+        capacity never drops below the configured number of workers.
+        """
+        now = time.monotonic()
+        # Workers that ignore SIGTERM past the grace period are killed, so a
+        # rolling restart waiting on them can move on
+        for pid, asked in list(self._retiring.items()):
+            if now - asked > self.graceful_timeout + 5:
+                os.kill(pid, signal.SIGKILL)
+        active = [pid for pid in self._children if pid not in self._retiring]
+        if self._rolling_restart:
+            # One worker at a time, oldest first, among those started before the restart
+            older = [pid for pid in active if self._children[pid][1] < self._restart_requested]
+            if not older:
+                self._rolling_restart = False
+            elif not self._retiring:
+                self.spawn()
+                self.retire(min(older, key=lambda pid: self._children[pid][1]))
+            return
+        if self.max_worker_age is not None:
+            for pid in active:
+                if now - self._children[pid][1] > self.max_worker_age and not self._retiring:
+                    self.restarts += 1
+                    self.spawn()
+                    self.retire(pid)
+
+    def memory_report(self) -> dict:
+        """
+        Get the memory of the parent and every worker.
+
+        Returns:
+            dict: pid -> memory_kb() for the parent ("parent") and each worker
+        """
+        report = {"parent": memory_kb(os.getpid())}
+        for pid, (worker_id, _) in self._children.items():
+            report[f"worker {worker_id} (pid {pid})"] = memory_kb(pid)
+        return report
+
+    def _install_signals(self):
+        """
+        Route the control signals to flags the supervision loop acts on.
+        """
+        def stop(signum, frame):
+            self._stopping = True
+
+        def rolling_restart(signum, frame):
+            self._rolling_restart = True
+            self._restart_requested = time.monotonic()
+
+        def log_memory(signum, frame):
+            self._log_memory = True
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGHUP, rolling_restart)
+        signal.signal(signal.SIGUSR1, log_memory)
+
+    def run(self):
+        """
+        Start the workers and supervise them until stopped.
+        """
+        self._install_signals()
+        for _ in range(self.workers):
+            self.spawn()
+        while not self._stopping:
+            self._reap()
+            self._recycle()
+            if self._log_memory:
+                self._log_memory = False
+                for name, memory in self.memory_report().items():
+                    logger.info("Memory of %s: %s", name, memory)
+            time.sleep(0.2)
+        self.shutdown()
+
+    def shutdown(self):
+        """
+        Stop every worker gracefully, killing those still running after the grace period.
+        """
+        logger.info("Stopping %d workers", len(self._children))
+        for pid in list(self._children):
+            self.retire(pid)
+        deadline = time.monotonic() + self.graceful_timeout
+        while self._children and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        for pid in list(self._children):
+            os.kill(pid, signal.SIGKILL)
+        while self._children:
+            pid, _ = os.waitpid(-1, 0)
+            self._children.pop(pid, None)
+        self.sock.close()
+
+def main(argv=None):
+    """
+    Command-line entry point: preload the app, fork the workers and supervise them.
+    """
+    parser = argparse.ArgumentParser(description="Serve web_app with pre-forked workers sharing a preloaded agent")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="worker processes")
+    parser.add_argument("--max-requests", type=int, default=DEFAULT_MAX_REQUESTS,
+                        help="requests before a worker is replaced (0 never)")
+    parser.add_argument("--max-requests-jitter", type=int, default=DEFAULT_MAX_REQUESTS_JITTER)
+    parser.add_argument("--max-worker-age", type=float, help="seconds before a worker is replaced")
+    parser.add_argument("--graceful-timeout", type=int, default=DEFAULT_GRACEFUL_TIMEOUT,
+                        help="seconds a stopping worker gets to finish its requests")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s [prefork] %(message)s")
+    sock = bind_socket(args.host, args.port)
+    server = PreforkServer(
+        preload(),
+        sock,
+        workers=args.workers,
+        max_requests=args.max_requests,
+        max_requests_jitter=args.max_requests_jitter,
+        max_worker_age=args.max_worker_age,
+        graceful_timeout=args.graceful_timeout,
+        log_level=args.log_level
+    )
+    logger.info("Listening on %s:%d with %d workers", args.host, args.port, args.workers)
+    server.run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessage, message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration
+
+# Default size cap of the on-disk cache
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Rows evicted past the cap at a time, so a full cache isn't trimmed on every write
+EVICTION_SLACK = 0.1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+"""
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    """
+    Hash a serialized prompt and model description into a fixed-size key.
+
+    llm_string is LangChain's description of the model call: the model class and
+    its settings (model name, temperature) plus the call's bound kwargs, which
+    include the tool schemas. So a key changes whenever the model, the tools or
+    any message changes.
+    """
+    digest = hashlib.sha256()
+    digest.update(llm_string.encode())
+    digest.update(b"\0")
+    digest.update(prompt.encode())
+    return digest.hexdigest()
+
+class SQLiteResponseCache(BaseCache):
+    """
+    Persistent LRU cache of chat-model responses in a SQLite file.
+
+    Plugs into LangChain as a model's `cache`, so every invoke() of the model
+    checks it before calling the API. The file survives restarts and can be
+    shared by several worker processes: each process opens its own connection
+    and SQLite's locking (WAL mode) serializes the writes. When the file holds
+    more than max_bytes of responses, the least recently used are evicted.
+    """
+
+    def __init__(self, path: str = "llm_cache.db", max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            path: SQLite database file (":memory:" for a throwaway cache)
+            max_bytes: Approximate cap on the size of the stored responses
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self._connection = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Open the database on first use, and again in a forked child process.
+        """
+        if self._connection is None or self._pid != os.getpid():
+            # A connection must not be shared with the parent after a fork
+            connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=5.0)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+            self._pid = os.getpid()
+        return self._connection
+
+    def lookup(self, prompt: str, llm_string: str) -> list[ChatGeneration] | None:
+        """
+        Get the cached generations for a prompt and model, marking them recently used.
+        """
+        key = cache_key(prompt, llm_string)
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute("SELECT data FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            connection.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+        entries = json.loads(row[0])
+        messages = messages_from_dict([entry["message"] for entry in entries])
+        return [
+            ChatGeneration(message=message, generation_info=entry["generation_info"])
+            for message, entry in zip(messages, entries)
+        ]
+
+    def update(self, prompt: str, llm_string: str, return_val: list):
+        """
+        Store the generations for a prompt and model, evicting old entries when over the cap.
+        """
+        if not all(isinstance(generation, ChatGeneration) for generation in return_val):
+            return
+        data = json.dumps([
+            {"message": message_to_dict(generation.message), "generation_info": generation.generation_info}
+            for generation in return_val
+        ])
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute(
+                    "INSERT OR REPLACE INTO responses (key, data, size, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                    (cache_key(prompt, llm_string), data, len(data), now, now)
+                )
+                self._evict(connection)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            self.writes += 1
+
+    def _evict(self, connection: sqlite3.Connection):
+        """
+        Drop least recently used entries until the cache is back under the cap (lock held).
+        """
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * (1 - EVICTION_SLACK)
+        evicted = []
+        for key, size in connection.execute("SELECT key, size FROM responses ORDER BY last_used"):
+            if total <= target:
+                break
+            evicted.append((key,))
+            total -= size
+        connection.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        self.evictions += len(evicted)
+
+    def clear(self, **kwargs):
+        """
+        Delete every cached response.
+        """
+        with self._lock:
+            self._connect().execute("DELETE FROM responses")
+
+    def stats(self) -> dict:
+        """
+        Get this process's hit counts and the size of the shared cache file.
+
+        Returns:
+            dict: Hits, misses, writes, evictions, hit rate, entries and bytes
+        """
+        with self._lock:
+            entries, size = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "path": self.path,
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": entries,
+                "bytes": size,
+                "max_bytes": self.max_bytes
+            }
+
+def _cache_call(model_with_tools, prompt):
+    """
+    Get a model's response cache and the (prompt, llm_string) LangChain would key the call by.
+
+    Returns:
+        tuple | None: (cache, prompt, llm_string), or None when the model has no cache
+    """
+    # model.bind_tools() returns a RunnableBinding around the chat model
+    model = getattr(model_with_tools, "bound", model_with_tools)
+    cache = getattr(model, "cache", None)
+    if not isinstance(cache, BaseCache):
+        return None
+    kwargs = getattr(model_with_tools, "kwargs", {})
+    messages = [
+        message.model_copy(update={"id": None}) if message.id is not None else message
+        for message in model._convert_input(prompt).to_messages()
+    ]
+    return cache, dumps(messages), model._get_llm_string(stop=None, **kwargs)
+
+def cached_response(model_with_tools, prompt) -> AIMessage | None:
+    """
+    Look a call up in its model's response cache without calling the model.
+
+    invoke() checks the cache itself, but stream() doesn't; streaming callers
+    use this (and store_response) to share the same entries.
+    """
+    call = _cache_call(model_with_tools, prompt)
+    if call is None:
+        return None
+    cache, prompt_string, llm_string = call
+    generations = cache.lookup(prompt_string, llm_string)
+    return generations[0].message if generations else None
+
+def store_response(model_with_tools, prompt, response: AIMessage):
+    """
+    Store a streamed response in its model's response cache.
+    """
+    call = _cache_call(model_with_tools, prompt)
+    if call is not None:
+        cache, prompt_string, llm_string = call
+        cache.update(prompt_string, llm_string, [ChatGeneration(message=response)])
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+def get_response_cache() -> SQLiteResponseCache | None:
+    """
+    Get the process-wide response cache, or None when it is switched off.
+
+    Set AGENT_LLM_CACHE to a database path to turn it on; AGENT_LLM_CACHE_MAX_MB
+    sets its size cap.
+    """
+    global _default_cache
+    with _default_lock:
+        path = os.environ.get("AGENT_LLM_CACHE")
+        if _default_cache is None and path:
+            _default_cache = SQLiteResponseCache(
+                path=path,
+                max_bytes=int(float(os.environ.get("AGENT_LLM_CACHE_MAX_MB", DEFAULT_MAX_BYTES / 2**20)) * 2**20)
+            )
+        return _default_cache
+
+def set_response_cache(cache: SQLiteResponseCache | None):
+    """
+    Replace the process-wide response cache used by models built afterwards.
+    """
+    global _default_cache
+    with _default_lock:
+        _default_cache = cache
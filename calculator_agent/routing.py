@@ -0,0 +1,324 @@
+import os
+import re
+import threading
+import time
+
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage, ToolMessage
+
+from .model import DEFAULT_MODEL_NAME, get_model
+from .history import message_text
+from .budget import ainvoke_with_deadline, invoke_with_deadline
+from .speculation import Speculation, SpeculativeModel
+
+# Smaller, faster model used for turns that pass the simple-case checks
+DEFAULT_FAST_MODEL_NAME = "anthropic:claude-haiku-4-5"
+
+# A question is "simple" if it is short and mentions only a handful of numbers
+SIMPLE_MAX_CHARS = 200
+SIMPLE_MIN_NUMBERS = 2
+SIMPLE_MAX_NUMBERS = 4
+
+# A final answer is "simple" if it follows one round of at most this many tool calls
+SIMPLE_MAX_TOOL_CALLS = 2
+
+ROUTES = ("tool_selection", "final_answer", "default")
+
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+
+def current_turn(messages: list[AnyMessage]) -> list[AnyMessage]:
+    """
+    Get the messages of the current turn, starting at the latest HumanMessage.
+    """
+    for index in range(len(messages) - 1, -1, -1):
+        if isinstance(messages[index], HumanMessage):
+            return messages[index:]
+    return messages
+
+def classify_turn(messages: list[AnyMessage]) -> str:
+    """
+    Decide which route a model call belongs to.
+
+    Returns:
+        str: "tool_selection" for a simple new question, "final_answer" for
+        restating the result of one simple round of tool calls, else "default"
+    """
+    turn = current_turn(messages)
+    if not turn or not isinstance(turn[0], HumanMessage):
+        return "default"
+
+    if len(turn) == 1:
+        question = message_text(turn[0])
+        numbers = len(_NUMBER.findall(question))
+        if len(question) <= SIMPLE_MAX_CHARS and SIMPLE_MIN_NUMBERS <= numbers <= SIMPLE_MAX_NUMBERS:
+            return "tool_selection"
+        return "default"
+
+    # One round of tool calls whose results all came back cleanly
+    tool_rounds = [message for message in turn if isinstance(message, AIMessage) and message.tool_calls]
+    results = [message for message in turn if isinstance(message, ToolMessage)]
+    if (
+        isinstance(turn[-1], ToolMessage)
+        and len(tool_rounds) == 1
+        and len(tool_rounds[0].tool_calls) <= SIMPLE_MAX_TOOL_CALLS
+        and all(message.status != "error" for message in results)
+    ):
+        return "final_answer"
+    return "default"
+
+def _mentions(text: str, result: str) -> bool:
+    """
+    Check whether an answer states a tool result (7.0 also matches "7").
+    """
+    if result in text:
+        return True
+    try:
+        value = float(result)
+    except ValueError:
+        return False
+    return value.is_integer() and str(int(value)) in text.replace(",", "")
+
+def malformed_tool_call(response: AIMessage, tools_by_name: dict) -> bool:
+    """
+    Check a response for tool calls that couldn't be parsed or don't fit a tool's schema.
+    """
+    if getattr(response, "invalid_tool_calls", None):
+        return True
+    for tool_call in response.tool_calls:
+        tool = tools_by_name.get(tool_call["name"])
+        if tool is None:
+            return True
+        try:
+            tool.args_schema.model_validate(tool_call["args"])
+        except Exception:
+            return True
+    return False
+
+def escalation_reason(route: str, messages: list[AnyMessage], response: AIMessage, tools_by_name: dict) -> str | None:
+    """
+    Decide whether a fast-model response should be redone by the default model.
+
+    Returns:
+        str | None: "malformed_tool_call", "low_confidence" or None to keep the response
+    """
+    if malformed_tool_call(response, tools_by_name):
+        return "malformed_tool_call"
+    if response.response_metadata.get("stop_reason") == "max_tokens":
+        return "low_confidence"
+    if route == "tool_selection" and not response.tool_calls:
+        # A simple arithmetic question should be answered with a tool
+        return "low_confidence"
+    if route == "final_answer":
+        if response.tool_calls:
+            # Wanting more tools means the question wasn't as simple as it looked
+            return "low_confidence"
+        results = [message_text(message) for message in current_turn(messages) if isinstance(message, ToolMessage)]
+        if not any(_mentions(message_text(response), result) for result in results):
+            return "low_confidence"
+    return None
+
+def parse_routes(spec: str | None, fast_model: str = DEFAULT_FAST_MODEL_NAME) -> dict:
+    """
+    Build a routing table from a spec string.
+
+    Args:
+        spec: Comma-separated "route=model" overrides, e.g.
+            "tool_selection=anthropic:claude-haiku-4-5,final_answer=anthropic:claude-sonnet-4-5"
+        fast_model: Model for the simple routes when the spec doesn't name one
+
+    Returns:
+        dict: route -> model name for every route in ROUTES
+    """
+    routes = {"tool_selection": fast_model, "final_answer": fast_model, "default": DEFAULT_MODEL_NAME}
+    for item in (spec or "").split(","):
+        if not item.strip():
+            continue
+        route, _, model_name = item.partition("=")
+        route = route.strip()
+        if route not in ROUTES or not model_name.strip():
+            raise ValueError(f"Invalid model route: {item!r}")
+        routes[route] = model_name.strip()
+    return routes
+
+class ModelRouter:
+    """
+    Sends each model call to the model for its route, escalating doubtful answers.
+
+    Simple tool-selection and final-answer turns go to a smaller, faster model.
+    When its response has malformed tool calls or looks unreliable, the same
+    prompt is sent to the default model instead. A disabled router sends every
+    call to the default model.
+    """
+
+    def __init__(self, routes: dict | None = None, enabled: bool = True):
+        """
+        Args:
+            routes: route -> model name (see parse_routes); missing routes use the default model
+            enabled: Route calls at all (False sends everything to routes["default"])
+        """
+        self.routes = {route: DEFAULT_MODEL_NAME for route in ROUTES}
+        self.routes.update(routes or {})
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._calls = {}  # model -> {"calls", "total_ms", "input_tokens", "output_tokens"}
+        self._routed = {route: 0 for route in ROUTES}
+        self._escalations = {}
+
+    def choose(self, messages: list[AnyMessage]) -> tuple[str, str]:
+        """
+        Pick the route and model for a model call.
+
+        Returns:
+            tuple: (route, model_name)
+        """
+        route = classify_turn(messages) if self.enabled else "default"
+        return route, self.routes[route]
+
+    def _record(self, model_name: str, started: float, response):
+        """
+        Count one call to a model and its latency and token usage.
+        """
+        usage = getattr(response, "usage_metadata", None) or {}
+        with self._lock:
+            entry = self._calls.setdefault(
+                model_name, {"calls": 0, "total_ms": 0.0, "input_tokens": 0, "output_tokens": 0}
+            )
+            entry["calls"] += 1
+            entry["total_ms"] += (time.perf_counter() - started) * 1000
+            entry["input_tokens"] += usage.get("input_tokens", 0)
+            entry["output_tokens"] += usage.get("output_tokens", 0)
+
+    def _note_route(self, route: str, escalation: str | None):
+        """
+        Count one routed call and the reason it was escalated, if it was.
+        """
+        with self._lock:
+            self._routed[route] += 1
+            if escalation:
+                self._escalations[escalation] = self._escalations.get(escalation, 0) + 1
+
+    @staticmethod
+    def _runnable(model_name: str, speculation: Speculation | None):
+        """
+        Get a model with tools, wrapped to stream and speculate when a Speculation is given.
+        """
+        _, model_with_tools, tools_by_name = get_model(model_name)
+        if speculation is not None:
+            model_with_tools = SpeculativeModel(model_with_tools, speculation)
+        return model_with_tools, tools_by_name
+
+    def invoke(
+        self, prompt: list[AnyMessage], budget=None, speculation: Speculation | None = None
+    ) -> tuple[AIMessage, int]:
+        """
+        Call the routed model (and the default model if the answer is escalated).
+
+        An escalation is a second model call, so it is reserved from the budget
+        first. If none is left, the fast model's response is kept.
+
+        Args:
+            prompt: The full prompt, including the system message
+            budget: The run's budget; its deadline also bounds an escalated call
+            speculation: Start tool calls while the response streams (see speculation.py)
+
+        Returns:
+            tuple: The response to keep and the number of model calls made (1 or 2)
+        """
+        route, model_name = self.choose(prompt)
+        model_with_tools, tools_by_name = self._runnable(model_name, speculation)
+        started = time.perf_counter()
+        response = invoke_with_deadline(model_with_tools, prompt, budget)
+        self._record(model_name, started, response)
+
+        reason = None
+        if model_name != self.routes["default"]:
+            reason = escalation_reason(route, prompt, response, tools_by_name)
+        self._note_route(route, reason)
+        if reason is None or (budget is not None and not budget.start_llm_call()):
+            return response, 1
+
+        model_with_tools, _ = self._runnable(self.routes["default"], speculation)
+        started = time.perf_counter()
+        response = invoke_with_deadline(model_with_tools, prompt, budget)
+        self._record(self.routes["default"], started, response)
+        return response, 2
+
+    async def ainvoke(
+        self, prompt: list[AnyMessage], budget=None, speculation: Speculation | None = None
+    ) -> tuple[AIMessage, int]:
+        """
+        Async version of invoke.
+        """
+        route, model_name = self.choose(prompt)
+        model_with_tools, tools_by_name = self._runnable(model_name, speculation)
+        started = time.perf_counter()
+        response = await ainvoke_with_deadline(model_with_tools, prompt, budget)
+        self._record(model_name, started, response)
+
+        reason = None
+        if model_name != self.routes["default"]:
+            reason = escalation_reason(route, prompt, response, tools_by_name)
+        self._note_route(route, reason)
+        if reason is None or (budget is not None and not budget.start_llm_call()):
+            return response, 1
+
+        model_with_tools, _ = self._runnable(self.routes["default"], speculation)
+        started = time.perf_counter()
+        response = await ainvoke_with_deadline(model_with_tools, prompt, budget)
+        self._record(self.routes["default"], started, response)
+        return response, 2
+
+    def stats(self) -> dict:
+        """
+        Get the routing table and per-model usage.
+
+        Returns:
+            dict: Whether routing is on, the table, calls per route, escalations
+            by reason, and calls, mean latency and tokens per model
+        """
+        with self._lock:
+            models = {
+                name: {**entry, "total_ms": round(entry["total_ms"], 3),
+                       "mean_ms": round(entry["total_ms"] / entry["calls"], 3)}
+                for name, entry in self._calls.items()
+            }
+            return {
+                "enabled": self.enabled,
+                "routes": dict(self.routes),
+                "routed": dict(self._routed),
+                "escalations": dict(self._escalations),
+                "models": models
+            }
+
+def routing_enabled() -> bool:
+    """
+    Check whether model routing is switched on via AGENT_MODEL_ROUTING.
+    """
+    return os.environ.get("AGENT_MODEL_ROUTING", "").lower() in ("1", "true", "yes", "on")
+
+_default_router = None
+_default_lock = threading.Lock()
+
+def get_default_router() -> ModelRouter:
+    """
+    Get the process-wide router, configured on first use.
+
+    AGENT_MODEL_ROUTING turns routing on, AGENT_FAST_MODEL picks the fast model
+    and AGENT_MODEL_ROUTES overrides individual routes (see parse_routes).
+    """
+    global _default_router
+    with _default_lock:
+        if _default_router is None:
+            fast_model = os.environ.get("AGENT_FAST_MODEL", DEFAULT_FAST_MODEL_NAME)
+            _default_router = ModelRouter(
+                parse_routes(os.environ.get("AGENT_MODEL_ROUTES"), fast_model),
+                enabled=routing_enabled()
+            )
+        return _default_router
+
+def set_default_router(router: ModelRouter):
+    """
+    Replace the process-wide router used by agents that weren't given one explicitly.
+    """
+    global _default_router
+    with _default_lock:
+        _default_router = router
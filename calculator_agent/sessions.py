@@ -0,0 +1,219 @@
+import json
+import sqlite3
+import threading
+import time
+
+from langchain_core.messages import AnyMessage
+
+from .state import MessageRecord, to_records
+
+# How often (in seconds) idle sessions are swept out while the store is in use
+EVICTION_INTERVAL = 60.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    thread_id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    start_seq INTEGER NOT NULL DEFAULT 0,
+    next_seq INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS sessions_last_used ON sessions (last_used);
+CREATE TABLE IF NOT EXISTS messages (
+    thread_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (thread_id, seq)
+) WITHOUT ROWID;
+"""
+
+class SessionStore:
+    """
+    Persists the message history of thread_id-scoped conversations in SQLite.
+
+    Messages are stored one row each, as compact records (see state.py), and
+    only ever appended, so saving a step writes just that step's new messages
+    rather than the whole conversation.
+    Long sessions are trimmed at turn boundaries to max_messages, and sessions
+    idle for longer than ttl_seconds are evicted.
+    """
+
+    def __init__(self, path: str = "sessions.db", ttl_seconds: float = 3600.0, max_messages: int = 200):
+        """
+        Args:
+            path: SQLite database file (":memory:" for a throwaway store)
+            ttl_seconds: Idle time after which a session is deleted
+            max_messages: Most messages kept (and loaded) per session
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_messages = max_messages
+        self._connection = None
+        self._lock = threading.Lock()
+        self._last_eviction = 0.0
+        self.evictions = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Open the database on first use.
+        """
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def load(self, thread_id: str) -> list[MessageRecord]:
+        """
+        Load a session's messages as records, oldest first (empty for a new or expired session).
+
+        Rows saved as LangChain message dicts by earlier versions are converted too.
+        """
+        with self._lock:
+            connection = self._connect()
+            self._maybe_evict(connection)
+            row = connection.execute(
+                "SELECT start_seq, last_used FROM sessions WHERE thread_id = ?", (thread_id,)
+            ).fetchone()
+            if row is None:
+                return []
+            if row[1] < time.time() - self.ttl_seconds:
+                # Expired but not swept yet: drop it and start fresh
+                connection.execute("DELETE FROM messages WHERE thread_id = ?", (thread_id,))
+                connection.execute("DELETE FROM sessions WHERE thread_id = ?", (thread_id,))
+                self.evictions += 1
+                return []
+            connection.execute(
+                "UPDATE sessions SET last_used = ? WHERE thread_id = ?", (time.time(), thread_id)
+            )
+            rows = connection.execute(
+                "SELECT data FROM messages WHERE thread_id = ? AND seq >= ? ORDER BY seq",
+                (thread_id, row[0])
+            ).fetchall()
+        return [MessageRecord.from_dict(json.loads(data)) for (data,) in rows]
+
+    def append(self, thread_id: str, messages: list[MessageRecord | AnyMessage]) -> int:
+        """
+        Append messages (records or LangChain messages) to a session, creating it if needed.
+
+        Returns:
+            int: The session's next sequence number, usable as a rollback point
+        """
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute(
+                    "INSERT OR IGNORE INTO sessions (thread_id, created_at, last_used) VALUES (?, ?, ?)",
+                    (thread_id, now, now)
+                )
+                start_seq, next_seq = connection.execute(
+                    "SELECT start_seq, next_seq FROM sessions WHERE thread_id = ?", (thread_id,)
+                ).fetchone()
+                connection.executemany(
+                    "INSERT INTO messages (thread_id, seq, type, data) VALUES (?, ?, ?, ?)",
+                    [
+                        (thread_id, next_seq + offset, data["type"], json.dumps(data))
+                        for offset, data in enumerate(record.to_dict() for record in to_records(messages))
+                    ]
+                )
+                next_seq += len(messages)
+                start_seq = self._trim(connection, thread_id, start_seq, next_seq)
+                connection.execute(
+                    "UPDATE sessions SET last_used = ?, start_seq = ?, next_seq = ? WHERE thread_id = ?",
+                    (now, start_seq, next_seq, thread_id)
+                )
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        return next_seq
+
+    def _trim(self, connection: sqlite3.Connection, thread_id: str, start_seq: int, next_seq: int) -> int:
+        """
+        Drop the oldest turns so at most max_messages remain; returns the new start.
+        """
+        if next_seq - start_seq <= self.max_messages:
+            return start_seq
+        # Cut at the first question that keeps us under the bound, so no turn is split
+        row = connection.execute(
+            "SELECT MIN(seq) FROM messages WHERE thread_id = ? AND seq >= ? AND type = 'human'",
+            (thread_id, next_seq - self.max_messages)
+        ).fetchone()
+        if row[0] is None:
+            return start_seq
+        connection.execute("DELETE FROM messages WHERE thread_id = ? AND seq < ?", (thread_id, row[0]))
+        return row[0]
+
+    def rollback(self, thread_id: str, next_seq: int):
+        """
+        Remove everything appended to a session after next_seq (e.g. after a failed run).
+        """
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute("DELETE FROM messages WHERE thread_id = ? AND seq >= ?", (thread_id, next_seq))
+            connection.execute(
+                "UPDATE sessions SET next_seq = MAX(start_seq, ?) WHERE thread_id = ?", (next_seq, thread_id)
+            )
+            connection.execute("COMMIT")
+
+    def delete(self, thread_id: str):
+        """
+        Delete a session and all of its messages.
+        """
+        with self._lock:
+            connection = self._connect()
+            connection.execute("DELETE FROM messages WHERE thread_id = ?", (thread_id,))
+            connection.execute("DELETE FROM sessions WHERE thread_id = ?", (thread_id,))
+
+    def evict_expired(self) -> int:
+        """
+        Delete every session idle for longer than the TTL.
+
+        Returns:
+            int: Number of sessions evicted
+        """
+        with self._lock:
+            return self._evict(self._connect())
+
+    def _maybe_evict(self, connection: sqlite3.Connection):
+        """
+        Sweep idle sessions at most once per EVICTION_INTERVAL.
+        """
+        if time.monotonic() - self._last_eviction >= EVICTION_INTERVAL:
+            self._evict(connection)
+
+    def _evict(self, connection: sqlite3.Connection) -> int:
+        """
+        Delete idle sessions using an already-held lock.
+        """
+        self._last_eviction = time.monotonic()
+        cutoff = time.time() - self.ttl_seconds
+        expired = [
+            thread_id for (thread_id,) in connection.execute(
+                "SELECT thread_id FROM sessions WHERE last_used < ?", (cutoff,)
+            )
+        ]
+        for thread_id in expired:
+            connection.execute("DELETE FROM messages WHERE thread_id = ?", (thread_id,))
+            connection.execute("DELETE FROM sessions WHERE thread_id = ?", (thread_id,))
+        self.evictions += len(expired)
+        return len(expired)
+
+    def stats(self) -> dict:
+        """
+        Get the number of stored sessions and messages.
+
+        Returns:
+            dict: Sessions, messages and evictions so far
+        """
+        with self._lock:
+            connection = self._connect()
+            sessions = connection.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+            messages = connection.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+        return {"sessions": sessions, "messages": messages, "evictions": self.evictions}
@@ -0,0 +1,244 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from langchain_core.messages import AIMessage, AIMessageChunk, message_chunk_to_message
+
+from .metrics import SPECULATIVE_TIME_SAVED, SPECULATIVE_TOOL_CALLS
+from .tool_executor import get_tool_executor
+from .response_cache import cached_response, store_response
+from .budget import current_budget
+
+# Confirmed results not picked up by a tool node within this many seconds are dropped
+SPECULATION_TTL = 300.0
+
+def speculative_tools_enabled() -> bool:
+    """
+    Check whether speculative tool execution is switched on via AGENT_SPECULATIVE_TOOLS (default off).
+    """
+    return os.environ.get("AGENT_SPECULATIVE_TOOLS", "").lower() in ("1", "true", "yes", "on")
+
+def completed_tool_calls(message: AIMessageChunk) -> list[dict]:
+    """
+    Get the tool calls of a partially streamed message whose arguments are complete.
+
+    A call's arguments arrive as a growing JSON string; they are complete once
+    the string parses as a JSON object, since no proper prefix of an object does.
+    """
+    calls = []
+    for chunk in message.tool_call_chunks:
+        if not chunk.get("id") or not chunk.get("name") or not chunk.get("args"):
+            continue
+        try:
+            args = json.loads(chunk["args"])
+        except ValueError:
+            continue
+        if isinstance(args, dict):
+            calls.append({"name": chunk["name"], "args": args, "id": chunk["id"]})
+    return calls
+
+def _same_call(a: dict, b: dict) -> bool:
+    """
+    Check whether two tool calls have the same id, tool and arguments.
+    """
+    return a["id"] == b["id"] and a["name"] == b["name"] and a["args"] == b["args"]
+
+class _ConfirmedResults:
+    """
+    Speculative results confirmed by the final message, waiting for a tool node to claim them.
+    """
+
+    def __init__(self):
+        self._entries = {}  # tool_call_id -> (tool_call, future, stored_at)
+        self._lock = threading.Lock()
+
+    def add(self, tool_call: dict, future: Future):
+        """
+        Store a confirmed call's future until a tool node claims it.
+        """
+        now = time.monotonic()
+        with self._lock:
+            # Drop results nobody claimed, e.g. because the run's budget skipped the tool node
+            for call_id in [key for key, entry in self._entries.items() if now - entry[2] > SPECULATION_TTL]:
+                del self._entries[call_id]
+            self._entries[tool_call["id"]] = (tool_call, future, now)
+
+    def claim(self, tool_call: dict) -> Future | None:
+        """
+        Remove and return the future for a tool call, if it matches a stored one.
+        """
+        with self._lock:
+            entry = self._entries.pop(tool_call["id"], None)
+        if entry is None or not _same_call(entry[0], tool_call):
+            return None
+        return entry[1]
+
+_CONFIRMED = _ConfirmedResults()
+
+# Runs speculative tool calls; CPU-bound ones are handed on to the tool executor's process pool
+_speculation_executor = None
+_executor_lock = threading.Lock()
+
+def _get_speculation_executor() -> ThreadPoolExecutor:
+    """
+    Create the shared executor for speculative tool calls on first use.
+    """
+    global _speculation_executor
+    with _executor_lock:
+        if _speculation_executor is None:
+            _speculation_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="speculation")
+        return _speculation_executor
+
+def claim_speculative_result(tool_call: dict) -> Future | None:
+    """
+    Take the speculative result for a tool call, if one was started and confirmed.
+
+    Returns:
+        Future | None: Resolves to the tool's output (or raises its error)
+    """
+    return _CONFIRMED.claim(tool_call)
+
+def discard_speculative_results(tool_calls: list[dict]):
+    """
+    Drop the speculative results of tool calls that won't be run (e.g. skipped by the budget).
+    """
+    for tool_call in tool_calls:
+        future = _CONFIRMED.claim(tool_call)
+        if future is not None:
+            future.cancel()
+
+class Speculation:
+    """
+    Starts tool calls while the model is still streaming, and keeps the confirmed ones.
+
+    Each call starts as soon as its arguments are complete in the stream. When
+    the final message arrives, calls it contains with the same id, tool and
+    arguments are kept for the tool node; all others are discarded. The tools
+    are pure functions, so running a discarded call has no side effects.
+
+    A call is only started if the run's budget would still grant it (counting
+    the calls already started), so a run out of tool calls or time doesn't
+    run them speculatively either.
+    """
+
+    def __init__(self, api: str):
+        """
+        Args:
+            api: "graph" or "functional", used as the metrics label
+        """
+        self.api = api
+        self.budget = current_budget()
+        self._calls = {}  # tool_call_id -> (tool_call, future, started)
+
+    def start(self, tool_call: dict):
+        """
+        Start a tool call whose arguments have finished streaming (once per call id, within the budget).
+        """
+        if tool_call["id"] in self._calls:
+            return
+        # The tool node grants calls in the order they stream, so these are the first it would grant
+        if self.budget is not None and not self.budget.can_run_tools(len(self._calls) + 1):
+            return
+        tool_executor = get_tool_executor()
+        future = _get_speculation_executor().submit(tool_executor.invoke, tool_call["name"], tool_call["args"])
+        self._calls[tool_call["id"]] = (tool_call, future, time.perf_counter())
+
+    def finish(self, response: AIMessage | None):
+        """
+        Keep the calls the final message confirms and discard the rest.
+
+        Args:
+            response: The final model response (None discards every call)
+        """
+        stream_ended = time.perf_counter()
+        final_calls = {tool_call["id"]: tool_call for tool_call in (response.tool_calls if response else [])}
+        confirmed = []
+        for call_id, (tool_call, future, started) in self._calls.items():
+            final_call = final_calls.get(call_id)
+            if final_call is not None and _same_call(tool_call, final_call):
+                _CONFIRMED.add(final_call, future)
+                confirmed.append((future, started))
+                SPECULATIVE_TOOL_CALLS.inc(api=self.api, outcome="confirmed")
+            else:
+                future.cancel()
+                SPECULATIVE_TOOL_CALLS.inc(api=self.api, outcome="discarded")
+        self._calls = {}
+        if confirmed:
+            self._record_saving(confirmed, stream_ended)
+
+    def _record_saving(self, confirmed: list, stream_ended: float):
+        """
+        Once every confirmed call is done, record how much of the tool phase the turn skipped.
+
+        Run after the stream, the calls would take as long as the slowest one;
+        with speculation the turn only waits for whatever is still running when
+        the stream ends.
+        """
+        finished = {}
+        lock = threading.Lock()
+
+        def on_done(done: Future):
+            with lock:
+                finished[done] = time.perf_counter()
+                if len(finished) < len(confirmed):
+                    return
+            slowest = max(finished[future] - started for future, started in confirmed)
+            still_running = max(finished[future] - stream_ended for future, _ in confirmed)
+            SPECULATIVE_TIME_SAVED.observe(max(0.0, slowest - max(0.0, still_running)), api=self.api)
+
+        for future, _ in confirmed:
+            future.add_done_callback(on_done)
+
+class SpeculativeModel:
+    """
+    Wraps a chat model so invoke() streams the response and speculates on its tool calls.
+    """
+
+    def __init__(self, model, speculation: Speculation):
+        self.model = model
+        self.speculation = speculation
+
+    def _add_chunk(self, message, chunk):
+        """
+        Merge a streamed chunk into the message so far and start any newly completed tool calls.
+
+        Models without streaming support yield one whole AIMessage, which has nothing to speculate on.
+        """
+        if not isinstance(chunk, AIMessageChunk):
+            return chunk
+        message = chunk if message is None else message + chunk
+        for tool_call in completed_tool_calls(message):
+            self.speculation.start(tool_call)
+        return message
+
+    def invoke(self, prompt) -> AIMessage:
+        """
+        Stream a response, starting each tool call as soon as its arguments are complete.
+
+        A response already in the model's response cache is returned without streaming.
+        """
+        response = cached_response(self.model, prompt)
+        if response is not None:
+            return response
+        message = None
+        for chunk in self.model.stream(prompt):
+            message = self._add_chunk(message, chunk)
+        response = message_chunk_to_message(message)
+        store_response(self.model, prompt, response)
+        return response
+
+    async def ainvoke(self, prompt) -> AIMessage:
+        """
+        Async version of invoke.
+        """
+        response = cached_response(self.model, prompt)
+        if response is not None:
+            return response
+        message = None
+        async for chunk in self.model.astream(prompt):
+            message = self._add_chunk(message, chunk)
+        response = message_chunk_to_message(message)
+        store_response(self.model, prompt, response)
+        return response
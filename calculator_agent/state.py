@@ -1,28 +1,205 @@
-from langchain_core.messages import AnyMessage
+from langchain_core.messages import (
+    AIMessage, AnyMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage, messages_from_dict
+)
 from typing_extensions import TypedDict, Annotated
-import operator
+from typing import NamedTuple
+
+class ToolCallRecord(NamedTuple):
+    """
+    One tool call requested by the model.
+    """
+    id: str
+    name: str
+    args: dict
+
+    def as_tool_call(self) -> dict:
+        """
+        Get the call as a LangChain ToolCall dict, as tools and the tool executor expect it.
+        """
+        return {"name": self.name, "args": self.args, "id": self.id, "type": "tool_call"}
+
+class MessageRecord:
+    """
+    Compact stand-in for a LangChain message in the agent's state.
+
+    A LangChain message is a pydantic model carrying ids, response metadata,
+    usage counts and, for Claude's responses, the content blocks alongside the
+    parsed tool calls. The agent only ever needs who said what, the tool calls
+    and which call a result answers, so state keeps just that in a slotted
+    record, at a fraction of the memory and serialization cost. Records are
+    turned back into LangChain messages (to_message) only when a prompt is
+    built for the model.
+
+    role is the LangChain message type: "human", "ai", "tool" or "system".
+    """
+    __slots__ = ("role", "content", "tool_calls", "tool_call_id", "name", "status", "stop_reason")
+
+    def __init__(
+        self,
+        role: str,
+        content: str = "",
+        tool_calls: tuple[ToolCallRecord, ...] = (),
+        tool_call_id: str | None = None,
+        name: str | None = None,
+        status: str | None = None,
+        stop_reason: str | None = None
+    ):
+        self.role = role
+        self.content = content
+        self.tool_calls = tool_calls
+        self.tool_call_id = tool_call_id
+        self.name = name
+        self.status = status
+        self.stop_reason = stop_reason
+
+    def __repr__(self) -> str:
+        fields = ", ".join(
+            f"{field}={getattr(self, field)!r}" for field in self.__slots__[1:] if getattr(self, field)
+        )
+        return f"MessageRecord({self.role!r}{', ' if fields else ''}{fields})"
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, MessageRecord):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in self.__slots__)
+
+    def to_dict(self) -> dict:
+        """
+        Serialize the record to a JSON-ready dict; "type" is the role, as in LangChain's dicts.
+        """
+        data = {"type": self.role, "content": self.content}
+        if self.tool_calls:
+            data["tool_calls"] = [list(tool_call) for tool_call in self.tool_calls]
+        for field in ("tool_call_id", "name", "status", "stop_reason"):
+            if getattr(self, field) is not None:
+                data[field] = getattr(self, field)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "MessageRecord":
+        """
+        Rebuild a record from to_dict() output, or from a LangChain message dict (messages_to_dict).
+        """
+        if "data" in data:
+            return to_record(messages_from_dict([data])[0])
+        return cls(
+            data["type"],
+            data.get("content", ""),
+            tuple(ToolCallRecord(*tool_call) for tool_call in data.get("tool_calls", ())),
+            data.get("tool_call_id"),
+            data.get("name"),
+            data.get("status"),
+            data.get("stop_reason")
+        )
+
+def _content_text(content) -> str:
+    """
+    Get the plain text of message content that is a string or a list of blocks.
+
+    A list of plain values (e.g. a list-valued tool result) is kept comma-separated.
+    """
+    if isinstance(content, str):
+        return content
+    if not any(isinstance(block, dict) for block in content):
+        return ", ".join(str(block) for block in content)
+    return "".join(block.get("text", "") if isinstance(block, dict) else str(block) for block in content)
+
+def to_record(message: AnyMessage | MessageRecord) -> MessageRecord:
+    """
+    Convert a LangChain message to a record (records are returned unchanged).
+
+    Content blocks are flattened to their text: a response's tool_use blocks
+    duplicate its tool_calls, which the record keeps on their own.
+    """
+    if isinstance(message, MessageRecord):
+        return message
+    tool_calls = tuple(
+        ToolCallRecord(tool_call["id"], tool_call["name"], tool_call["args"])
+        for tool_call in getattr(message, "tool_calls", None) or ()
+    )
+    return MessageRecord(
+        message.type,
+        _content_text(message.content),
+        tool_calls,
+        getattr(message, "tool_call_id", None),
+        message.name if isinstance(message, ToolMessage) else None,
+        message.status if isinstance(message, ToolMessage) else None,
+        message.response_metadata.get("stop_reason")
+    )
+
+def to_records(messages: list[AnyMessage | MessageRecord]) -> list[MessageRecord]:
+    """
+    Convert a list of LangChain messages (or records) to records.
+    """
+    return [to_record(message) for message in messages]
+
+def to_message(record: MessageRecord | AnyMessage) -> AnyMessage:
+    """
+    Hydrate a record back into the LangChain message the model expects (messages are returned unchanged).
+    """
+    if isinstance(record, BaseMessage):
+        return record
+    metadata = {"stop_reason": record.stop_reason} if record.stop_reason else {}
+    if record.role == "ai":
+        return AIMessage(
+            content=record.content,
+            tool_calls=[tool_call.as_tool_call() for tool_call in record.tool_calls],
+            response_metadata=metadata
+        )
+    if record.role == "tool":
+        return ToolMessage(
+            content=record.content,
+            tool_call_id=record.tool_call_id,
+            name=record.name,
+            status=record.status or "success",
+            response_metadata=metadata
+        )
+    if record.role == "system":
+        return SystemMessage(content=record.content)
+    return HumanMessage(content=record.content)
+
+def to_messages(records: list[MessageRecord | AnyMessage]) -> list[AnyMessage]:
+    """
+    Hydrate a list of records into LangChain messages.
+    """
+    return [to_message(record) for record in records]
+
+def add_records(left: list[MessageRecord], right: list[MessageRecord | AnyMessage]) -> list[MessageRecord]:
+    """
+    State reducer that appends new messages as records, converting any LangChain messages.
+    """
+    return left + to_records(right)
 
 class MessagesState(TypedDict):
     """
     Defines the state structure for our calculator agent.
     
     This is like a blueprint for what information the agent remembers:
-    - messages: The conversation history
+    - messages: The conversation history, as MessageRecords
     - llm_calls: How many times we've called the language model
+    - history_tokens_saved: Prompt tokens saved by compacting the history sent to the model
+    - cache_read_tokens / cache_write_tokens: Prompt-cache tokens read and written by the model
     """
-    # List of all messages in the conversation
-    # Annotated with operator.add means new messages are appended, not replaced
-    messages: Annotated[list[AnyMessage], operator.add]
+    # List of all messages in the conversation, as compact records
+    # Annotated with add_records means new messages are appended (as records), not replaced
+    messages: Annotated[list[MessageRecord], add_records]
     
     # Counter to track how many times we've called the LLM
     llm_calls: int
 
-def create_initial_state(messages: list[AnyMessage] = None) -> MessagesState:
+    # Running total of prompt tokens saved by history compaction
+    history_tokens_saved: int
+
+    # Prompt-cache tokens reported by the model across this run
+    cache_read_tokens: int
+    cache_write_tokens: int
+
+def create_initial_state(messages: list[AnyMessage | MessageRecord] = None) -> MessagesState:
     """
     Create the initial state for a new conversation.
     
     Args:
-        messages: Initial messages (usually just the user's question)
+        messages: Initial messages or records (usually just the user's question)
         
     Returns:
         MessagesState: The initial state with empty conversation and zero LLM calls
@@ -31,8 +208,11 @@ def create_initial_state(messages: list[AnyMessage] = None) -> MessagesState:
         messages = []
     
     return {
-        "messages": messages,
-        "llm_calls": 0
+        "messages": to_records(messages),
+        "llm_calls": 0,
+        "history_tokens_saved": 0,
+        "cache_read_tokens": 0,
+        "cache_write_tokens": 0
     }
 
 def get_state_info(state: MessagesState) -> dict:
@@ -48,5 +228,6 @@ def get_state_info(state: MessagesState) -> dict:
     return {
         "message_count": len(state["messages"]),
         "llm_calls": state["llm_calls"],
-        "last_message_type": type(state["messages"][-1]).__name__ if state["messages"] else "None"
+        "history_tokens_saved": state.get("history_tokens_saved", 0),
+        "last_message_type": state["messages"][-1].role if state["messages"] else "None"
     }
\ No newline at end of file
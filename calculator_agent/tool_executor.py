@@ -0,0 +1,254 @@
+import asyncio
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; CPU limits fall back to wall-clock timeouts
+    resource = None
+
+from .tools import CPU_BOUND_TOOLS, TOOLS_BY_NAME
+
+# CPU seconds a single CPU-bound tool call may use before its worker is killed
+DEFAULT_CPU_SECONDS = 2.0
+
+# Longest tool result (in characters) accepted back from a worker
+DEFAULT_MAX_RESULT_CHARS = 10_000
+
+def _init_worker():
+    """
+    Prepare a pool worker: no core dumps when a CPU limit kills it.
+    """
+    if resource is not None:
+        resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+
+def _run_in_worker(name: str, args: dict, cpu_seconds: float | None, max_result_chars: int):
+    """
+    Run one tool call inside a pool worker under a CPU-time limit.
+
+    The soft RLIMIT_CPU is set just past the worker's current usage, so the
+    kernel kills the worker (SIGXCPU) if the call runs over, even in the
+    middle of a long C-level big-integer operation. Limits have whole-second
+    granularity.
+    """
+    previous = None
+    if resource is not None and cpu_seconds:
+        previous = resource.getrlimit(resource.RLIMIT_CPU)
+        soft = math.ceil(time.process_time() + cpu_seconds)
+        if previous[1] != resource.RLIM_INFINITY:
+            soft = min(soft, previous[1])
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, previous[1]))
+    try:
+        result = TOOLS_BY_NAME[name].invoke(args)
+    finally:
+        if previous is not None:
+            resource.setrlimit(resource.RLIMIT_CPU, previous)
+    if len(str(result)) > max_result_chars:
+        raise ValueError(f"Tool '{name}' result is longer than {max_result_chars} characters")
+    return result
+
+class ToolExecutor:
+    """
+    Runs tool calls, sending CPU-bound tools to a process pool with limits.
+
+    Cheap tools such as add run inline, so they don't pay for the round trip
+    to another process. CPU-bound tools (tools.CPU_BOUND_TOOLS) run in worker
+    processes with a per-call CPU-time limit and a cap on the result size, so
+    a huge computation can't freeze the event loop or hold a thread forever.
+    """
+
+    def __init__(
+        self,
+        max_processes: int | None = None,
+        cpu_seconds: float | None = DEFAULT_CPU_SECONDS,
+        max_result_chars: int = DEFAULT_MAX_RESULT_CHARS,
+        cpu_bound: frozenset = CPU_BOUND_TOOLS
+    ):
+        """
+        Args:
+            max_processes: Worker processes for CPU-bound tools (0 runs them inline too)
+            cpu_seconds: CPU time allowed per CPU-bound call (None for no limit)
+            max_result_chars: Longest result accepted from a worker
+            cpu_bound: Names of the tools to run in the process pool
+        """
+        if max_processes is None:
+            max_processes = min(4, os.cpu_count() or 1)
+        self.max_processes = max_processes
+        self.cpu_seconds = cpu_seconds
+        self.max_result_chars = max_result_chars
+        self.cpu_bound = cpu_bound
+        self._pool = None
+        self._lock = threading.Lock()
+        self.inline_calls = 0
+        self.process_calls = 0
+        self.limit_kills = 0
+        self.pool_restarts = 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """
+        Start the process pool on first use.
+
+        forkserver (where available) avoids forking the multi-threaded server
+        process, and preloading the tools keeps the first call in each worker fast.
+        """
+        with self._lock:
+            if self._pool is None:
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+                if context.get_start_method() == "forkserver":
+                    context.set_forkserver_preload(["calculator_agent.tools"])
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_processes, mp_context=context, initializer=_init_worker
+                )
+            return self._pool
+
+    def _restart_pool(self, broken: ProcessPoolExecutor):
+        """
+        Replace a pool whose worker was killed (only once, however many calls noticed).
+        """
+        with self._lock:
+            if self._pool is broken:
+                self._pool = None
+                self.pool_restarts += 1
+        # Stop any worker still running (e.g. one that hit the wall-clock fallback)
+        for process in list((getattr(broken, "_processes", None) or {}).values()):
+            process.terminate()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def runs_in_process(self, name: str) -> bool:
+        """
+        Check whether a tool is sent to the process pool.
+        """
+        return self.max_processes > 0 and name in self.cpu_bound
+
+    def _limit_error(self, name: str) -> TimeoutError:
+        """
+        Build the error for a call whose worker died, almost always from the CPU limit.
+        """
+        self._count("limit_kills")
+        # Every call running in the pool when a worker dies fails with it
+        return TimeoutError(
+            f"Tool '{name}' was stopped: its worker process was killed (CPU time limit {self.cpu_seconds}s)"
+        )
+
+    def _count(self, counter: str):
+        """
+        Increment one of the usage counters.
+        """
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _wall_timeout(self) -> float | None:
+        """
+        Without RLIMIT_CPU, fall back to waiting at most a generous multiple of the CPU limit.
+        """
+        if resource is None and self.cpu_seconds is not None:
+            return self.cpu_seconds * 4
+        return None
+
+    def invoke(self, name: str, args: dict):
+        """
+        Run one tool call, blocking until it finishes.
+
+        Args:
+            name: The tool's name
+            args: The tool call's arguments
+
+        Returns:
+            The tool's output
+        """
+        if not self.runs_in_process(name):
+            self._count("inline_calls")
+            return TOOLS_BY_NAME[name].invoke(args)
+
+        pool = self._get_pool()
+        self._count("process_calls")
+        future = pool.submit(_run_in_worker, name, args, self.cpu_seconds, self.max_result_chars)
+        try:
+            return future.result(timeout=self._wall_timeout())
+        except BrokenProcessPool:
+            self._restart_pool(pool)
+            raise self._limit_error(name) from None
+        except FuturesTimeoutError:
+            # Only reached without RLIMIT_CPU: the worker can't be stopped any other way
+            self._restart_pool(pool)
+            raise self._limit_error(name) from None
+
+    async def ainvoke(self, name: str, args: dict):
+        """
+        Async version of invoke that awaits the worker without blocking the event loop.
+        """
+        if not self.runs_in_process(name):
+            self._count("inline_calls")
+            return await TOOLS_BY_NAME[name].ainvoke(args)
+
+        pool = self._get_pool()
+        self._count("process_calls")
+        future = pool.submit(_run_in_worker, name, args, self.cpu_seconds, self.max_result_chars)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self._wall_timeout())
+        except BrokenProcessPool:
+            self._restart_pool(pool)
+            raise self._limit_error(name) from None
+        except asyncio.TimeoutError:
+            self._restart_pool(pool)
+            raise self._limit_error(name) from None
+
+    def shutdown(self):
+        """
+        Stop the process pool, if one was started.
+        """
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        """
+        Get how tool calls were run.
+
+        Returns:
+            dict: Inline and process-pool calls, CPU-limit kills, pool restarts and limits
+        """
+        return {
+            "inline_calls": self.inline_calls,
+            "process_calls": self.process_calls,
+            "limit_kills": self.limit_kills,
+            "pool_restarts": self.pool_restarts,
+            "max_processes": self.max_processes,
+            "cpu_seconds": self.cpu_seconds,
+            "pool_started": self._pool is not None
+        }
+
+_default_executor = None
+_default_lock = threading.Lock()
+
+def get_tool_executor() -> ToolExecutor:
+    """
+    Get the process-wide tool executor, configured on first use.
+
+    AGENT_TOOL_PROCESSES sets the pool size (0 runs every tool inline) and
+    AGENT_TOOL_CPU_SECONDS the per-call CPU limit.
+    """
+    global _default_executor
+    with _default_lock:
+        if _default_executor is None:
+            processes = os.environ.get("AGENT_TOOL_PROCESSES")
+            _default_executor = ToolExecutor(
+                max_processes=int(processes) if processes else None,
+                cpu_seconds=float(os.environ.get("AGENT_TOOL_CPU_SECONDS", DEFAULT_CPU_SECONDS))
+            )
+        return _default_executor
+
+def set_tool_executor(executor: ToolExecutor):
+    """
+    Replace the process-wide tool executor.
+    """
+    global _default_executor
+    with _default_lock:
+        _default_executor = executor
@@ -1,5 +1,85 @@
+import itertools
+import math
+from decimal import Decimal, localcontext
+from typing import Literal
+
 from langchain.tools import tool
 
+from calculator_agent.expressions import evaluate_expression
+
+# Largest integer a float64 holds exactly; integral results below it are returned as int
+_EXACT_INT_LIMIT = 2 ** 53
+
+# Largest result (in decimal digits) the big-number tools will compute
+MAX_RESULT_DIGITS = 1_000_000
+
+# Longer results are reported in scientific notation with this many significant digits
+MAX_EXACT_DIGITS = 1000
+SUMMARY_DIGITS = 20
+
+# Tools whose cost grows with the size of their inputs; the tool executor runs
+# these in a process pool so they can't stall the worker running the agent
+CPU_BOUND_TOOLS = frozenset({"power", "factorial", "mod_pow", "integer_root"})
+
+def _numpy():
+    """Import NumPy on first use, so loading the tools doesn't pay for it up front."""
+    import numpy
+    return numpy
+
+def _to_array(numbers: list[float]):
+    """Convert a list of numbers to a float64 NumPy array."""
+    np = _numpy()
+    return np.asarray(numbers, dtype=np.float64)
+
+def _to_python(value):
+    """Convert a NumPy scalar or array back to plain Python numbers.
+
+    NumPy overflows to inf (and inf - inf is nan) with only a warning, so a
+    non-finite result is turned into an error instead.
+    """
+    if isinstance(value, _numpy().ndarray):
+        return [_to_python(item) for item in value]
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError("Result is too large for a 64-bit float")
+    if value.is_integer() and abs(value) < _EXACT_INT_LIMIT:
+        return int(value)
+    return value
+
+def _all_ints(numbers: list[int | float]) -> bool:
+    """True if every number is an int, so it can be added up exactly without NumPy."""
+    return all(isinstance(number, int) for number in numbers)
+
+def _check_same_length(a: list[float], b: list[float]):
+    """Raise if two vectors can't be combined element by element."""
+    if len(a) != len(b):
+        raise ValueError(f"Vectors must have the same length (got {len(a)} and {len(b)})")
+
+def _check_digits(estimated_digits: float):
+    """Raise before computing a result that would be longer than MAX_RESULT_DIGITS."""
+    if estimated_digits > MAX_RESULT_DIGITS:
+        raise ValueError(
+            f"Result would have about {estimated_digits:.0f} digits (limit {MAX_RESULT_DIGITS})"
+        )
+
+def _big_int_text(value: int) -> str:
+    """Format an integer exactly, or as "≈ d.ddd…e+N (N+1 digits)" when it is huge.
+
+    Printing a million-digit number in full would take seconds and flood the
+    model's context, so only the leading digits and the length are reported.
+    """
+    if value.bit_length() * math.log10(2) < MAX_EXACT_DIGITS:
+        return str(value)
+    # Scale the top bits back up with just enough decimal precision for the summary
+    shift = value.bit_length() - 128
+    with localcontext() as context:
+        context.prec = SUMMARY_DIGITS + 5
+        approx = Decimal(abs(value) >> shift) * Decimal(2) ** shift
+    digits = approx.adjusted() + 1
+    mantissa = approx.scaleb(-approx.adjusted())
+    sign = "-" if value < 0 else ""
+    return f"≈ {sign}{mantissa:.{SUMMARY_DIGITS - 1}f}e+{digits - 1} ({digits} digits)"
+
 @tool
 def add(a: int, b: int) -> int:
     """Adds two integers together."""
@@ -17,8 +97,126 @@ def divide(a: int, b: int) -> float:
         raise ValueError("Cannot divide by zero")
     return a / b
 
+@tool
+def sum_numbers(numbers: list[int | float]) -> float:
+    """Adds up every number in a list (exactly, if they are all integers)."""
+    if _all_ints(numbers):
+        return sum(numbers)
+    np = _numpy()
+    return _to_python(np.sum(_to_array(numbers)))
+
+@tool
+def product_numbers(numbers: list[float]) -> float:
+    """Multiplies every number in a list together."""
+    np = _numpy()
+    return _to_python(np.prod(_to_array(numbers)))
+
+@tool
+def elementwise(operation: Literal["add", "subtract", "multiply", "divide"], a: list[float], b: list[float]) -> list[float]:
+    """Applies add, subtract, multiply or divide to two equal-length lists element by element."""
+    np = _numpy()
+    _check_same_length(a, b)
+    left, right = _to_array(a), _to_array(b)
+    if operation == "divide":
+        if np.any(right == 0):
+            raise ValueError("Cannot divide by zero")
+        return _to_python(left / right)
+    operations = {"add": np.add, "subtract": np.subtract, "multiply": np.multiply}
+    return _to_python(operations[operation](left, right))
+
+@tool
+def dot_product(a: list[float], b: list[float]) -> float:
+    """Computes the dot product of two equal-length lists."""
+    np = _numpy()
+    _check_same_length(a, b)
+    return _to_python(np.dot(_to_array(a), _to_array(b)))
+
+@tool
+def mean(numbers: list[float]) -> float:
+    """Computes the arithmetic mean of a list of numbers."""
+    np = _numpy()
+    if not numbers:
+        raise ValueError("Cannot take the mean of an empty list")
+    return _to_python(np.mean(_to_array(numbers)))
+
+@tool
+def variance(numbers: list[float], sample: bool = False) -> float:
+    """Computes the variance of a list of numbers (population by default, sample if sample=True)."""
+    np = _numpy()
+    if len(numbers) < (2 if sample else 1):
+        raise ValueError("Not enough numbers to compute the variance")
+    return _to_python(np.var(_to_array(numbers), ddof=1 if sample else 0))
+
+@tool
+def cumulative_sum(numbers: list[int | float]) -> list[float]:
+    """Returns the running totals of a list of numbers (exactly, if they are all integers)."""
+    if _all_ints(numbers):
+        return list(itertools.accumulate(numbers))
+    np = _numpy()
+    return _to_python(np.cumsum(_to_array(numbers)))
+
+@tool
+def evaluate(expression: str, mode: Literal["float", "fraction", "decimal"] = "float") -> str:
+    """Evaluates a whole arithmetic expression such as "(3+4)*6/2" in one step.
+
+    Supports numbers, + - * / // % ** and parentheses. Integer arithmetic is exact in
+    the default mode. Use mode="fraction" for exact rational results, or mode="decimal"
+    to avoid binary rounding (0.1 + 0.2 = 0.3). Decimal mode keeps 50 significant
+    digits, so don't use it for big integers.
+    """
+    return str(evaluate_expression(expression, mode))
+
+@tool
+def power(base: int, exponent: int) -> str:
+    """Raises an integer to a non-negative integer power, exactly."""
+    if exponent < 0:
+        raise ValueError("Exponent must be non-negative")
+    if abs(base) > 1:
+        _check_digits(exponent * math.log10(abs(base)))
+    return _big_int_text(base ** exponent)
+
+@tool
+def factorial(n: int) -> str:
+    """Returns n! (the product of 1..n) exactly."""
+    if n < 0:
+        raise ValueError("Factorial is only defined for non-negative integers")
+    _check_digits(math.lgamma(n + 1) / math.log(10))
+    return _big_int_text(math.factorial(n))
+
+@tool
+def mod_pow(base: int, exponent: int, modulus: int) -> str:
+    """Computes (base ** exponent) % modulus efficiently, e.g. for huge exponents."""
+    if modulus == 0:
+        raise ValueError("Modulus must be non-zero")
+    return _big_int_text(pow(base, exponent, modulus))
+
+@tool
+def integer_root(n: int, k: int = 2) -> str:
+    """Returns the integer k-th root of n, rounded down (k=2 is the integer square root)."""
+    if k < 1:
+        raise ValueError("Root degree must be at least 1")
+    if n < 0:
+        raise ValueError("Cannot take the root of a negative number")
+    if k == 1 or n < 2:
+        return _big_int_text(n)
+    if k == 2:
+        return _big_int_text(math.isqrt(n))
+    # Newton's method on integers, starting above the root
+    root = 1 << -(-n.bit_length() // k)
+    while True:
+        better = ((k - 1) * root + n // root ** (k - 1)) // k
+        if better >= root:
+            return _big_int_text(root)
+        root = better
+
 # Create a list of all available tools
-TOOLS = [add, multiply, divide]
+TOOLS = [
+    add, multiply, divide,
+    sum_numbers, product_numbers, elementwise, dot_product,
+    mean, variance, cumulative_sum,
+    evaluate,
+    power, factorial, mod_pow, integer_root
+]
 
 # Create a dictionary for quick tool lookup
 TOOLS_BY_NAME = {tool.name: tool for tool in TOOLS}
\ No newline at end of file
@@ -0,0 +1,32 @@
+import pytest
+
+from calculator_agent.expressions import MAX_RESULT_BITS, evaluate_expression
+from calculator_agent.tools import evaluate
+
+def test_result_just_under_the_limit_is_printed_in_full():
+    # (2**1000)**13 has 13,001 bits, about 3,914 digits
+    assert evaluate.invoke({"expression": "(2**1000)**13"}) == str(2 ** 13000)
+
+def test_result_just_past_the_limit_is_rejected_cleanly():
+    # (2**1000)**14 has 14,001 bits: over the limit, under Python's int-to-str cap
+    assert 1001 * 14 > MAX_RESULT_BITS
+    with pytest.raises(ValueError, match="too large"):
+        evaluate.invoke({"expression": "(2**1000)**14"})
+
+def test_huge_integer_power_is_rejected_before_printing():
+    with pytest.raises(ValueError, match="too large"):
+        evaluate.invoke({"expression": "99999999999999999**999"})
+
+@pytest.mark.parametrize("mode", ["float", "fraction"])
+def test_fraction_and_integer_results_stay_exact(mode):
+    assert str(evaluate_expression("2**64 + 1", mode)) == "18446744073709551617"
+
+@pytest.mark.parametrize("mode", ["float", "fraction", "decimal"])
+def test_zero_to_a_negative_power_is_a_division_by_zero(mode):
+    with pytest.raises(ValueError, match="Cannot divide by zero"):
+        evaluate_expression("0**-1", mode)
+
+@pytest.mark.parametrize("expression", ["1e308*10", "1e308*10 - 1e308*10", "1e999"])
+def test_non_finite_float_results_are_rejected(expression):
+    with pytest.raises(ValueError, match="too large"):
+        evaluate_expression(expression)
@@ -0,0 +1,25 @@
+import pytest
+
+from calculator_agent.tools import TOOLS_BY_NAME
+
+def run(tool_name: str, **args):
+    return TOOLS_BY_NAME[tool_name].invoke(args)
+
+def test_integer_lists_are_summed_exactly():
+    assert run("sum_numbers", numbers=[2 ** 60, 1]) == 2 ** 60 + 1
+    assert run("cumulative_sum", numbers=[2 ** 60, 1, 2]) == [2 ** 60, 2 ** 60 + 1, 2 ** 60 + 3]
+
+def test_mixed_lists_still_use_floats():
+    assert run("sum_numbers", numbers=[1.5, 2]) == 3.5
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+@pytest.mark.parametrize("tool_name, args", [
+    ("product_numbers", {"numbers": [1e200, 1e200]}),
+    ("mean", {"numbers": [1e308, 1e308]}),
+    ("variance", {"numbers": [1e200, -1e200]}),
+    ("dot_product", {"a": [1e200], "b": [1e200]}),
+    ("elementwise", {"operation": "multiply", "a": [1e200], "b": [1e200]}),
+])
+def test_overflow_is_an_error_not_inf(tool_name, args):
+    with pytest.raises(ValueError, match="too large"):
+        run(tool_name, **args)
@@ -1,14 +1,89 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager, nullcontext
+
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from calculator_agent.graph_api import create_graph_agent
-from calculator_agent.state import create_initial_state
-from langchain_core.messages import HumanMessage
+from calculator_agent.answer_cache import AnswerCache
+from calculator_agent.metrics import collect_timings, render_prometheus
+
+# LangChain, LangGraph and the compiled graph are loaded on first use rather than
+# at import, so serverless cold starts only pay for FastAPI. Set AGENT_LAZY_INIT=0
+# to build everything at import time instead.
+LAZY_INIT = os.environ.get("AGENT_LAZY_INIT", "1") != "0"
+
+# Set AGENT_WARMUP=1 to build everything in the background when the server starts
+WARMUP_ON_STARTUP = os.environ.get("AGENT_WARMUP", "0") == "1"
+
+# Set AGENT_PLAN_EXECUTE=1 to serve the plan-and-execute graph instead of the tool loop
+PLAN_EXECUTE = os.environ.get("AGENT_PLAN_EXECUTE", "0") == "1"
+
+_agent = None
+STARTED_AT = time.monotonic()
+_session_store = None
+_init_lock = threading.Lock()
+
+def get_agent():
+    """Compile the graph agent on first use and return the shared instance"""
+    global _agent
+    if _agent is None:
+        with _init_lock:
+            if _agent is None:
+                if PLAN_EXECUTE:
+                    from calculator_agent.plan_api import create_plan_agent
+                    _agent = create_plan_agent()
+                else:
+                    from calculator_agent.graph_api import create_graph_agent
+                    _agent = create_graph_agent()
+    return _agent
+
+def get_session_store():
+    """Open the session store on first use and return the shared instance"""
+    global _session_store
+    if _session_store is None:
+        with _init_lock:
+            if _session_store is None:
+                from calculator_agent.sessions import SessionStore
+                # Persistent multi-turn sessions, keyed by the request's thread_id
+                _session_store = SessionStore(
+                    path=os.environ.get("SESSION_DB_PATH", "sessions.db"),
+                    ttl_seconds=float(os.environ.get("SESSION_TTL", "3600")),
+                    max_messages=int(os.environ.get("SESSION_MAX_MESSAGES", "200"))
+                )
+    return _session_store
+
+def warm_up() -> dict:
+    """Load the heavy modules, compile the agent and build the model ahead of traffic"""
+    started = time.perf_counter()
+    get_agent()
+    from calculator_agent.model import setup_model
+    setup_model()
+    return {"warm": True, "ms": round((time.perf_counter() - started) * 1000, 3)}
+
+def __getattr__(name):
+    """Expose the lazily created agent and session store as module attributes"""
+    if name == "agent":
+        return get_agent()
+    if name == "session_store":
+        return get_session_store()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+@asynccontextmanager
+async def lifespan(app):
+    """Optionally warm up in a worker thread when the server starts"""
+    if WARMUP_ON_STARTUP:
+        await asyncio.to_thread(warm_up)
+    yield
 
 # Initialize FastAPI app
-app = FastAPI(title="Calculator Agent API")
+app = FastAPI(title="Calculator Agent API", lifespan=lifespan)
 
 # Add CORS middleware for browser access
 app.add_middleware(
@@ -22,9 +97,45 @@ app.add_middleware(
 # Request model
 class Question(BaseModel):
     question: str
+    thread_id: str | None = None
+    include_timings: bool = False
+    # Optional per-request limits; they can only tighten the server's AGENT_* ceilings
+    deadline_seconds: float | None = None
+    max_llm_calls: int | None = None
+    max_tool_calls: int | None = None
 
-# Create the agent once at startup
-agent = create_graph_agent()
+class BatchQuestions(BaseModel):
+    questions: list[str]
+    max_concurrency: int | None = None
+
+# Create the agent once at startup unless lazy initialization is on
+if not LAZY_INIT:
+    warm_up()
+
+# Cap on agent runs in flight at once in this process; extra requests wait their turn
+MAX_CONCURRENT_RUNS = int(os.environ.get("AGENT_MAX_CONCURRENT_RUNS", "32"))
+run_slots = asyncio.Semaphore(MAX_CONCURRENT_RUNS)
+
+# One lock per session, so two requests for the same thread_id run one turn at a
+# time instead of interleaving their messages. A lock is dropped once no request holds it.
+_session_locks = weakref.WeakValueDictionary()
+
+def session_lock(thread_id: str) -> asyncio.Lock:
+    """Get the lock that serializes turns of one session"""
+    lock = _session_locks.get(thread_id)
+    if lock is None:
+        lock = _session_locks[thread_id] = asyncio.Lock()
+    return lock
+
+# Default (and maximum) parallelism for a single /ask/batch request
+BATCH_CONCURRENCY = int(os.environ.get("AGENT_BATCH_CONCURRENCY", "8"))
+
+# Cache of finished answers keyed on the normalized question
+answer_cache = AnswerCache(
+    max_entries=int(os.environ.get("ANSWER_CACHE_SIZE", "1024")),
+    ttl_seconds=float(os.environ.get("ANSWER_CACHE_TTL", "300")),
+    max_bytes=int(os.environ.get("ANSWER_CACHE_MAX_BYTES", str(8 * 1024 * 1024)))
+)
 
 @app.get("/", response_class=HTMLResponse)
 async def read_root():
@@ -135,6 +246,9 @@ async def read_root():
         </div>
 
         <script>
+            // One persistent session per page load, so follow-up questions keep their context
+            const threadId = Date.now().toString(36) + Math.random().toString(36).slice(2);
+            
             async function askQuestion() {
                 const question = document.getElementById('question').value;
                 const resultDiv = document.getElementById('result');
@@ -145,27 +259,58 @@ async def read_root():
                     return;
                 }
                 
-                // Disable button and show loading
+                // Disable button and show the conversation as it streams in
                 button.disabled = true;
                 button.textContent = 'Thinking...';
-                resultDiv.innerHTML = '<div class="result">Processing your question...</div>';
+                resultDiv.innerHTML = '<div class="result"><h3>Conversation:</h3><div class="conversation"></div><div class="stats"></div></div>';
+                const conversation = resultDiv.querySelector('.conversation');
+                const stats = resultDiv.querySelector('.stats');
+                addMessage(conversation, 'You', question);
+                
+                // The AI message currently receiving streamed tokens
+                let answer = null;
                 
                 try {
-                    const response = await fetch('/ask', {
+                    const response = await fetch('/ask/stream', {
                         method: 'POST',
                         headers: {
                             'Content-Type': 'application/json',
                         },
-                        body: JSON.stringify({ question: question })
+                        body: JSON.stringify({ question: question, thread_id: threadId })
                     });
                     
-                    const data = await response.json();
-                    
-                    if (response.ok) {
-                        displayResult(data);
-                    } else {
-                        resultDiv.innerHTML = `<div class="result error"><strong>Error:</strong> ${data.detail}</div>`;
+                    if (!response.ok) {
+                        const data = await response.json();
+                        throw new Error(data.detail);
                     }
+                    
+                    await readEvents(response, (event, data) => {
+                        if (event === 'token') {
+                            if (!answer) {
+                                answer = addMessage(conversation, 'AI Assistant', '');
+                            }
+                            answer.querySelector('span').textContent += data.text;
+                        } else if (event === 'tool_call') {
+                            // Text streamed before a tool call was the model thinking out loud
+                            if (answer) {
+                                answer.remove();
+                                answer = null;
+                            }
+                            addMessage(conversation, 'AI (thinking)', `🤔 Using ${data.name} tool...`);
+                        } else if (event === 'tool_result') {
+                            addMessage(conversation, 'Calculation', `Result: ${data.content}`);
+                        } else if (event === 'answer') {
+                            if (!answer) {
+                                answer = addMessage(conversation, 'AI Assistant', '');
+                            }
+                            answer.querySelector('span').textContent = data.content;
+                            answer = null;
+                        } else if (event === 'done') {
+                            stats.textContent = `LLM Calls: ${data.llm_calls}`;
+                        } else if (event === 'error') {
+                            throw new Error(data.detail);
+                        }
+                    });
                 } catch (error) {
                     resultDiv.innerHTML = `<div class="result error"><strong>Error:</strong> ${error.message}</div>`;
                 } finally {
@@ -174,24 +319,42 @@ async def read_root():
                 }
             }
             
-            function displayResult(data) {
-                const resultDiv = document.getElementById('result');
-                let html = '<div class="result">';
-                html += '<h3>Conversation:</h3>';
-                html += '<div class="conversation">';
-                
-                data.messages.forEach((msg, idx) => {
-                    const className = msg.type.toLowerCase();
-                    html += `<div class="message ${className}">`;
-                    html += `<strong>${msg.type}:</strong> ${msg.content}`;
-                    html += '</div>';
-                });
-                
-                html += '</div>';
-                html += `<div class="stats">LLM Calls: ${data.llm_calls}</div>`;
-                html += '</div>';
-                
-                resultDiv.innerHTML = html;
+            function addMessage(conversation, type, content) {
+                const div = document.createElement('div');
+                div.className = `message ${type.toLowerCase()}`;
+                div.innerHTML = `<strong>${type}:</strong> <span></span>`;
+                div.querySelector('span').textContent = content;
+                conversation.appendChild(div);
+                return div;
+            }
+            
+            async function readEvents(response, onEvent) {
+                // Minimal Server-Sent Events parser over a fetch() response body
+                const reader = response.body.getReader();
+                const decoder = new TextDecoder();
+                let buffer = '';
+                while (true) {
+                    const { value, done } = await reader.read();
+                    if (done) {
+                        break;
+                    }
+                    buffer += decoder.decode(value, { stream: true });
+                    let boundary;
+                    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                        const block = buffer.slice(0, boundary);
+                        buffer = buffer.slice(boundary + 2);
+                        let event = 'message';
+                        let data = '';
+                        block.split('\n').forEach(line => {
+                            if (line.startsWith('event: ')) {
+                                event = line.slice(7);
+                            } else if (line.startsWith('data: ')) {
+                                data += line.slice(6);
+                            }
+                        });
+                        onEvent(event, JSON.parse(data));
+                    }
+                }
             }
             
             // Allow Enter key to submit
@@ -206,53 +369,141 @@ async def read_root():
     """
     return HTMLResponse(content=html_content)
 
-@app.post("/ask")
-async def ask_agent(question: Question):
-    """Process a question through the calculator agent"""
-    try:
-        # Create initial state with the user's question
-        initial_messages = [HumanMessage(content=question.question)]
-        initial_state = create_initial_state(initial_messages)
-        
-        # Run the agent
-        result = agent.invoke(initial_state)
-        
-        # Format the response - only show user-friendly messages
-        messages = []
-        for msg in result["messages"]:
-            msg_type = type(msg).__name__
-            
-            # Skip tool calls in AI messages - only show the final response
-            if msg_type == "AIMessage":
-                # If it has tool calls, show a thinking indicator
-                if hasattr(msg, 'tool_calls') and msg.tool_calls:
-                    messages.append({
-                        "type": "AI (thinking)",
-                        "content": f"🤔 Using {msg.tool_calls[0]['name']} tool..."
-                    })
-                else:
-                    # Final AI response
-                    messages.append({
-                        "type": "AI Assistant",
-                        "content": msg.content
-                    })
-            elif msg_type == "HumanMessage":
+def format_messages(result_messages) -> list[dict]:
+    """Format the agent's message records for the UI - only show user-friendly messages"""
+    messages = []
+    for msg in result_messages:
+        # Skip tool calls in AI messages - only show the final response
+        if msg.role == "ai":
+            # If it has tool calls, show a thinking indicator
+            if msg.tool_calls:
                 messages.append({
-                    "type": "You",
-                    "content": msg.content
+                    "type": "AI (thinking)",
+                    "content": f"🤔 Using {msg.tool_calls[0].name} tool..."
                 })
-            elif msg_type == "ToolMessage":
-                # Show tool result in a friendly way
+            else:
+                # Final AI response
                 messages.append({
-                    "type": "Calculation",
-                    "content": f"Result: {msg.content}"
+                    "type": "AI Assistant",
+                    "content": msg.content
                 })
+        elif msg.role == "human":
+            messages.append({
+                "type": "You",
+                "content": msg.content
+            })
+        elif msg.role == "tool":
+            # Show tool result in a friendly way
+            messages.append({
+                "type": "Calculation",
+                "content": f"Result: {msg.content}"
+            })
+    return messages
+
+def request_budget(question: Question):
+    """Build a budget from the request's own limits, or None if it didn't set any"""
+    if question.deadline_seconds is None and question.max_llm_calls is None and question.max_tool_calls is None:
+        return None
+    from calculator_agent.budget import budget_from_env
+    return budget_from_env(question.deadline_seconds, question.max_llm_calls, question.max_tool_calls)
+
+def budget_fields(budget) -> dict:
+    """Report how a run ended; runs stopped by their budget don't count as successful"""
+    return {"success": budget.exceeded is None, "status": budget.status, "budget": budget.stats()}
+
+async def run_agent(question: str, budget=None) -> dict:
+    """Answer one question from the cache, or by running the agent"""
+    if budget is not None:
+        # Answers computed under a request's own limits aren't shared through the cache
+        return await run_agent_uncached(question, budget)
+    return await answer_cache.get_or_compute(question, lambda: run_agent_uncached(question))
+
+async def run_agent_uncached(question: str, budget=None) -> dict:
+    """Run one question through the agent and return the formatted response"""
+    from langchain_core.messages import HumanMessage
+    from calculator_agent.state import create_initial_state
+    from calculator_agent.budget import budget_from_env, enforce_budget
+    
+    # Create initial state with the user's question
+    initial_messages = [HumanMessage(content=question)]
+    initial_state = create_initial_state(initial_messages)
+    budget = budget or budget_from_env()
+    
+    # Run the agent without blocking the event loop
+    async with run_slots:
+        with enforce_budget(budget):
+            result = await get_agent().ainvoke(initial_state, {"recursion_limit": budget.recursion_limit()})
+    
+    return {
+        "messages": format_messages(result["messages"]),
+        "llm_calls": result["llm_calls"],
+        "cache_read_tokens": result.get("cache_read_tokens", 0),
+        "cache_write_tokens": result.get("cache_write_tokens", 0),
+        **budget_fields(budget)
+    }
+
+async def run_session_turn(question: str, thread_id: str, budget=None) -> dict:
+    """Run one turn of a persistent session, saving each step as it finishes"""
+    from calculator_agent.state import MessageRecord, create_initial_state
+    from calculator_agent.budget import budget_from_env, enforce_budget
+    
+    budget = budget or budget_from_env()
+    session_store = get_session_store()
+    turn_messages = [MessageRecord("human", question)]
+    counters = {"llm_calls": 0, "cache_read_tokens": 0, "cache_write_tokens": 0}
+    
+    # SQLite calls run in worker threads so they don't block the event loop
+    async with session_lock(thread_id):
+        history = await asyncio.to_thread(session_store.load, thread_id)
+        rollback_point = await asyncio.to_thread(session_store.append, thread_id, turn_messages) - 1
+        initial_state = create_initial_state(history + turn_messages)
+        completed = False
         
-        return {
-            "messages": messages,
-            "llm_calls": result["llm_calls"],
-            "success": True
-        }
+        try:
+            async with run_slots:
+                with enforce_budget(budget):
+                    config = {"recursion_limit": budget.recursion_limit()}
+                    async for chunk in get_agent().astream(initial_state, config, stream_mode="updates"):
+                        for update in chunk.values():
+                            if not update:
+                                continue
+                            counters.update((key, update[key]) for key in counters if key in update)
+                            step_messages = update.get("messages", [])
+                            if step_messages:
+                                await asyncio.to_thread(session_store.append, thread_id, step_messages)
+                                turn_messages.extend(step_messages)
+            completed = True
+        finally:
+            # Don't leave a half-finished turn (e.g. a tool call without its result) in the session
+            if not completed:
+                await asyncio.to_thread(session_store.rollback, thread_id, rollback_point)
+    
+    return {
+        "messages": format_messages(turn_messages),
+        **counters,
+        **budget_fields(budget),
+        "thread_id": thread_id
+    }
+
+@app.post("/ask")
+async def ask_agent(question: Question):
+    """Process a question through the calculator agent"""
+    try:
+        started = time.perf_counter()
+        with collect_timings() as timings:
+            budget = request_budget(question)
+            if question.thread_id:
+                response = await run_session_turn(question.question, question.thread_id, budget)
+            else:
+                response = await run_agent(question.question, budget)
+        
+        # Optional per-request breakdown of where the time went
+        if question.include_timings:
+            response["timings"] = {
+                "total_ms": round((time.perf_counter() - started) * 1000, 3),
+                "nodes": timings
+            }
+        return response
     
     except Exception as e:
         return JSONResponse(
@@ -260,6 +511,196 @@ async def ask_agent(question: Question):
             content={"detail": str(e), "success": False}
         )
 
+def sse_event(event: str, data: dict) -> str:
+    """Encode one Server-Sent Events frame"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def chunk_text(chunk) -> str:
+    """Extract the text from a streamed message chunk (string or content blocks)"""
+    if isinstance(chunk.content, str):
+        return chunk.content
+    return "".join(
+        block.get("text", "")
+        for block in chunk.content
+        if isinstance(block, dict) and block.get("type") == "text"
+    )
+
+async def stream_agent_events(question: str, thread_id: str | None = None, budget=None):
+    """Run the agent and yield its progress as Server-Sent Events"""
+    from calculator_agent.state import MessageRecord, create_initial_state
+    from calculator_agent.budget import budget_from_env, enforce_budget
+    
+    budget = budget or budget_from_env()
+    initial_messages = [MessageRecord("human", question)]
+    counters = {"llm_calls": 0, "cache_read_tokens": 0, "cache_write_tokens": 0}
+    rollback_point = None
+    completed = False
+    
+    # A session's turns run one at a time; its SQLite calls run in worker threads
+    async with session_lock(thread_id) if thread_id else nullcontext():
+        try:
+            history = []
+            if thread_id:
+                session_store = get_session_store()
+                history = await asyncio.to_thread(session_store.load, thread_id)
+                rollback_point = await asyncio.to_thread(session_store.append, thread_id, initial_messages) - 1
+            initial_state = create_initial_state(history + initial_messages)
+            
+            async with run_slots:
+                with enforce_budget(budget):
+                    config = {"recursion_limit": budget.recursion_limit()}
+                    async for mode, chunk in get_agent().astream(
+                        initial_state, config, stream_mode=["updates", "messages"]
+                    ):
+                        if mode == "messages":
+                            # Token-level output from the model as it is generated
+                            message_chunk, metadata = chunk
+                            if metadata.get("langgraph_node") != "llm_call":
+                                continue
+                            text = chunk_text(message_chunk)
+                            if text:
+                                yield sse_event("token", {"text": text})
+                            continue
+                    
+                        # Node-level updates once each step finishes
+                        for update in chunk.values():
+                            if not update:
+                                continue
+                            counters.update((key, update[key]) for key in counters if key in update)
+                            if thread_id and update.get("messages"):
+                                await asyncio.to_thread(session_store.append, thread_id, update["messages"])
+                            for msg in update.get("messages", []):
+                                if msg.role == "tool":
+                                    yield sse_event("tool_result", {
+                                        "tool_call_id": msg.tool_call_id,
+                                        "content": msg.content
+                                    })
+                                elif msg.tool_calls:
+                                    for tool_call in msg.tool_calls:
+                                        yield sse_event("tool_call", {
+                                            "id": tool_call.id,
+                                            "name": tool_call.name,
+                                            "args": tool_call.args
+                                        })
+                                else:
+                                    yield sse_event("answer", {"content": msg.content})
+            
+            completed = True
+            yield sse_event("done", {**counters, **budget_fields(budget), "thread_id": thread_id})
+        
+        except Exception as e:
+            yield sse_event("error", {"detail": str(e), "success": False})
+        
+        finally:
+            if rollback_point is not None and not completed:
+                await asyncio.to_thread(session_store.rollback, thread_id, rollback_point)
+
+@app.post("/ask/stream")
+async def ask_agent_stream(question: Question):
+    """Stream tool selection, tool results and answer tokens as Server-Sent Events"""
+    return StreamingResponse(
+        stream_agent_events(question.question, question.thread_id, request_budget(question)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/ask/batch")
+async def ask_agent_batch(batch: BatchQuestions):
+    """Process many questions concurrently, returning results in input order"""
+    # The request may lower the parallelism limit but never raise it past the configured cap
+    limit = max(1, min(batch.max_concurrency or BATCH_CONCURRENCY, BATCH_CONCURRENCY))
+    batch_slots = asyncio.Semaphore(limit)
+    
+    async def run_item(index: int, question: str) -> dict:
+        async with batch_slots:
+            started = time.perf_counter()
+            try:
+                item = await run_agent(question)
+            except Exception as e:
+                # A failing question is reported on its own item, not for the whole batch
+                item = {
+                    "messages": [],
+                    "llm_calls": 0,
+                    "cache_read_tokens": 0,
+                    "cache_write_tokens": 0,
+                    "success": False,
+                    "status": "error",
+                    "error": str(e)
+                }
+            item["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return {"index": index, "question": question, **item}
+    
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(run_item(index, question) for index, question in enumerate(batch.questions))
+    )
+    wall_time_ms = (time.perf_counter() - started) * 1000
+    
+    latencies = [item["latency_ms"] for item in results]
+    return {
+        "results": results,
+        "stats": {
+            "count": len(results),
+            "succeeded": sum(1 for item in results if item["success"]),
+            "failed": sum(1 for item in results if not item["success"]),
+            "budget_exceeded": sum(1 for item in results if item["status"] == "budget_exceeded"),
+            "llm_calls": sum(item["llm_calls"] for item in results),
+            "cache_read_tokens": sum(item["cache_read_tokens"] for item in results),
+            "cache_write_tokens": sum(item["cache_write_tokens"] for item in results),
+            "wall_time_ms": round(wall_time_ms, 2),
+            "mean_latency_ms": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            "max_latency_ms": max(latencies, default=0.0),
+            "max_concurrency": limit
+        }
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Expose node and model latency, token and error metrics for Prometheus"""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.get("/stats")
+async def get_stats():
+    """Report model, client pool, answer cache, fast path, history, tool and session statistics"""
+    from calculator_agent.model import get_model_info
+    from calculator_agent.fast_path import get_fast_path_stats
+    from calculator_agent.history import get_default_history_reducer
+    from calculator_agent.tool_executor import get_tool_executor
+    
+    return {
+        "model": get_model_info(),
+        "answer_cache": answer_cache.stats(),
+        "fast_path": get_fast_path_stats(),
+        "history": get_default_history_reducer().stats(),
+        "tools": get_tool_executor().stats(),
+        "sessions": get_session_store().stats()
+    }
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness probe: this worker's event loop is answering requests"""
+    return {"status": "ok", "pid": os.getpid(), "worker": os.environ.get("AGENT_WORKER_ID")}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness probe: the agent is built (warming it up first if needed) and can take requests"""
+    if _agent is None:
+        try:
+            await asyncio.to_thread(warm_up)
+        except Exception as error:
+            return JSONResponse({"ready": False, "error": str(error)}, status_code=503)
+    return {
+        "ready": True,
+        "pid": os.getpid(),
+        "worker": os.environ.get("AGENT_WORKER_ID"),
+        "uptime_seconds": round(time.monotonic() - STARTED_AT, 3)
+    }
+
+@app.post("/warmup")
+async def warmup():
+    """Build the agent and model now instead of on the first question"""
+    return await asyncio.to_thread(warm_up)
+
 # For Vercel serverless deployment
 app_instance = app
 